@@ -0,0 +1,115 @@
+"""Load-test the recommendation API through the ASGI application in-process.
+
+Fires the same requests at the sync and the async career-matches routes
+from many concurrent clients on one event loop (one "worker") and prints
+latency percentiles. Usage:
+
+    python benchmarks/bench_async_api.py --clients 300 --requests 3000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skillpath_project.settings')
+
+import django
+django.setup()
+
+from django.db import connection
+
+from recommender.models import Domain, Skill, Career
+from skillpath_project.asgi import application
+
+
+def fill(n_skills, n_careers, seed):
+    rng = random.Random(seed)
+    domain = Domain.objects.create(name="Benchmark")
+    skills = Skill.objects.bulk_create(Skill(name=f"Skill {i}", domain=domain) for i in range(n_skills))
+    careers = Career.objects.bulk_create(Career(title=f"Career {i}", domain=domain) for i in range(n_careers))
+    Career.required_skills.through.objects.bulk_create(
+        Career.required_skills.through(career_id=career.pk, skill_id=skill.pk)
+        for career in careers for skill in rng.sample(skills, 10)
+    )
+    return domain, skills
+
+
+async def request(path, query):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+    }
+    status = None
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Django listens for a disconnect until the response is sent
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application(scope, receive, send)
+    return status
+
+
+async def load(path, queries, clients):
+    latencies = []
+    pending = iter(queries)
+
+    async def client():
+        for query in pending:
+            start = time.perf_counter()
+            status = await request(path, query)
+            latencies.append(time.perf_counter() - start)
+            assert status == 200, status
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=300)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--skills', type=int, default=2000)
+    parser.add_argument('--careers', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        domain, skills = fill(args.skills, args.careers, args.seed)
+        rng = random.Random(args.seed + 1)
+        queries = [
+            'skills=' + ','.join(str(s.pk) for s in rng.sample(skills, 20))
+            for _ in range(args.requests)
+        ]
+        # Warm the snapshot so both routes measure steady-state serving
+        asyncio.run(request(f'/api/domains/{domain.pk}/careers/', queries[0]))
+
+        for label, path in [('sync view', f'/api/domains/{domain.pk}/careers/'),
+                            ('async view', f'/api/async/domains/{domain.pk}/careers/')]:
+            elapsed, latencies = asyncio.run(load(path, queries, args.clients))
+            pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+            print(f"{label:>10}: {len(latencies) / elapsed:8.0f} req/s  "
+                  f"p50 {pct(0.50):7.2f} ms  p99 {pct(0.99):7.2f} ms  max {latencies[-1] * 1000:7.2f} ms")
+    finally:
+        connection.creation.destroy_test_db(':memory:', verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Time "users like you" neighbour lookups as the profile count grows.
+
+Builds in-memory MinHash LSH indexes over synthetic profiles (skills drawn
+from overlapping interest clusters with Zipf-like popularity, one career
+per cluster), then compares LSH lookups against an exact scan of every
+profile. Recall counts how many of the exact top 10 neighbours with
+Jaccard >= --min-similarity the LSH lookup found. Usage:
+
+    python benchmarks/bench_collaborative.py --profiles 10000 100000 1000000
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skillpath_project.settings')
+
+import django
+django.setup()
+
+from recommender.collaborative import BANDS, NUM_PERM, MinHasher, NeighbourIndex
+
+
+def profiles(count, skills, clusters, per_profile, seed):
+    rng = random.Random(seed)
+    cluster_skills = [rng.sample(range(1, skills + 1), skills // clusters * 2) for _ in range(clusters)]
+    popularity = [1 / (rank + 1) for rank in range(skills // clusters * 2)]
+    for profile_id in range(1, count + 1):
+        cluster = rng.randrange(clusters)
+        chosen = set()
+        while len(chosen) < per_profile:
+            chosen.update(rng.choices(cluster_skills[cluster], popularity, k=per_profile - len(chosen)))
+        yield profile_id, list(chosen), [cluster + 1]
+
+
+def exact(index, query, k):
+    query = set(query)
+    scored = []
+    for row in range(len(index)):
+        row_skills = index.skills[index.skill_offsets[row]:index.skill_offsets[row + 1]]
+        shared = len(query.intersection(row_skills))
+        if shared:
+            scored.append((shared / (len(query) + len(row_skills) - shared), -index.profile_ids[row], row))
+    return [(similarity, row) for similarity, _, row in heapq.nlargest(k, scored)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--skills', type=int, default=5000)
+    parser.add_argument('--clusters', type=int, default=50)
+    parser.add_argument('--skills-per-profile', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--num-perm', type=int, default=NUM_PERM)
+    parser.add_argument('--bands', type=int, default=BANDS)
+    parser.add_argument('--min-similarity', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for count in args.profiles:
+        start = time.perf_counter()
+        index = NeighbourIndex.from_profiles(
+            profiles(count, args.skills, args.clusters, args.skills_per_profile, args.seed),
+            MinHasher(args.num_perm, args.bands))
+        print(f"{count} profiles: index built in {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(args.seed + 1)
+        queries = []
+        for row in rng.sample(range(count), args.queries):
+            skills = list(index.skills[index.skill_offsets[row]:index.skill_offsets[row + 1]])
+            # A new user resembling an existing one: one skill swapped out
+            queries.append(skills[1:] + [rng.randint(1, args.skills)])
+
+        lsh_times, hits, wanted = [], 0, 0
+        for query in queries:
+            start = time.perf_counter()
+            found = index.neighbours(query, k=10)
+            lsh_times.append(time.perf_counter() - start)
+            truth = [pair for pair in exact(index, query, 10) if pair[0] >= args.min_similarity]
+            # Count ties at the cut-off as found
+            cutoff = truth[-1][0] if truth else 1
+            hits += min(len(truth), sum(1 for similarity, _ in found if similarity >= cutoff))
+            wanted += len(truth)
+        scan_times = []
+        for query in queries[:5]:
+            start = time.perf_counter()
+            exact(index, query, 10)
+            scan_times.append(time.perf_counter() - start)
+        lsh_times.sort()
+        print(f"  LSH lookup p50 {lsh_times[len(lsh_times) // 2] * 1000:8.2f} ms  max {lsh_times[-1] * 1000:8.2f} ms"
+              f"  recall@10 {hits / max(wanted, 1):.2f}")
+        print(f"  exact scan p50 {sorted(scan_times)[len(scan_times) // 2] * 1000:8.2f} ms\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Benchmark RecommendationEngine on a seeded synthetic dataset.
+
+Creates a throwaway test database, loads a catalog and users from
+recommender.synthetic, then times each engine operation over a sample of
+profiles. Every operation reports wall time (mean/p50/p95), SQL queries per
+call and tracemalloc peak memory; results can be written as JSON and
+compared against an earlier run. Usage:
+
+    python benchmarks/bench_engine.py --skills 5000 --careers 1000 --users 2000 --output run.json
+    python benchmarks/bench_engine.py ... --compare run.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skillpath_project.settings')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recommender import skill_graph
+from recommender.catalog import load_catalog
+from recommender.models import Career, UserProfile
+from recommender.recommendation_engine import RecommendationEngine
+from recommender.synthetic import create_users, generate_catalog
+
+# Measure the engine itself, not hits on memoised results
+settings.RECOMMENDER_RESULT_CACHE_SIZE = 0
+settings.RECOMMENDER_RESULT_CACHE_BACKEND = None
+
+
+def operations(profiles, careers, rng):
+    """name -> (setup, call); setup runs untimed before each call"""
+    skills = {p.pk: list(p.skills.values_list('pk', flat=True)) for p in profiles}
+    cases = [(p, skills[p.pk], rng.choice(careers)) for p in profiles]
+    nothing = lambda case: None
+    return {
+        'snapshot build': (lambda case: skill_graph.invalidate(), lambda case: skill_graph.get_skill_graph()),
+        'get_matching_careers': (nothing, lambda case: RecommendationEngine.get_matching_careers(
+            case[0].domain_id, case[1], limit=10)),
+        'get_matching_careers (weighted)': (nothing, lambda case: RecommendationEngine.get_matching_careers(
+            case[0].domain_id, case[1], limit=10, scoring='weighted')),
+        'get_matching_careers (salary)': (nothing, lambda case: RecommendationEngine.get_matching_careers(
+            case[0].domain_id, case[1], limit=10, min_salary=100000)),
+        'explain_career_match': (nothing, lambda case: RecommendationEngine.explain_career_match(
+            case[2], case[1], scoring='weighted')),
+        'get_suggested_skills': (nothing, lambda case: RecommendationEngine.get_suggested_skills(
+            case[0].domain_id, case[1])),
+        'plan_learning_path': (nothing, lambda case: RecommendationEngine.plan_learning_path(case[2], case[1])),
+        'generate_learning_path': (nothing, lambda case: RecommendationEngine.generate_learning_path(
+            case[0].user, case[2])),
+    }, cases
+
+
+def measure(setup, call, cases):
+    times, queries = [], 0
+    for case in cases:
+        setup(case)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            call(case)
+            times.append(time.perf_counter() - start)
+        queries += len(captured)
+
+    # Peak memory in a separate pass: tracemalloc would distort the timings
+    peak = 0
+    tracemalloc.start()
+    for case in cases[:max(1, len(cases) // 10)]:
+        setup(case)
+        tracemalloc.reset_peak()
+        call(case)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    times.sort()
+    pct = lambda p: times[min(len(times) - 1, int(p * len(times)))] * 1000
+    return {
+        'calls': len(times),
+        'mean_ms': sum(times) / len(times) * 1000,
+        'p50_ms': pct(0.50),
+        'p95_ms': pct(0.95),
+        'queries_per_call': queries / len(times),
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print changes against a baseline run; returns the regressed operations"""
+    regressions = []
+    print(f"\ncompared with {baseline['timestamp']}:")
+    for name, current in results.items():
+        before = baseline['results'].get(name)
+        if not before:
+            continue
+        change = current['mean_ms'] / before['mean_ms'] - 1 if before['mean_ms'] else 0
+        more_queries = current['queries_per_call'] > before['queries_per_call']
+        regressed = change > threshold or more_queries
+        if regressed:
+            regressions.append(name)
+        print(f"  [{'REGRESSED' if regressed else '    ok   '}] {name:>31}: {change:+7.1%} mean time, "
+              f"{current['queries_per_call'] - before['queries_per_call']:+.2f} queries/call")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--domains', type=int, default=10)
+    parser.add_argument('--skills', type=int, default=5000)
+    parser.add_argument('--careers', type=int, default=1000)
+    parser.add_argument('--depth', type=int, default=6)
+    parser.add_argument('--skills-per-career', type=int, default=10)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--skills-per-user', type=int, default=5)
+    parser.add_argument('--calls', type=int, default=200, help="Calls per operation")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write results to this JSON file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Relative mean-time increase counted as a regression")
+    args = parser.parse_args()
+    params = {k: v for k, v in vars(args).items() if k not in ('output', 'compare', 'threshold')}
+
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        start = time.perf_counter()
+        load_catalog(generate_catalog(
+            domains=args.domains, skills=args.skills, careers=args.careers, depth=args.depth,
+            skills_per_career=args.skills_per_career, seed=args.seed))
+        create_users(args.users, args.skills_per_user, seed=args.seed)
+        print(f"generated {args.skills} skills, {args.careers} careers, {args.users} users "
+              f"in {time.perf_counter() - start:.1f}s\n")
+
+        rng = random.Random(args.seed + 1)
+        profiles = list(UserProfile.objects.select_related('user').order_by('pk'))
+        profiles = [rng.choice(profiles) for _ in range(args.calls)]
+        ops, cases = operations(profiles, list(Career.objects.only('id', 'domain_id')), rng)
+        skill_graph.get_skill_graph()
+
+        results = {}
+        for name, (setup, call) in ops.items():
+            results[name] = result = measure(setup, call, cases)
+            print(f"{name:>31}: mean {result['mean_ms']:8.3f} ms  p50 {result['p50_ms']:8.3f} ms  "
+                  f"p95 {result['p95_ms']:8.3f} ms  {result['queries_per_call']:5.2f} queries  "
+                  f"peak {result['peak_memory_kb']:9.1f} KiB")
+    finally:
+        connection.creation.destroy_test_db(':memory:', verbosity=0)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'params': params,
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('params') != params:
+            print("warning: baseline was run with different parameters")
+        sys.exit(1 if compare(results, baseline, args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
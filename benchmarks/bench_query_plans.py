@@ -0,0 +1,135 @@
+"""Check that the recommender's hot queries are index-backed at scale.
+
+Creates a throwaway SQLite test database, fills it with synthetic rows
+(1M skills by default), runs ANALYZE and prints EXPLAIN QUERY PLAN for
+each hot query. Exits non-zero if any of them scans a table. Usage:
+
+    python benchmarks/bench_query_plans.py --skills 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skillpath_project.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+
+from recommender.models import Domain, Skill, Career, UserProfile, LearningPath, PathStep
+
+
+def fill(n_skills, seed):
+    """Insert synthetic rows with raw executemany; the ORM is too slow here"""
+    rng = random.Random(seed)
+    n_domains = max(1, n_skills // 10000)
+    n_careers = max(1, n_skills // 10)
+    n_users = max(1, n_skills // 10)
+    epoch = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def insert(model, columns, rows):
+        table = model._meta.db_table
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('%s' for _ in columns)})"
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    insert(Domain, ['id', 'name', 'description'], ((d, f"Domain {d}", '') for d in range(1, n_domains + 1)))
+    insert(Skill, ['id', 'name', 'domain_id', 'description', 'difficulty_level'],
+           ((s, f"Skill {s}", s % n_domains + 1, '', 'Beginner') for s in range(1, n_skills + 1)))
+    insert(Skill.prerequisites.through, ['from_skill_id', 'to_skill_id'],
+           ((s, s - 1) for s in range(2, n_skills + 1)))
+    salaries = [rng.randrange(40, 200) * 1000 for _ in range(n_careers)]
+    insert(Career, ['id', 'title', 'domain_id', 'description', 'average_salary',
+                    'salary_min', 'salary_max', 'salary_currency'],
+           ((c, f"Career {c}", c % n_domains + 1, '', f"${low:,} - ${low + 30000:,}", low, low + 30000, 'USD')
+            for c, low in enumerate(salaries, start=1)))
+    insert(Career.required_skills.through, ['career_id', 'skill_id'],
+           ((c, s) for c in range(1, n_careers + 1) for s in rng.sample(range(1, n_skills + 1), 5)))
+    insert(User, ['id', 'username', 'password', 'is_superuser', 'first_name', 'last_name', 'email',
+                  'is_staff', 'is_active', 'date_joined'],
+           ((u, f"user{u}", '', False, '', '', '', False, True, epoch) for u in range(1, n_users + 1)))
+    insert(UserProfile, ['id', 'user_id', 'domain_id', 'bio'],
+           ((u, u, u % n_domains + 1, '') for u in range(1, n_users + 1)))
+    insert(UserProfile.skills.through, ['userprofile_id', 'skill_id'],
+           ((u, s) for u in range(1, n_users + 1) for s in rng.sample(range(1, n_skills + 1), 5)))
+    insert(LearningPath, ['id', 'user_id', 'career_id', 'created_at', 'title'],
+           ((p, rng.randint(1, n_users), rng.randint(1, n_careers), epoch + timedelta(minutes=p), '')
+            for p in range(1, n_users + 1)))
+    insert(PathStep, ['learning_path_id', 'skill_id', 'step_order', 'status'],
+           ((p, rng.randint(1, n_skills), step, 'Not Started')
+            for p in range(1, n_users + 1) for step in range(1, 4)))
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def hot_queries():
+    epoch = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return {
+        # gui_app.save_profile
+        'skill by name in domain': Skill.objects.filter(name='Skill 42', domain_id=43),
+        # skill explorer / suggestions for one domain
+        'skills of a domain': Skill.objects.filter(domain_id=1),
+        'careers of a domain': Career.objects.filter(domain_id=1),
+        'career by title in domain': Career.objects.filter(title='Career 7', domain_id=8),
+        # salary filters (?min_salary= / ?max_salary=)
+        'careers paying at least': Career.objects.filter(salary_max__gte=225000),
+        'careers starting at most': Career.objects.filter(salary_min__lte=41000),
+        # LearningPathAdmin and "my paths"
+        "user's paths, newest first": LearningPath.objects.filter(user_id=1).order_by('-created_at'),
+        'paths created in a range': LearningPath.objects.filter(created_at__gte=epoch, created_at__lt=epoch + timedelta(days=1)),
+        # generate_learning_path(reuse_existing=True)
+        'existing path steps': PathStep.objects.filter(learning_path__user_id=1, learning_path__career_id=2)
+                                               .order_by('learning_path_id', 'step_order'),
+        # get_matching_careers_batch / generate_learning_path
+        'profile skills': UserProfile.skills.through.objects.filter(userprofile_id__in=[1, 2, 3]),
+        'profile skills by user': UserProfile.skills.through.objects.filter(userprofile__user_id=1),
+        'careers requiring a skill': Career.required_skills.through.objects.filter(skill_id=1),
+        'skills depending on a skill': Skill.prerequisites.through.objects.filter(to_skill_id=1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--skills', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        start = time.perf_counter()
+        fill(args.skills, args.seed)
+        print(f"filled {args.skills} skills in {time.perf_counter() - start:.1f}s\n")
+
+        failures = 0
+        for name, queryset in hot_queries().items():
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = [row[-1] for row in cursor.fetchall()]
+                start = time.perf_counter()
+                cursor.execute(sql, params)
+                cursor.fetchall()
+                elapsed = time.perf_counter() - start
+            # A bare "SCAN <table>" (no index) is a full table scan
+            scans = [step for step in plan if step.startswith('SCAN') and 'INDEX' not in step]
+            failures += bool(scans)
+            print(f"[{'FAIL' if scans else ' ok '}] {name} ({elapsed * 1000:.2f} ms)")
+            for step in plan:
+                print(f"         {step}")
+        print(f"\n{failures} of {len(hot_queries())} queries scan a table")
+    finally:
+        connection.creation.destroy_test_db(':memory:', verbosity=0)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
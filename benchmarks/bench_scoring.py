@@ -0,0 +1,102 @@
+"""Compare career scoring strategies on a synthetic catalog.
+
+Runs without a database: the SkillGraph is built straight from generated
+rows. Usage:
+
+    python benchmarks/bench_scoring.py --careers 10000 --skills 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skillpath_project.settings')
+
+import django
+django.setup()
+
+from recommender.scoring import match_counts, scoring_model
+from recommender.skill_graph import SkillGraph
+
+
+def build_graph(n_careers, n_skills, skills_per_career, n_domains, seed):
+    rng = random.Random(seed)
+    domains = [(d, f"Domain {d}", "") for d in range(1, n_domains + 1)]
+    skills = [(s, f"Skill {s}", rng.randint(1, n_domains), "", "Beginner") for s in range(1, n_skills + 1)]
+    careers = [(c, f"Career {c}", rng.randint(1, n_domains), "", None) for c in range(1, n_careers + 1)]
+    required = [
+        (c, s)
+        for c in range(1, n_careers + 1)
+        for s in rng.sample(range(1, n_skills + 1), skills_per_career)
+    ]
+    return SkillGraph(domains, skills, careers, [], required), required
+
+
+def timeit(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--careers', type=int, default=10000)
+    parser.add_argument('--skills', type=int, default=5000)
+    parser.add_argument('--skills-per-career', type=int, default=15)
+    parser.add_argument('--user-skills', type=int, default=50)
+    parser.add_argument('--domains', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph, required = build_graph(args.careers, args.skills, args.skills_per_career, args.domains, args.seed)
+    print(f"graph build: {time.perf_counter() - start:.3f}s "
+          f"({args.careers} careers x {args.skills} skills, {len(required)} edges)")
+
+    user_ids = random.Random(args.seed + 1).sample(range(1, args.skills + 1), args.user_skills)
+    user_skills = graph.skill_set(user_ids)
+
+    # Baseline: what get_matching_careers used to do, minus the queries
+    career_sets = [set() for _ in graph.career_ids]
+    for c, s in required:
+        career_sets[graph.career_index[c]].add(s)
+
+    def legacy():
+        user_set = set(user_ids)
+        return [len(skills & user_set) for skills in career_sets]
+
+    def per_career_csr():
+        held = set(user_skills)
+        return [sum(1 for s in graph.skills_required_by(c) if s in held) for c in range(len(graph.career_ids))]
+
+    def postings():
+        return match_counts(graph, user_skills)
+
+    expected = None
+    for name, fn in [('set intersection', legacy),
+                     ('per-career CSR scan', per_career_csr),
+                     ('postings (all careers)', postings)]:
+        best, counts = timeit(fn, args.repeat)
+        if expected is None:
+            expected = counts
+        assert counts == expected, name
+        print(f"{name:>26}: {best * 1000:8.3f} ms")
+
+    # Cross-domain mode only visits the careers sharing a skill with the user
+    fraction = scoring_model('fraction')
+    best, scores = timeit(lambda: list(fraction.score_touched(graph, user_skills)), args.repeat)
+    assert {c: matching for c, _, matching, _ in scores} == {c: n for c, n in enumerate(expected) if n}
+    print(f"{'inverted index (touched)':>26}: {best * 1000:8.3f} ms  ({len(scores)} careers touched)")
+
+
+if __name__ == '__main__':
+    main()
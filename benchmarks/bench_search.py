@@ -0,0 +1,112 @@
+"""Time prefix and fuzzy skill search on a large synthetic catalog.
+
+Creates a throwaway SQLite test database (FTS5 tables and triggers come
+from the migrations), inserts synthetic skills with raw executemany and
+times full-text prefix lookups, the in-memory prefix index and trigram
+fuzzy lookups. Usage:
+
+    python benchmarks/bench_search.py --skills 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skillpath_project.settings')
+
+import django
+django.setup()
+
+from django.db import connection
+
+from recommender import search
+from recommender.skill_graph import get_skill_graph
+
+WORDS = ['python', 'java', 'script', 'data', 'cloud', 'web', 'machine', 'learning', 'network', 'security',
+         'design', 'mobile', 'react', 'node', 'sql', 'linux', 'docker', 'kubernetes', 'analytics', 'testing']
+SYLLABLES = [c + v for c in 'bcdfghjklmnprstvwz' for v in 'aeiou']
+
+
+def fill(n_skills, seed):
+    rng = random.Random(seed)
+    n_domains = max(1, n_skills // 10000)
+    names = set()
+    while len(names) < n_skills:
+        coined = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        names.add(f"{rng.choice(WORDS).title()} {coined.title()} {rng.randint(1, 99)}")
+    with connection.cursor() as cursor:
+        cursor.executemany("INSERT INTO recommender_domain (id, name, description) VALUES (%s, %s, '')",
+                           [(d, f"Domain {d}") for d in range(1, n_domains + 1)])
+        cursor.executemany(
+            "INSERT INTO recommender_skill (name, domain_id, description, difficulty_level) "
+            "VALUES (%s, %s, %s, 'Beginner')",
+            [(name, rng.randint(1, n_domains), f"Learn {name.lower()} with {rng.choice(WORDS)}")
+             for name in sorted(names)])
+    return sorted(names)
+
+
+def timed(fn, queries, repeat=3):
+    best = []
+    for query in queries:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn(query)
+            times.append(time.perf_counter() - start)
+        best.append(min(times))
+    best.sort()
+    return best[len(best) // 2] * 1000, best[-1] * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--skills', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        start = time.perf_counter()
+        names = fill(args.skills, args.seed)
+        print(f"inserted {args.skills} skills (FTS kept in sync by triggers) in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        graph = get_skill_graph()
+        print(f"skill graph: {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        index = search.name_index(graph, 'skills')
+        print(f"in-memory name index: {time.perf_counter() - start:.1f}s\n")
+
+        rng = random.Random(args.seed + 1)
+        sample = rng.sample(names, args.queries)
+        prefixes = [name.split()[1][:rng.randint(2, 5)] for name in sample]
+        typos = []
+        for name in sample:
+            word = name.split()[1]
+            k = rng.randrange(len(word))
+            typos.append(name.replace(word, word[:k] + word[k + 1:]))
+
+        cases = [
+            ('FTS5 prefix', prefixes, lambda q: search.search('skills', q, limit=10, fuzzy=False)),
+            ('in-memory prefix', prefixes, lambda q: index.prefix(search.WORD.findall(q.casefold()), 10)),
+            ('trigram fuzzy (1 typo)', typos, lambda q: index.fuzzy(q.casefold(), 10)),
+            ('search() with typo', typos, lambda q: search.search('skills', q, limit=10)),
+        ]
+        for label, queries, fn in cases:
+            p50, worst, _ = timed(fn, queries)
+            print(f"{label:>24}: p50 {p50:8.2f} ms  max {worst:8.2f} ms")
+
+        hits = sum(any(obj.name == name for obj, _ in search.search('skills', typo, limit=10))
+                   for name, typo in zip(sample, typos))
+        print(f"\nfuzzy recall@10 for one-typo queries: {hits}/{len(sample)}")
+    finally:
+        connection.creation.destroy_test_db(':memory:', verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
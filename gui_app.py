@@ -1,7 +1,11 @@
 # gui_app.py (replace existing file with this)
 import os
+import queue
 import sys
 import tkinter as tk
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
 from tkinter import ttk, messagebox, scrolledtext
 
 # Ensure project root is on sys.path
@@ -17,14 +21,297 @@ django.setup()
 
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from recommender.models import Domain, Skill, Career, UserProfile
+from django.db import close_old_connections
+from recommender.models import Domain, Career, UserProfile
+from recommender.profiles import set_profile_skills
 from recommender.recommendation_engine import RecommendationEngine
+from recommender.skill_graph import PrerequisiteCycleError, get_skill_graph
+
+class BackgroundRunner:
+    """Runs blocking ORM/engine calls on worker threads.
+
+    Results are queued by the workers and handed to their callbacks on the
+    Tk thread by polling with ``root.after``, so no widget is touched from
+    another thread. cancel_pending() (called on every screen change) drops
+    the results of everything submitted before it; submitting on a
+    ``channel`` also drops the previous, still-pending request on that
+    channel, e.g. when the user picks another domain before the last one loaded.
+    """
+    POLL_MS = 30
+
+    def __init__(self, root, max_workers=2):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gui-worker')
+        self.results = queue.SimpleQueue()
+        self.generation = 0
+        self.channels = {}
+        self.futures = []
+        self.pending = 0
+        self.tickets = count(1)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, channel=None):
+        ticket = next(self.tickets)
+        if channel is not None:
+            self.channels[channel] = ticket
+        request = (self.generation, channel, ticket, on_done, on_error)
+        future = self.executor.submit(self._run, fn, *args)
+        future.add_done_callback(lambda f: self.results.put((request, f)))
+        self.futures = [f for f in self.futures if not f.done()] + [future]
+        self.pending += 1
+        if self.pending == 1:
+            self.root.after(self.POLL_MS, self.poll)
+        return ticket
+
+    @staticmethod
+    def _run(fn, *args):
+        try:
+            return fn(*args)
+        finally:
+            close_old_connections()
+
+    def is_current(self, request):
+        generation, channel, ticket, _, _ = request
+        return generation == self.generation and (channel is None or self.channels.get(channel) == ticket)
+
+    def cancel_pending(self):
+        """Forget every request submitted so far; queued ones never start"""
+        self.generation += 1
+        self.channels.clear()
+        for future in self.futures:
+            future.cancel()
+        self.futures = []
+
+    def poll(self):
+        while True:
+            try:
+                request, future = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            if future.cancelled() or not self.is_current(request):
+                continue
+            _, _, _, on_done, on_error = request
+            error = future.exception()
+            if error is None:
+                if on_done:
+                    on_done(future.result())
+            elif on_error:
+                on_error(error)
+            else:
+                raise error
+        if self.pending:
+            self.root.after(self.POLL_MS, self.poll)
+
+    def shutdown(self):
+        self.cancel_pending()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# --- background work: these run on worker threads and never touch widgets ---
+def check_login(username, password):
+    """(user, messages, error); password hashing makes this slow"""
+    user = authenticate(username=username, password=password)
+    if user:
+        UserProfile.objects.get_or_create(user=user)
+        return user, [], None
+
+    # deeper check to diagnose
+    u = User.objects.filter(username=username).first()
+    if not u:
+        return None, [f"User not found in DB: {username}"], "User not found"
+    ok = u.check_password(password)
+    messages = [f"User exists, check_password: {ok}"]
+    if ok:
+        # fallback
+        return u, messages, None
+    return None, messages, "Invalid password"
+
+
+def register_user(username, password):
+    """Error message, or None once the user and profile exist"""
+    if User.objects.filter(username=username).exists():
+        return "Username already exists"
+    user = User.objects.create_user(username=username, password=password)
+    UserProfile.objects.get_or_create(user=user)
+    return None
+
+
+def domain_names():
+    return list(Domain.objects.values_list('name', flat=True))
+
+
+def domain_skill_rows(domain_name, with_prerequisites=False):
+    """(skill id, row text, search text) for every skill of a domain, from the in-memory skill graph"""
+    graph = get_skill_graph()
+    d = next((i for i, row in enumerate(graph.domain_rows) if row[1] == domain_name), None)
+    if d is None:
+        return []
+    rows = []
+    for i in graph.domain_skills[d]:
+        skill_id, name, _, _, level = graph.skill_rows[i]
+        text = f"{name} — {level}" if with_prerequisites else name
+        prereqs = graph.prerequisites[i] if with_prerequisites else ()
+        if prereqs:
+            text += "    Prereqs: " + ", ".join(graph.skill_rows[p][1] for p in prereqs)
+        rows.append((skill_id, text, text.casefold()))
+    return rows
+
+
+def save_profile_skills(user, domain_name, skill_ids):
+    d = Domain.objects.filter(name=domain_name).first()
+    profile, _ = UserProfile.objects.get_or_create(user=user)
+    profile.domain = d
+    profile.save()
+    set_profile_skills(profile, skill_ids if d else (), domain=d)
+
+
+def recommendation_text(user):
+    profile = UserProfile.objects.filter(user=user).first()
+    if not profile or not profile.domain:
+        return "No profile or domain set. Please setup profile.\n"
+
+    results = RecommendationEngine.get_top_careers(profile, domain=profile.domain_id, limit=None)
+    if not results:
+        return "No matching careers found.\n"
+    lines = []
+    for i, r in enumerate(results, start=1):
+        c = r['career']
+        lines.append(f"{i}. {c.title} ({c.domain.name})\n")
+        lines.append(f"   Score {r['score']:.2f} - {r['matching_skills']}/{r['total_required']}\n")
+        if getattr(c, 'average_salary', None):
+            lines.append(f"   Salary: {c.average_salary}\n")
+        lines.append(f"   {c.description}\n\n")
+    return "".join(lines)
+
+
+def learning_path_text(user):
+    profile = UserProfile.objects.filter(user=user).first()
+    if not profile or not profile.domain:
+        return "No profile/domain. Set up profile first.\n"
+
+    results = RecommendationEngine.get_matching_careers(profile.domain, list(profile.skills.all()), limit=1)
+    if not results:
+        return "No career recommendations to build a path.\n"
+
+    top = results[0]['career']
+    lines = [f"Top career: {top.title}\n\n"]
+    try:
+        path = RecommendationEngine.generate_learning_path(user, top, reuse_existing=True)
+    except PrerequisiteCycleError as e:
+        lines.append(f"Cannot order this path: {e}\n")
+        return "".join(lines)
+    steps = path.steps.select_related('skill').prefetch_related('skill__prerequisites')
+    if not steps:
+        lines.append("No path generated.\n")
+    for step in steps:
+        skill = step.skill
+        lines.append(f"{step.step_order}. {skill.name} — {skill.difficulty_level}\n")
+        prereqs = skill.prerequisites.all()
+        if prereqs:
+            lines.append("    Prereqs: " + ", ".join([p.name for p in prereqs]) + "\n")
+        lines.append("\n")
+    return "".join(lines)
+
+
+def filter_rows(rows, query):
+    """Rows whose casefolded search text contains every word of query"""
+    for word in query.casefold().split():
+        rows = [row for row in rows if word in row[2]]
+    return rows
+
+
+class VirtualList(ttk.Frame):
+    """Scrollable list of (key, text, search text) rows that only draws the rows in view.
+
+    Rows have a fixed height, so the visible slice follows directly from the
+    scroll position and a domain with tens of thousands of skills draws as
+    fast as one with thirty. filter() narrows the rows incrementally as the
+    user types; with ``selectable`` clicking a row toggles its key in
+    ``selected``, which survives filtering.
+    """
+    ROW_HEIGHT = 20
+
+    def __init__(self, parent, selectable=False, height=16, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.selectable = selectable
+        self.items = []
+        self.rows = []
+        self.query = ""
+        self.selected = set()
+        self.top_row = 0
+
+        self.canvas = tk.Canvas(self, height=height * self.ROW_HEIGHT, background='white', highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.yview)
+        self.canvas.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+        self.canvas.bind('<Configure>', lambda e: self.redraw())
+        self.canvas.bind('<MouseWheel>', lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        self.canvas.bind('<Button-4>', lambda e: self.scroll(-1))
+        self.canvas.bind('<Button-5>', lambda e: self.scroll(1))
+        self.canvas.bind('<Button-1>', self.click)
+
+    def set_items(self, items):
+        self.items = items
+        self.rows = filter_rows(items, self.query)
+        self.top_row = 0
+        self.redraw()
+
+    def filter(self, query):
+        # A longer query can only match a subset of the current rows
+        source = self.rows if self.query and query.startswith(self.query) else self.items
+        self.query = query
+        self.rows = filter_rows(source, query)
+        self.top_row = 0
+        self.redraw()
+
+    def visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self.ROW_HEIGHT)
+
+    def scroll_to(self, row):
+        self.top_row = max(0, min(row, len(self.rows) - self.visible_rows()))
+        self.redraw()
+
+    def scroll(self, units):
+        self.scroll_to(self.top_row + 3 * units)
+
+    def yview(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.rows)))
+        elif unit == 'pages':
+            self.scroll_to(self.top_row + int(amount) * self.visible_rows())
+        else:
+            self.scroll_to(self.top_row + int(amount))
+
+    def click(self, event):
+        row = self.top_row + event.y // self.ROW_HEIGHT
+        if self.selectable and row < len(self.rows):
+            key = self.rows[row][0]
+            self.selected.symmetric_difference_update({key})
+            self.redraw()
+
+    def redraw(self):
+        canvas = self.canvas
+        canvas.delete('all')
+        width = canvas.winfo_width()
+        count = self.visible_rows()
+        for offset, (key, text, _) in enumerate(self.rows[self.top_row:self.top_row + count]):
+            y = offset * self.ROW_HEIGHT
+            if key in self.selected:
+                canvas.create_rectangle(0, y, width, y + self.ROW_HEIGHT, fill='#cce4ff', outline='')
+            canvas.create_text(6, y + self.ROW_HEIGHT // 2, text=text, anchor='w')
+        if self.rows:
+            self.scrollbar.set(self.top_row / len(self.rows), min(1, (self.top_row + count) / len(self.rows)))
+        else:
+            self.scrollbar.set(0, 1)
+
 
 class SkillPathApp:
     def __init__(self, root):
         self.root = root
         self.root.title("SkillPath Recommender")
         self.root.geometry("980x680")
+        self.runner = BackgroundRunner(root)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
         # Layout frames
         self.top = ttk.Frame(root, padding=6)
@@ -56,9 +343,64 @@ class SkillPathApp:
             pass
 
     def clear_body(self):
+        # Results of work started for the previous screen are dropped
+        self.runner.cancel_pending()
         for w in self.body.winfo_children():
             w.destroy()
 
+    def close(self):
+        self.runner.shutdown()
+        self.root.destroy()
+
+    def run(self, fn, *args, on_done, on_failed=None, channel=None):
+        """Run fn(*args) in the background and call on_done(result) on the Tk thread"""
+        def on_error(e):
+            if on_failed:
+                on_failed()
+            self.log(f"{fn.__name__} error:", e)
+            messagebox.showerror("Error", f"{e}")
+        return self.runner.submit(fn, *args, on_done=on_done, on_error=on_error, channel=channel)
+
+    def loading(self, parent, text="Loading..."):
+        """Busy indicator; destroy the returned frame when the data arrives"""
+        frame = ttk.Frame(parent)
+        frame.pack(pady=10)
+        ttk.Label(frame, text=text).pack()
+        bar = ttk.Progressbar(frame, mode='indeterminate', length=200)
+        bar.pack(pady=4)
+        bar.start(15)
+        return frame
+
+    def filtered_list(self, parent, selectable=False, height=16):
+        """A VirtualList under a type-to-filter entry"""
+        query = tk.StringVar()
+        row = ttk.Frame(parent)
+        row.pack(fill='x', padx=10)
+        ttk.Label(row, text="Filter:").pack(side='left')
+        ttk.Entry(row, textvariable=query).pack(side='left', fill='x', expand=True, padx=6)
+        skills_list = VirtualList(parent, selectable=selectable, height=height)
+        skills_list.pack(fill='both', expand=True, padx=10, pady=6)
+
+        # Filter once typing pauses rather than on every keystroke
+        pending = []
+
+        def apply():
+            pending.clear()
+            skills_list.filter(query.get())
+
+        def changed(*_):
+            if pending:
+                self.root.after_cancel(pending.pop())
+            pending.append(self.root.after(120, apply))
+        query.trace_add('write', changed)
+        return skills_list
+
+    def show_text(self, txt, text):
+        txt.configure(state='normal')
+        txt.delete('1.0', 'end')
+        txt.insert('end', text)
+        txt.configure(state='disabled')
+
     # --- Login / Register ---
     def show_login_screen(self):
         self.clear_body()
@@ -78,8 +420,19 @@ class SkillPathApp:
 
         btns = ttk.Frame(self.body)
         btns.pack(pady=8)
-        ttk.Button(btns, text="Login", command=self.login).pack(side='left', padx=6)
-        ttk.Button(btns, text="Register", command=self.register).pack(side='left', padx=6)
+        self.login_buttons = [
+            ttk.Button(btns, text="Login", command=self.login),
+            ttk.Button(btns, text="Register", command=self.register),
+        ]
+        for button in self.login_buttons:
+            button.pack(side='left', padx=6)
+        self.login_status = ttk.Label(self.body, text="")
+        self.login_status.pack()
+
+    def set_login_busy(self, text):
+        for button in self.login_buttons:
+            button.configure(state='disabled' if text else 'normal')
+        self.login_status.configure(text=text)
 
     def login(self):
         username = (self.username_entry.get() or "").strip()
@@ -90,34 +443,25 @@ class SkillPathApp:
             messagebox.showerror("Error", "Please enter username and password")
             return
 
-        try:
-            user = authenticate(username=username, password=password)
-        except Exception as e:
-            self.log("authenticate error:", e)
-            messagebox.showerror("Error", f"Authentication error: {e}")
-            return
-
-        if user:
+        def done(result):
+            user, messages, error = result
+            self.set_login_busy("")
+            for message in messages:
+                self.log(message)
+            if error:
+                messagebox.showerror("Error", error)
+                return
             self.current_user = user
-            UserProfile.objects.get_or_create(user=user)
             self.log("Login success:", username)
             self.show_main_menu()
-            return
 
-        # deeper check to diagnose
-        u = User.objects.filter(username=username).first()
-        if not u:
-            messagebox.showerror("Error", "User not found")
-            self.log("User not found in DB:", username)
-            return
-        ok = u.check_password(password)
-        self.log("User exists, check_password:", ok)
-        if ok:
-            # fallback
-            self.current_user = u
-            self.show_main_menu()
-        else:
-            messagebox.showerror("Error", "Invalid password")
+        def failed(e):
+            self.set_login_busy("")
+            self.log("authenticate error:", e)
+            messagebox.showerror("Error", f"Authentication error: {e}")
+
+        self.set_login_busy("Signing in...")
+        self.runner.submit(check_login, username, password, on_done=done, on_error=failed)
 
     def register(self):
         username = (self.username_entry.get() or "").strip()
@@ -130,14 +474,17 @@ class SkillPathApp:
         if len(password) < 4:
             messagebox.showerror("Error", "Password must be at least 4 chars")
             return
-        if User.objects.filter(username=username).exists():
-            messagebox.showerror("Error", "Username already exists")
-            return
 
-        user = User.objects.create_user(username=username, password=password)
-        UserProfile.objects.get_or_create(user=user)
-        messagebox.showinfo("Success", "Registered. Please login.")
-        self.username_entry.delete(0, 'end'); self.password_entry.delete(0, 'end')
+        def done(error):
+            self.set_login_busy("")
+            if error:
+                messagebox.showerror("Error", error)
+                return
+            messagebox.showinfo("Success", "Registered. Please login.")
+            self.username_entry.delete(0, 'end'); self.password_entry.delete(0, 'end')
+
+        self.set_login_busy("Registering...")
+        self.run(register_user, username, password, on_done=done, on_failed=lambda: self.set_login_busy(""))
 
     # --- Main menu ---
     def show_main_menu(self):
@@ -179,138 +526,99 @@ class SkillPathApp:
         self.clear_body()
         ttk.Label(self.body, text="Setup Profile", font=('Segoe UI', 14, 'bold')).pack(pady=6)
 
-        domain_names = [d.name for d in Domain.objects.all()]
-        domain_var = tk.StringVar(value=domain_names[0] if domain_names else "")
+        domain_var = tk.StringVar()
         ttk.Label(self.body, text="Select domain:").pack(anchor='w', padx=10)
-        cmb = ttk.Combobox(self.body, values=domain_names, textvariable=domain_var, width=48)
+        cmb = ttk.Combobox(self.body, textvariable=domain_var, width=48, state='disabled')
         cmb.pack(padx=10, pady=6)
 
-        skills_list = tk.Listbox(self.body, selectmode='extended', height=8)
-        skills_list.pack(padx=10, pady=6, fill='x')
+        skills_list = self.filtered_list(self.body, selectable=True, height=10)
+        status = ttk.Label(self.body, text="")
+        status.pack()
+
+        def show_skills(rows):
+            status.configure(text="Click skills to select them")
+            skills_list.set_items(rows)
 
         def load_skills(e=None):
-            skills_list.delete(0, 'end')
-            d = Domain.objects.filter(name=domain_var.get()).first()
-            if d:
-                for s in d.skills.all():
-                    skills_list.insert('end', s.name)
+            skills_list.selected.clear()
+            skills_list.set_items([])
+            status.configure(text="Loading skills...")
+            self.run(domain_skill_rows, domain_var.get(), on_done=show_skills, channel='skills')
         cmb.bind("<<ComboboxSelected>>", load_skills)
-        load_skills()
+
+        def show_domains(names):
+            cmb.configure(values=names, state='normal')
+            if names:
+                domain_var.set(names[0])
+            load_skills()
+        self.run(domain_names, on_done=show_domains)
 
         def save_profile():
-            d = Domain.objects.filter(name=domain_var.get()).first()
-            profile, _ = UserProfile.objects.get_or_create(user=self.current_user)
-            profile.domain = d
-            profile.save()
-            profile.skills.clear()
-            for i in skills_list.curselection():
-                name = skills_list.get(i)
-                s = Skill.objects.filter(name=name, domain=d).first()
-                if s:
-                    profile.skills.add(s)
-            profile.save()
-            messagebox.showinfo("Saved", "Profile saved")
-            self.show_main_menu()
+            skill_ids = list(skills_list.selected)
+            save_button.configure(state='disabled')
+            status.configure(text="Saving...")
+
+            def saved(_):
+                messagebox.showinfo("Saved", "Profile saved")
+                self.show_main_menu()
+
+            def failed():
+                save_button.configure(state='normal')
+                status.configure(text="")
+            self.run(save_profile_skills, self.current_user, domain_var.get(), skill_ids, on_done=saved, on_failed=failed)
 
-        ttk.Button(self.body, text="Save Profile", command=save_profile).pack(pady=8)
+        save_button = ttk.Button(self.body, text="Save Profile", command=save_profile)
+        save_button.pack(pady=8)
         ttk.Button(self.body, text="Back", command=self.show_main_menu).pack(pady=6)
 
     # --- Recommendations ---
-    def show_recommendations(self):
+    def show_text_screen(self, title, load, loading_text):
+        """A read-only text screen filled in by load(self.current_user) in the background"""
         self.clear_body()
-        ttk.Label(self.body, text="Career Recommendations", font=('Segoe UI', 14, 'bold')).pack(pady=6)
-        txt = scrolledtext.ScrolledText(self.body, height=18)
+        ttk.Label(self.body, text=title, font=('Segoe UI', 14, 'bold')).pack(pady=6)
+        busy = self.loading(self.body, loading_text)
+        txt = scrolledtext.ScrolledText(self.body, height=18, state='disabled')
         txt.pack(fill='both', expand=True, padx=8, pady=6)
+        ttk.Button(self.body, text="Back", command=self.show_main_menu).pack(pady=8)
 
-        profile = UserProfile.objects.filter(user=self.current_user).first()
-        if not profile or not profile.domain:
-            txt.insert('end', "No profile or domain set. Please setup profile.\n")
-            txt.configure(state='disabled')
-            ttk.Button(self.body, text="Back", command=self.show_main_menu).pack(pady=8)
-            return
+        def done(text):
+            busy.destroy()
+            self.show_text(txt, text)
+        self.run(load, self.current_user, on_done=done)
 
-        domain = profile.domain
-        skills = list(profile.skills.all())
-        results = RecommendationEngine.get_matching_careers(domain, skills)
-        if not results:
-            txt.insert('end', "No matching careers found.\n")
-        else:
-            for i, r in enumerate(results, start=1):
-                c = r['career']
-                txt.insert('end', f"{i}. {c.title} ({c.domain.name})\n")
-                txt.insert('end', f"   Score {r['score']:.2f} - {r['matching_skills']}/{r['total_required']}\n")
-                if getattr(c, 'average_salary', None):
-                    txt.insert('end', f"   Salary: {c.average_salary}\n")
-                txt.insert('end', f"   {c.description}\n\n")
-        txt.configure(state='disabled')
-        ttk.Button(self.body, text="Back", command=self.show_main_menu).pack(pady=8)
+    def show_recommendations(self):
+        self.show_text_screen("Career Recommendations", recommendation_text, "Scoring careers...")
 
     # --- Learning path ---
     def show_learning_path(self):
-        self.clear_body()
-        ttk.Label(self.body, text="Learning Path", font=('Segoe UI', 14, 'bold')).pack(pady=6)
-        txt = scrolledtext.ScrolledText(self.body, height=18)
-        txt.pack(fill='both', expand=True, padx=8, pady=6)
-
-        profile = UserProfile.objects.filter(user=self.current_user).first()
-        if not profile or not profile.domain:
-            txt.insert('end', "No profile/domain. Set up profile first.\n")
-            txt.configure(state='disabled')
-            ttk.Button(self.body, text="Back", command=self.show_main_menu).pack(pady=8)
-            return
-
-        results = RecommendationEngine.get_matching_careers(profile.domain, list(profile.skills.all()))
-        if not results:
-            txt.insert('end', "No career recommendations to build a path.\n")
-            txt.configure(state='disabled')
-            ttk.Button(self.body, text="Back", command=self.show_main_menu).pack(pady=8)
-            return
-
-        top = results[0]['career']
-        txt.insert('end', f"Top career: {top.title}\n\n")
-        path = RecommendationEngine.generate_learning_path(top, list(profile.skills.all()))
-        if not path:
-            txt.insert('end', "No path generated.\n")
-        else:
-            for i, step in enumerate(path, start=1):
-                name = getattr(step, 'name', str(step))
-                level = getattr(step, 'difficulty_level', '')
-                txt.insert('end', f"{i}. {name} — {level}\n")
-                try:
-                    prereqs = step.prerequisites.all()
-                except Exception:
-                    prereqs = []
-                if prereqs:
-                    txt.insert('end', "    Prereqs: " + ", ".join([p.name for p in prereqs]) + "\n")
-                txt.insert('end', "\n")
-        txt.configure(state='disabled')
-        ttk.Button(self.body, text="Back", command=self.show_main_menu).pack(pady=8)
+        self.show_text_screen("Learning Path", learning_path_text, "Building your learning path...")
 
     # --- Skill explorer ---
     def show_skill_explorer(self):
         self.clear_body()
         ttk.Label(self.body, text="Skill Explorer", font=('Segoe UI', 14, 'bold')).pack(pady=6)
-        names = [d.name for d in Domain.objects.all()]
-        var = tk.StringVar(value=names[0] if names else "")
-        cmb = ttk.Combobox(self.body, values=names, textvariable=var)
+        var = tk.StringVar()
+        cmb = ttk.Combobox(self.body, textvariable=var, state='disabled')
         cmb.pack(pady=6)
-        txt = scrolledtext.ScrolledText(self.body, height=16)
-        txt.pack(fill='both', expand=True, padx=8, pady=6)
+        status = ttk.Label(self.body, text="Loading domains...")
+        status.pack()
+        skills_list = self.filtered_list(self.body, height=16)
+
+        def done(rows):
+            status.configure(text=f"{len(rows)} skills")
+            skills_list.set_items(rows)
 
         def show(_=None):
-            txt.configure(state='normal'); txt.delete('1.0','end')
-            d = Domain.objects.filter(name=var.get()).first()
-            if not d:
-                txt.insert('end', 'No domain selected\n')
-            else:
-                for s in d.skills.all():
-                    txt.insert('end', f"{s.name} — {s.difficulty_level}\n")
-                    if s.prerequisites.exists():
-                        txt.insert('end', "    Prereqs: " + ", ".join([p.name for p in s.prerequisites.all()]) + "\n")
-                    txt.insert('end', "\n")
-            txt.configure(state='disabled')
+            status.configure(text="Loading skills...")
+            self.run(domain_skill_rows, var.get(), True, on_done=done, channel='explorer')
         cmb.bind("<<ComboboxSelected>>", show)
-        show()
+
+        def show_domains(names):
+            cmb.configure(values=names, state='normal')
+            if names:
+                var.set(names[0])
+            show()
+        self.run(domain_names, on_done=show_domains)
         ttk.Button(self.body, text="Back", command=self.show_main_menu).pack(pady=8)
 
 if __name__ == "__main__":
@@ -1,44 +1,176 @@
+from functools import cached_property
+
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, IntegerField, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+
 from .models import Domain, Skill, Career, UserProfile, LearningPath, PathStep
+from .search import text_search_ids
+
+# Unfiltered changelists of tables estimated above this many rows show the
+# estimate instead of running COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = 100000
+# Autocomplete lookups use the FTS index when it finds fewer rows than this
+MAX_SEARCH_RESULTS = 1000
+
+# What each model's __str__ reads, so querysets of it can join it in
+STR_RELATED = {
+    Skill: ['domain'],
+    Career: ['domain'],
+    UserProfile: ['user'],
+    LearningPath: ['user', 'career'],
+    PathStep: ['skill'],
+}
+
+
+def is_autocomplete(request):
+    return getattr(request.resolver_match, 'url_name', None) == 'autocomplete'
+
+
+def estimated_count(queryset):
+    """Cheap row count estimate for a model's whole table, or None.
+
+    PostgreSQL keeps one in pg_class; elsewhere the largest primary key is
+    read from the end of the index, which ignores deleted rows.
+    """
+    connection = connections[queryset.db]
+    opts = queryset.model._meta
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [opts.db_table])
+        else:
+            quote = connection.ops.quote_name
+            cursor.execute(f"SELECT MAX({quote(opts.pk.column)}) FROM {quote(opts.db_table)}")
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that skips COUNT(*) on unfiltered changelists of huge tables"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimated_count(queryset)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class CatalogAdmin(admin.ModelAdmin):
+    """Keeps changelists, autocompletes and forms at a fixed query count.
+
+    Rows and choices are fetched with the relations their __str__ reads,
+    related objects are picked with autocomplete widgets instead of
+    rendering every row, and huge tables aren't counted.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Newest first by primary key, also for autocomplete results
+    ordering = ['-pk']
+
+    def get_queryset(self, request):
+        # The changelist skips list_select_related once a queryset joins
+        # anything, so both are applied here.
+        related = [*STR_RELATED.get(self.model, ()), *(self.list_select_related or ())]
+        queryset = super().get_queryset(request)
+        return queryset.select_related(*related) if related else queryset
+
+    def _with_str_related(self, db_field, kwargs):
+        related = STR_RELATED.get(db_field.related_model)
+        if related and 'queryset' not in kwargs:
+            kwargs['queryset'] = db_field.related_model._default_manager.select_related(*related)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        self._with_str_related(db_field, kwargs)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        self._with_str_related(db_field, kwargs)
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
+
+
+class FullTextSearchMixin:
+    """Answers autocomplete lookups from the FTS index.
+
+    Autocomplete widgets send what the user is typing, which word-prefix
+    matching serves without a LIKE '%term%' scan. The index is used only
+    when it finds some but fewer than MAX_SEARCH_RESULTS rows, i.e. all of
+    them; otherwise, and for changelist searches, the admin's substring
+    search runs as usual.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term and is_autocomplete(request):
+            ids = text_search_ids(self.search_kind, search_term, MAX_SEARCH_RESULTS, queryset.db)
+            if ids and len(ids) < MAX_SEARCH_RESULTS:
+                return queryset.filter(pk__in=ids), False
+        return super().get_search_results(request, queryset, search_term)
+
 
 @admin.register(Domain)
-class DomainAdmin(admin.ModelAdmin):
+class DomainAdmin(CatalogAdmin):
     list_display = ['name', 'description']
     search_fields = ['name']
 
 @admin.register(Skill)
-class SkillAdmin(admin.ModelAdmin):
+class SkillAdmin(FullTextSearchMixin, CatalogAdmin):
     list_display = ['name', 'domain', 'difficulty_level']
     list_filter = ['domain', 'difficulty_level']
     search_fields = ['name']
-    filter_horizontal = ['prerequisites']
+    search_kind = 'skills'
+    autocomplete_fields = ['domain', 'prerequisites']
 
 @admin.register(Career)
-class CareerAdmin(admin.ModelAdmin):
+class CareerAdmin(FullTextSearchMixin, CatalogAdmin):
     list_display = ['title', 'domain', 'num_required_skills', 'average_salary']
     list_filter = ['domain']
     search_fields = ['title']
-    filter_horizontal = ['required_skills']
+    search_kind = 'careers'
+    autocomplete_fields = ['domain', 'required_skills']
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if is_autocomplete(request):
+            return queryset
+        # Counted per displayed row; a join with GROUP BY would aggregate
+        # the whole table before the page is cut
+        required = Career.required_skills.through.objects.filter(career=OuterRef('pk')).order_by()
+        count = required.values('career').annotate(count=Count('pk')).values('count')
+        return queryset.annotate(
+            required_skill_count=Coalesce(Subquery(count, output_field=IntegerField()), 0))
 
     def num_required_skills(self, obj):
-        return obj.required_skills.count()
+        return obj.required_skill_count
     num_required_skills.short_description = 'Required Skills'
+    num_required_skills.admin_order_field = 'required_skill_count'
 
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(CatalogAdmin):
     list_display = ['user', 'domain']
     list_filter = ['domain']
+    list_select_related = ['user', 'domain']
     search_fields = ['user__username']
-    filter_horizontal = ['skills']
+    autocomplete_fields = ['user', 'domain', 'skills']
 
 @admin.register(LearningPath)
-class LearningPathAdmin(admin.ModelAdmin):
+class LearningPathAdmin(CatalogAdmin):
     list_display = ['user', 'career', 'title', 'created_at']
     list_filter = ['created_at']
+    list_select_related = ['user', 'career__domain']
     search_fields = ['user__username', 'career__title', 'title']
+    autocomplete_fields = ['user', 'career']
 
 @admin.register(PathStep)
-class PathStepAdmin(admin.ModelAdmin):
+class PathStepAdmin(CatalogAdmin):
     list_display = ['learning_path', 'skill', 'step_order', 'status']
     list_filter = ['status']
+    list_select_related = ['learning_path__user', 'learning_path__career', 'skill__domain']
     ordering = ['learning_path', 'step_order']
+    autocomplete_fields = ['learning_path', 'skill']
@@ -0,0 +1,165 @@
+"""Materialized per-profile career match scores (UserCareerScore).
+
+Every profile gets one row per career it shares at least one skill with,
+holding the number of matching skills, the number of skills the career
+requires and their fraction (the 'fraction' scoring model). A profile's
+top careers are then one query down an index, see
+RecommendationEngine.get_top_careers().
+
+refresh_profiles() rebuilds rows in batches (the refresh_career_scores
+command). Between refreshes, signals.py keeps the table current with
+delta arithmetic on the match counts:
+
+* a profile gaining or losing skills adds or subtracts, for each career
+  requiring them, the number of those skills it requires
+  (apply_profile_delta);
+* a career gaining or losing required skills adds or subtracts, for each
+  profile holding them, the number of those skills it holds, then rescores
+  the career's rows for its new total (apply_career_delta).
+
+Rows whose matching count reaches zero are deleted.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, ExpressionWrapper
+
+from .models import Career, UserCareerScore, UserProfile
+
+ProfileSkill = UserProfile.skills.through
+CareerSkill = Career.required_skills.through
+
+BATCH_SIZE = 1000
+
+
+def _required_counts(using, career_ids=None):
+    """``{career_id: required skill count}``"""
+    rows = CareerSkill.objects.using(using)
+    if career_ids is not None:
+        rows = rows.filter(career_id__in=list(career_ids))
+    return dict(rows.order_by().values_list('career_id').annotate(Count('skill_id')))
+
+
+def _score(profile_id, career_id, matching, total):
+    return UserCareerScore(profile_id=profile_id, career_id=career_id, matching_skills=matching,
+                           total_required=total, score=matching / total)
+
+
+def _rescored(matching, total=F('total_required')):
+    # UPDATE reads the old column values, so a new total is passed in
+    return ExpressionWrapper(matching * 1.0 / total, output_field=FloatField())
+
+
+def _apply_delta(rows, key_field, delta, new_row, using):
+    """Add ``delta[key]`` to the matching count of each row of ``rows``.
+
+    Rows falling to zero are deleted; keys gaining matches without a row
+    get one from ``new_row(key, matching)``.
+    """
+    by_change = defaultdict(list)
+    for key, change in delta.items():
+        if change:
+            by_change[change].append(key)
+    gained = [key for change, keys in by_change.items() if change > 0 for key in keys]
+    existing = set(rows.filter(**{f'{key_field}__in': gained}).values_list(key_field, flat=True)) if gained else set()
+    for change, keys in by_change.items():
+        matched = rows.filter(**{f'{key_field}__in': keys})
+        if change < 0:
+            matched.filter(matching_skills__lte=-change).delete()
+        matched.update(matching_skills=F('matching_skills') + change,
+                       score=_rescored(F('matching_skills') + change))
+    UserCareerScore.objects.using(using).bulk_create(
+        [new_row(key, delta[key]) for key in gained if key not in existing], batch_size=BATCH_SIZE)
+
+
+def apply_profile_delta(profile_id, added=(), removed=(), using='default'):
+    """Update a profile's rows after it gained ``added`` / lost ``removed`` skill ids"""
+    delta = Counter()
+    for skill_ids, sign in ((added, 1), (removed, -1)):
+        if skill_ids:
+            requiring = CareerSkill.objects.using(using).filter(skill_id__in=list(skill_ids))
+            for career_id, count in requiring.order_by().values_list('career_id').annotate(Count('skill_id')):
+                delta[career_id] += sign * count
+    if not any(delta.values()):
+        return
+    with transaction.atomic(using=using):
+        rows = UserCareerScore.objects.using(using).filter(profile_id=profile_id)
+        new = [career_id for career_id, change in delta.items() if change > 0]
+        totals = _required_counts(using, new) if new else {}
+        _apply_delta(rows, 'career_id', delta,
+                     lambda career_id, matching: _score(profile_id, career_id, matching, totals[career_id]),
+                     using)
+
+
+def apply_career_delta(career_id, added=(), removed=(), using='default'):
+    """Update a career's rows after it gained ``added`` / lost ``removed`` required skill ids"""
+    if not added and not removed:
+        return
+    delta = Counter()
+    for skill_ids, sign in ((added, 1), (removed, -1)):
+        if skill_ids:
+            holding = ProfileSkill.objects.using(using).filter(skill_id__in=list(skill_ids))
+            for profile_id, count in holding.order_by().values_list('userprofile_id').annotate(Count('skill_id')):
+                delta[profile_id] += sign * count
+    with transaction.atomic(using=using):
+        rows = UserCareerScore.objects.using(using).filter(career_id=career_id)
+        total = CareerSkill.objects.using(using).filter(career_id=career_id).count()
+        if not total:
+            rows.delete()
+            return
+        _apply_delta(rows, 'profile_id', delta,
+                     lambda profile_id, matching: _score(profile_id, career_id, matching, total),
+                     using)
+        # The total changed, so every row of the career is rescored
+        rows.update(total_required=total, score=_rescored(F('matching_skills'), total))
+
+
+def refresh_careers(career_ids, using='default'):
+    """Recompute every row of the given careers from scratch"""
+    career_ids = sorted(set(career_ids))
+    for start in range(0, len(career_ids), BATCH_SIZE):
+        chunk = career_ids[start:start + BATCH_SIZE]
+        with transaction.atomic(using=using):
+            totals = _required_counts(using, chunk)
+            matches = CareerSkill.objects.using(using).filter(
+                career_id__in=chunk, skill__users_with_skill__isnull=False,
+            ).order_by().values_list('skill__users_with_skill', 'career_id').annotate(Count('skill_id'))
+            rows = [_score(profile_id, career_id, matching, totals[career_id])
+                    for profile_id, career_id, matching in matches]
+            UserCareerScore.objects.using(using).filter(career_id__in=chunk).delete()
+            UserCareerScore.objects.using(using).bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def _profile_chunks(profile_ids, chunk_size, using):
+    if profile_ids is not None:
+        profile_ids = sorted(set(profile_ids))
+        for start in range(0, len(profile_ids), chunk_size):
+            yield profile_ids[start:start + chunk_size]
+        return
+    profiles = UserProfile.objects.using(using).order_by('pk').values_list('pk', flat=True)
+    last = 0
+    while chunk := list(profiles.filter(pk__gt=last)[:chunk_size]):
+        last = chunk[-1]
+        yield chunk
+
+
+def refresh_profiles(profile_ids=None, chunk_size=BATCH_SIZE, using='default'):
+    """Recompute the rows of the given profiles (or all) from scratch.
+
+    Profiles are walked in primary key order and each chunk is replaced in
+    its own transaction. Returns ``(profiles, rows)`` written.
+    """
+    totals = _required_counts(using)
+    profile_count = row_count = 0
+    for chunk in _profile_chunks(profile_ids, chunk_size, using):
+        matches = ProfileSkill.objects.using(using).filter(
+            userprofile_id__in=chunk, skill__required_for_careers__isnull=False,
+        ).order_by().values_list('userprofile_id', 'skill__required_for_careers').annotate(Count('skill_id'))
+        rows = [_score(profile_id, career_id, matching, totals[career_id])
+                for profile_id, career_id, matching in matches]
+        with transaction.atomic(using=using):
+            UserCareerScore.objects.using(using).filter(profile_id__in=chunk).delete()
+            UserCareerScore.objects.using(using).bulk_create(rows, batch_size=BATCH_SIZE)
+        profile_count += len(chunk)
+        row_count += len(rows)
+    return profile_count, row_count
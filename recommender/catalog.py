@@ -0,0 +1,279 @@
+"""Bulk, idempotent loading of skill/career catalogs.
+
+A catalog is a mapping with ``domains``, ``skills`` and ``careers`` lists::
+
+    domains: [{name, description}]
+    skills:  [{domain, name, difficulty_level, description, prerequisites: [ref]}]
+    careers: [{domain, title, average_salary, salary_min, salary_max, salary_currency,
+               description, required_skills: [ref]}]
+
+The salary_* columns are optional and default to what the average_salary
+label parses to (see recommender.salary).
+
+A skill reference is the skill's name, resolved in the referring row's
+domain, or ``"Domain name::Skill name"`` for a skill in another domain.
+Catalogs can be read from JSON or YAML files, or from CSV files named
+domains.csv / skills.csv / careers.csv whose list columns separate
+references with ``|``.
+
+Loading diffs the catalog against the database: unchanged rows are left
+alone, new or changed rows are upserted with ``bulk_create``, and M2M edges
+are added and removed in bulk through the through tables. Reloading an
+unchanged catalog therefore writes nothing.
+"""
+import csv
+import json
+from collections import Counter
+from pathlib import Path
+
+from django.db import transaction
+
+from .models import Domain, Skill, Career
+from .salary import parse_salary
+from . import career_scores, skill_graph
+
+DIFFICULTY_LEVELS = {value for value, _ in Skill.DIFFICULTY_CHOICES}
+REF_SEPARATOR = '::'
+LIST_SEPARATOR = '|'
+BATCH_SIZE = 1000
+
+
+class CatalogError(ValueError):
+    pass
+
+
+# --- reading ---
+def _read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        for column in ('prerequisites', 'required_skills'):
+            if column in row:
+                row[column] = [ref.strip() for ref in (row[column] or '').split(LIST_SEPARATOR) if ref.strip()]
+    return rows
+
+
+def read_catalog(path):
+    """Read one catalog file (or directory of CSV files) into a dict"""
+    path = Path(path)
+    if path.is_dir():
+        catalog = {}
+        for section in ('domains', 'skills', 'careers'):
+            csv_path = path / f"{section}.csv"
+            if csv_path.exists():
+                catalog[section] = _read_csv(csv_path)
+        if not catalog:
+            raise CatalogError(f"{path} has no domains.csv, skills.csv or careers.csv")
+        return catalog
+
+    suffix = path.suffix.lower()
+    if suffix == '.csv':
+        if path.stem not in ('domains', 'skills', 'careers'):
+            raise CatalogError(f"CSV files must be named domains.csv, skills.csv or careers.csv, not {path.name}")
+        return {path.stem: _read_csv(path)}
+    with open(path, encoding='utf-8') as f:
+        if suffix == '.json':
+            catalog = json.load(f)
+        elif suffix in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise CatalogError("Loading YAML catalogs requires PyYAML (pip install pyyaml)")
+            catalog = yaml.safe_load(f)
+        else:
+            raise CatalogError(f"Unsupported catalog format: {path.name}")
+    if not isinstance(catalog, dict):
+        raise CatalogError(f"{path.name} must contain a mapping of domains/skills/careers")
+    return catalog
+
+
+def merge_catalogs(catalogs):
+    merged = {'domains': [], 'skills': [], 'careers': []}
+    for catalog in catalogs:
+        for section in merged:
+            merged[section].extend(catalog.get(section) or [])
+    return merged
+
+
+# --- loading ---
+def _salary(row, title):
+    minimum, maximum, currency = parse_salary(row.get('average_salary'))
+    try:
+        if row.get('salary_min') not in (None, ''):
+            minimum = int(row['salary_min'])
+        if row.get('salary_max') not in (None, ''):
+            maximum = int(row['salary_max'])
+    except (TypeError, ValueError):
+        raise CatalogError(f"Career {title!r} has a non-numeric salary_min or salary_max")
+    return {'salary_min': minimum, 'salary_max': maximum,
+            'salary_currency': row.get('salary_currency') or currency}
+
+
+def _upsert(model, existing, rows, unique_fields, update_fields):
+    """Bulk upsert the rows whose fields differ from `existing`.
+
+    `existing` maps unique keys to tuples of update_fields values, and rows
+    map the same keys to dicts of all field values. Returns (created, updated).
+    """
+    changed = [
+        model(**values) for key, values in rows.items()
+        if existing.get(key) != tuple(values[f] for f in update_fields)
+    ]
+    if changed:
+        model.objects.bulk_create(changed, batch_size=BATCH_SIZE, update_conflicts=True,
+                                  unique_fields=unique_fields, update_fields=update_fields)
+    created = sum(1 for key in rows if key not in existing)
+    return created, len(changed) - created
+
+
+def _sync_edges(through, source_field, target_field, desired):
+    """Make the edges leaving each source in `desired` exactly its targets.
+
+    `desired` maps source ids to sets of target ids. Returns (added, removed,
+    ids of the sources whose edges changed).
+    """
+    sources = list(desired)
+    added, removed, changed = [], [], set()
+    for start in range(0, len(sources), BATCH_SIZE):
+        batch = sources[start:start + BATCH_SIZE]
+        current = {}
+        for pk, source, target in through.objects.filter(**{f'{source_field}__in': batch}).values_list(
+                'pk', source_field, target_field):
+            current[(source, target)] = pk
+        for source in batch:
+            new = [target for target in desired[source] if (source, target) not in current]
+            if new:
+                added.extend(through(**{source_field: source, target_field: target}) for target in new)
+                changed.add(source)
+        for (source, target), pk in current.items():
+            if target not in desired[source]:
+                removed.append(pk)
+                changed.add(source)
+    through.objects.bulk_create(added, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    _delete(through, removed)
+    return len(added), len(removed), changed
+
+
+def _delete(model, pks):
+    for start in range(0, len(pks), BATCH_SIZE):
+        model.objects.filter(pk__in=pks[start:start + BATCH_SIZE]).delete()
+
+
+def load_catalog(catalog, prune=False):
+    """Upsert a catalog dict into the database and return a Counter of changes.
+
+    With ``prune``, skills and careers of the loaded domains that are not in
+    the catalog are deleted.
+    """
+    stats = Counter()
+    domains = {}
+    for row in catalog.get('domains') or []:
+        name = _required(row, 'name', 'domain')
+        domains[name] = {'name': name, 'description': row.get('description') or ''}
+    skill_rows = catalog.get('skills') or []
+    career_rows = catalog.get('careers') or []
+    # Skills and careers may also use domains that already exist in the database
+    loaded = set(domains)
+    loaded |= {_required(row, 'domain', 'skill') for row in skill_rows}
+    loaded |= {_required(row, 'domain', 'career') for row in career_rows}
+
+    with transaction.atomic():
+        existing = {name: (description,) for name, description in
+                    Domain.objects.filter(name__in=loaded).values_list('name', 'description')}
+        created, updated = _upsert(Domain, existing, domains, ['name'], ['description'])
+        stats.update(domains_created=created, domains_updated=updated)
+        domain_ids = dict(Domain.objects.filter(name__in=loaded).values_list('name', 'id'))
+        missing = loaded - set(domain_ids)
+        if missing:
+            raise CatalogError(f"Unknown domains: {', '.join(sorted(missing))}")
+        loaded_ids = set(domain_ids.values())
+
+        # Skills, keyed by (domain_id, name)
+        skills, prerequisite_refs = {}, {}
+        for row in skill_rows:
+            key = (domain_ids[row['domain']], _required(row, 'name', 'skill'))
+            difficulty = row.get('difficulty_level') or 'Beginner'
+            if difficulty not in DIFFICULTY_LEVELS:
+                raise CatalogError(f"Skill {key[1]!r} has unknown difficulty_level {difficulty!r}")
+            skills[key] = {'domain_id': key[0], 'name': key[1], 'description': row.get('description') or '',
+                           'difficulty_level': difficulty}
+            prerequisite_refs[key] = row.get('prerequisites') or []
+        fields = ['description', 'difficulty_level']
+        existing = {(d, name): tuple(rest) for d, name, *rest in _values(Skill, loaded_ids, ['domain_id', 'name'] + fields)}
+        created, updated = _upsert(Skill, existing, skills, ['domain', 'name'], fields)
+        stats.update(skills_created=created, skills_updated=updated)
+
+        # Careers, keyed by (domain_id, title)
+        careers, required_refs = {}, {}
+        for row in career_rows:
+            key = (domain_ids[row['domain']], _required(row, 'title', 'career'))
+            careers[key] = {'domain_id': key[0], 'title': key[1], 'description': row.get('description') or '',
+                            'average_salary': row.get('average_salary') or None, **_salary(row, key[1])}
+            required_refs[key] = row.get('required_skills') or []
+        fields = ['description', 'average_salary', 'salary_min', 'salary_max', 'salary_currency']
+        existing = {(d, title): tuple(rest) for d, title, *rest in _values(Career, loaded_ids, ['domain_id', 'title'] + fields)}
+        created, updated = _upsert(Career, existing, careers, ['domain', 'title'], fields)
+        stats.update(careers_created=created, careers_updated=updated)
+
+        # Name -> id maps for reference resolution: every skill of the loaded
+        # domains plus those of any other domain a reference points into.
+        refs = [ref for group in (prerequisite_refs, required_refs) for refs in group.values() for ref in refs]
+        other = {_split_ref(ref)[0] for ref in refs} - {None} - set(domain_ids)
+        domain_ids.update(Domain.objects.filter(name__in=other).values_list('name', 'id'))
+        skill_ids = {(d, name): pk for pk, d, name in _values(
+            Skill, loaded_ids | {domain_ids[n] for n in other if n in domain_ids}, ['id', 'domain_id', 'name'])}
+        career_ids = {(d, title): pk for pk, d, title in _values(Career, loaded_ids, ['id', 'domain_id', 'title'])}
+
+        def resolve(ref, domain_id, owner):
+            domain_name, name = _split_ref(ref)
+            key = (domain_ids.get(domain_name) if domain_name else domain_id, name)
+            if key not in skill_ids:
+                raise CatalogError(f"{owner} references unknown skill {ref!r}")
+            return skill_ids[key]
+
+        desired = {
+            skill_ids[key]: {resolve(ref, key[0], f"Skill {key[1]!r}") for ref in group}
+            for key, group in prerequisite_refs.items()
+        }
+        added, removed, _ = _sync_edges(Skill.prerequisites.through, 'from_skill_id', 'to_skill_id', desired)
+        stats.update(prerequisites_added=added, prerequisites_removed=removed)
+        desired = {
+            career_ids[key]: {resolve(ref, key[0], f"Career {key[1]!r}") for ref in group}
+            for key, group in required_refs.items()
+        }
+        added, removed, changed_careers = _sync_edges(Career.required_skills.through, 'career_id', 'skill_id', desired)
+        stats.update(required_skills_added=added, required_skills_removed=removed)
+        career_scores.refresh_careers(changed_careers)
+
+        if prune:
+            stale_skills = [pk for key, pk in skill_ids.items() if key[0] in loaded_ids and key not in skills]
+            stale_careers = [pk for key, pk in career_ids.items() if key not in careers]
+            _delete(Skill, stale_skills)
+            _delete(Career, stale_careers)
+            stats.update(skills_deleted=len(stale_skills), careers_deleted=len(stale_careers))
+
+    # bulk_create and through-table writes send no model signals
+    if any(stats.values()):
+        skill_graph.invalidate()
+    return stats
+
+
+def _required(row, field, kind):
+    value = row.get(field)
+    if not value:
+        raise CatalogError(f"Every {kind} needs a {field!r}: {row!r}")
+    return value
+
+
+def _split_ref(ref):
+    if REF_SEPARATOR in ref:
+        domain_name, name = ref.split(REF_SEPARATOR, 1)
+        return domain_name.strip(), name.strip()
+    return None, ref.strip()
+
+
+def _values(model, domain_ids, fields):
+    """values_list over the given domains, in batches of domain ids"""
+    domain_ids = list(domain_ids)
+    for start in range(0, len(domain_ids), BATCH_SIZE):
+        yield from model.objects.filter(domain_id__in=domain_ids[start:start + BATCH_SIZE]).values_list(*fields)
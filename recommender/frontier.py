@@ -0,0 +1,134 @@
+"""Per-user "unlocked skills" frontiers for skill suggestions.
+
+A frontier remembers which skills a user holds and, for the skills next to
+them in the prerequisite graph, how many prerequisites are still unmet.
+Adding or removing a skill only touches that skill's ``dependent_skills``,
+so suggestions stay current without rescanning the domain.
+"""
+import threading
+from collections import OrderedDict
+
+from .models import UserProfile
+from .skill_graph import get_skill_graph
+
+RANKINGS = {
+    # Skills required by more careers first
+    'careers': lambda graph, i: -graph.skill_career_counts[i],
+}
+
+MAX_CACHED_FRONTIERS = 10000
+
+
+class SkillFrontier:
+    """Skills a user can learn next, maintained incrementally"""
+
+    def __init__(self, graph, skill_indexes=()):
+        self.graph = graph
+        self.lock = threading.Lock()
+        self.held = set(skill_indexes)
+        # Unmet prerequisite counts, tracked lazily for skills next to held ones
+        self.unmet = {}
+        # Unlocked skills that have prerequisites, per domain; skills without
+        # any (graph.domain_roots) are unlocked unless held and not copied here.
+        self.unlocked = [set() for _ in graph.domain_ids]
+        for i in self.held:
+            for d in graph.dependents[i]:
+                self._refresh(d)
+
+    def _refresh(self, i):
+        if i in self.held:
+            return
+        if i not in self.unmet:
+            self.unmet[i] = sum(1 for p in self.graph.prerequisites[i] if p not in self.held)
+        unlocked = self.unlocked[self.graph.skill_domain[i]]
+        if self.unmet[i]:
+            unlocked.discard(i)
+        else:
+            unlocked.add(i)
+
+    def add(self, i):
+        """Mark skill i as held; callers hold self.lock"""
+        if i in self.held:
+            return
+        self.held.add(i)
+        self.unlocked[self.graph.skill_domain[i]].discard(i)
+        self.unmet.pop(i, None)
+        for d in self.graph.dependents[i]:
+            if d in self.unmet:
+                self.unmet[d] -= 1
+            self._refresh(d)
+
+    def remove(self, i):
+        """Mark skill i as no longer held; callers hold self.lock"""
+        if i not in self.held:
+            return
+        self.held.discard(i)
+        for d in self.graph.dependents[i]:
+            if d in self.unmet:
+                self.unmet[d] += 1
+            self._refresh(d)
+        if self.graph.prerequisites[i]:
+            self._refresh(i)
+
+    def suggestions(self, domain_index, limit=10, rank=None):
+        """Unlocked skill indexes in a domain, best first.
+
+        ``rank`` is None for catalog order or a key from RANKINGS.
+        """
+        graph = self.graph
+        with self.lock:
+            candidates = [i for i in graph.domain_roots[domain_index] if i not in self.held]
+            candidates.extend(self.unlocked[domain_index])
+        if rank is None:
+            candidates.sort()
+        else:
+            key = RANKINGS[rank]
+            candidates.sort(key=lambda i: (key(graph, i), i))
+        return candidates[:limit] if limit is not None else candidates
+
+
+_lock = threading.Lock()
+_frontiers = OrderedDict()
+
+
+def get_frontier(profile):
+    """Cached frontier for a UserProfile, built from one query on a miss"""
+    graph = get_skill_graph()
+    profile_id = getattr(profile, 'pk', profile)
+    with _lock:
+        frontier = _frontiers.get(profile_id)
+        if frontier is not None and frontier.graph is graph:
+            _frontiers.move_to_end(profile_id)
+            return frontier
+
+    skill_ids = UserProfile.skills.through.objects.filter(
+        userprofile_id=profile_id).values_list('skill_id', flat=True)
+    index = graph.skill_index
+    frontier = SkillFrontier(graph, (index[s] for s in skill_ids if s in index))
+    with _lock:
+        _frontiers[profile_id] = frontier
+        if len(_frontiers) > MAX_CACHED_FRONTIERS:
+            _frontiers.popitem(last=False)
+    return frontier
+
+
+def update_frontier(profile_id, added=(), removed=()):
+    """Apply skill id changes to a cached frontier, if there is one"""
+    with _lock:
+        frontier = _frontiers.get(profile_id)
+    if frontier is None:
+        return
+    index = frontier.graph.skill_index
+    with frontier.lock:
+        for skill_id in added:
+            if skill_id in index:
+                frontier.add(index[skill_id])
+        for skill_id in removed:
+            if skill_id in index:
+                frontier.remove(index[skill_id])
+
+
+def discard_frontier(profile_id):
+    """Forget a profile's cached frontier"""
+    with _lock:
+        _frontiers.pop(profile_id, None)
@@ -0,0 +1,235 @@
+"""Opt-in per-call metrics for the recommendation engine and API views.
+
+Set ``RECOMMENDER_INSTRUMENTATION = True`` to record, for every call of an
+@instrumented function, its SQL query count, DB time, Python time (wall
+time minus DB time) and result size into in-process histograms. Calls
+slower than ``RECOMMENDER_SLOW_CALL_MS`` (default 100) are logged as
+warnings on the ``recommender.instrumentation`` logger together with the
+SQL they ran. When the setting is off a call costs one settings lookup.
+
+The registry can be read with registry.snapshot() (JSON-friendly),
+rendered with prometheus_text(), served by the ``metrics`` view or
+printed by the ``engine_stats`` management command.
+"""
+import bisect
+import inspect
+import logging
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponseBase
+
+logger = logging.getLogger(__name__)
+
+INF = float('inf')
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, INF)  # ms
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, INF)
+SIZE_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, INF)
+# How many statements a slow-call log line shows
+SLOW_LOG_QUERIES = 20
+
+METRICS = {
+    # name: (buckets, help text)
+    'queries': (QUERY_BUCKETS, "SQL queries per call"),
+    'db_ms': (DURATION_BUCKETS, "Time spent in SQL per call, in milliseconds"),
+    'python_ms': (DURATION_BUCKETS, "Time spent outside SQL per call, in milliseconds"),
+    'result_size': (SIZE_BUCKETS, "Items (or response bytes) returned per call"),
+}
+
+
+def enabled():
+    return getattr(settings, 'RECOMMENDER_INSTRUMENTATION', False)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile"""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank and seen:
+                return min(bound, self.max)
+        return 0
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': self.max,
+        }
+
+
+class Registry:
+    """Histograms of every metric in METRICS, per instrumented call name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def record(self, name, **values):
+        with self._lock:
+            histograms = self._calls.get(name)
+            if histograms is None:
+                histograms = self._calls[name] = {
+                    metric: Histogram(buckets) for metric, (buckets, _) in METRICS.items()}
+            for metric, value in values.items():
+                if value is not None:
+                    histograms[metric].observe(value)
+
+    def items(self):
+        with self._lock:
+            return sorted(self._calls.items())
+
+    def snapshot(self):
+        return {name: {metric: h.snapshot() for metric, h in histograms.items()}
+                for name, histograms in self.items()}
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
+
+
+registry = Registry()
+
+
+class _QueryRecorder:
+    """connection.execute_wrapper that times and keeps every statement"""
+
+    def __init__(self):
+        self.queries = []
+        self.db_time = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.db_time += elapsed
+            self.queries.append((elapsed, sql))
+
+
+def _size(result):
+    if isinstance(result, HttpResponseBase):
+        return len(result.content) if not result.streaming else None
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def _record(name, recorder, elapsed, size):
+    wall_ms = elapsed * 1000
+    db_ms = recorder.db_time * 1000
+    registry.record(name, queries=len(recorder.queries), db_ms=db_ms,
+                    python_ms=max(0, wall_ms - db_ms), result_size=size)
+    if wall_ms >= getattr(settings, 'RECOMMENDER_SLOW_CALL_MS', 100):
+        statements = '\n'.join(f"  {seconds * 1000:.2f} ms  {sql}"
+                               for seconds, sql in recorder.queries[:SLOW_LOG_QUERIES])
+        more = len(recorder.queries) - SLOW_LOG_QUERIES
+        if more > 0:
+            statements += f"\n  ... {more} more"
+        logger.warning("Slow call %s: %.1f ms (%d queries, %.1f ms SQL)%s", name, wall_ms,
+                       len(recorder.queries), db_ms, '\n' + statements if statements else '')
+
+
+def instrumented(name):
+    """Record metrics for each call of the decorated function under `name`.
+
+    Works for plain functions, generator functions (measured across every
+    resumption until the generator finishes or is closed, with the number
+    of items yielded as the result size) and async views. Queries are
+    counted on the default connection of the calling thread only.
+    """
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+            @wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if not enabled():
+                    return (yield from func(*args, **kwargs))
+                recorder, elapsed, items = _QueryRecorder(), 0, 0
+                iterator = func(*args, **kwargs)
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        with connection.execute_wrapper(recorder):
+                            try:
+                                item = next(iterator)
+                            except StopIteration as stop:
+                                return stop.value
+                            finally:
+                                elapsed += time.perf_counter() - start
+                        items += 1
+                        yield item
+                finally:
+                    iterator.close()
+                    _record(name, recorder, elapsed, items)
+            return generator_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not enabled():
+                    return await func(*args, **kwargs)
+                recorder = _QueryRecorder()
+                start = time.perf_counter()
+                with connection.execute_wrapper(recorder):
+                    result = await func(*args, **kwargs)
+                _record(name, recorder, time.perf_counter() - start, _size(result))
+                return result
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return func(*args, **kwargs)
+            recorder = _QueryRecorder()
+            start = time.perf_counter()
+            with connection.execute_wrapper(recorder):
+                result = func(*args, **kwargs)
+            _record(name, recorder, time.perf_counter() - start, _size(result))
+            return result
+        return wrapper
+    return decorator
+
+
+def prometheus_text():
+    """The registry in the Prometheus text exposition format"""
+    lines = []
+    calls = registry.items()
+    for metric, (buckets, help_text) in METRICS.items():
+        family = f"recommender_call_{metric}"
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} histogram")
+        for name, histograms in calls:
+            h = histograms[metric]
+            cumulative = 0
+            for bound, count in zip(buckets, h.counts):
+                cumulative += count
+                le = '+Inf' if bound == INF else f"{bound:g}"
+                lines.append(f'{family}_bucket{{call="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{family}_sum{{call="{name}"}} {h.sum:g}')
+            lines.append(f'{family}_count{{call="{name}"}} {h.count}')
+    return '\n'.join(lines) + '\n'
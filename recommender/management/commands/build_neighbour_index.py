@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recommender.collaborative import BANDS, NUM_PERM, SEED, MinHasher, NeighbourIndex, NeighbourIndexError
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the MinHash LSH index of profile skill sets used for \"users "
+        "like you\" career recommendations and write it to a file. Point "
+        "RECOMMENDER_NEIGHBOUR_INDEX at the file to serve from it; rerun "
+        "periodically to pick up new profiles and learning paths."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--num-perm', type=int, default=NUM_PERM, help="MinHash values per profile")
+        parser.add_argument('--bands', type=int, default=BANDS,
+                            help="LSH bands; more bands find less similar neighbours at the cost of more candidates")
+        parser.add_argument('--seed', type=int, default=SEED)
+        parser.add_argument('--info', action='store_true', help="Describe an existing index file instead")
+
+    def handle(self, *args, path, num_perm, bands, seed, info, **options):
+        start = time.perf_counter()
+        try:
+            if info:
+                index = NeighbourIndex.load(path)
+            else:
+                index = NeighbourIndex.build(hasher=MinHasher(num_perm, bands, seed))
+                index.write(path)
+        except (NeighbourIndexError, ValueError, OSError) as e:
+            raise CommandError(e)
+
+        hasher = index.hasher
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Read' if info else 'Built'} {path}: {len(index)} profiles, {len(index.skills)} skills, "
+            f"{len(index.careers)} career choices, {hasher.num_perm} MinHash values in {hasher.bands} bands "
+            f"({time.perf_counter() - start:.1f}s)"
+        ))
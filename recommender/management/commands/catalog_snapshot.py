@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recommender.catalog import CatalogError, load_catalog
+from recommender.skill_graph import SkillGraph
+from recommender.snapshot import Snapshot, SnapshotError, snapshot_to_catalog, write_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the catalog to a compact binary snapshot, import a snapshot "
+        "into the database, or describe one. Point RECOMMENDER_SNAPSHOT at an "
+        "exported file to let new processes serve from it without querying."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['export', 'import', 'info'])
+        parser.add_argument('path')
+        parser.add_argument('--prune', action='store_true',
+                            help="On import, delete skills and careers missing from the snapshot")
+
+    def handle(self, *args, action, path, prune, **options):
+        try:
+            if action == 'export':
+                graph = SkillGraph.build()
+                write_snapshot(graph, path)
+            else:
+                graph = Snapshot(path).graph()
+                if action == 'import':
+                    stats = load_catalog(snapshot_to_catalog(graph), prune=prune)
+                    for key, value in sorted(stats.items()):
+                        if value:
+                            self.stdout.write(f"{key.replace('_', ' ')}: {value}")
+        except (SnapshotError, CatalogError, OSError) as e:
+            raise CommandError(e)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{action.capitalize()}: {len(graph.domain_ids)} domains, {len(graph.skill_ids)} skills, "
+            f"{len(graph.career_ids)} careers, {len(graph.prerequisite_edges)} prerequisites, "
+            f"{len(graph.required_edges)} required skills (fingerprint {graph.fingerprint})"
+        ))
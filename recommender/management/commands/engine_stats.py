@@ -0,0 +1,62 @@
+import json
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recommender.instrumentation import prometheus_text, registry
+from recommender.result_cache import prometheus_text as result_cache_text, result_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Show per-call query counts, DB/Python time and result sizes recorded "
+        "by RECOMMENDER_INSTRUMENTATION, and result cache hit rates. Both are "
+        "per process, so use --url to read a running server's metrics endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="Metrics endpoint of a running server, e.g. http://localhost:8000/api/metrics/")
+        parser.add_argument('--prometheus', action='store_true', help="Print Prometheus text instead of a table")
+        parser.add_argument('--reset', action='store_true', help="Clear this process's registry after printing")
+
+    def handle(self, *args, url, prometheus, reset, **options):
+        if url:
+            query = '' if prometheus else '?format=json'
+            try:
+                with urlopen(url.rstrip('/') + '/' + query, timeout=10) as response:
+                    body = response.read().decode('utf-8')
+            except (URLError, OSError) as e:
+                raise CommandError(f"Could not read {url}: {e}")
+            if prometheus:
+                self.stdout.write(body)
+                return
+            stats = json.loads(body)
+        elif prometheus:
+            self.stdout.write(prometheus_text() + result_cache_text())
+            return
+        else:
+            stats = {'calls': registry.snapshot(), 'result_cache': result_cache().stats()}
+        calls = stats['calls']
+
+        if not calls:
+            self.stdout.write("No calls recorded (is RECOMMENDER_INSTRUMENTATION enabled?)")
+        else:
+            self.stdout.write(f"{'call':<36} {'calls':>7} {'queries':>8} {'max q':>6} "
+                              f"{'db ms':>8} {'py ms':>8} {'p95 ms':>8} {'size':>8}")
+            for name, metrics in sorted(calls.items()):
+                self.stdout.write(
+                    f"{name:<36} {metrics['queries']['count']:>7} {metrics['queries']['mean']:>8.2f} "
+                    f"{metrics['queries']['max']:>6g} {metrics['db_ms']['mean']:>8.2f} "
+                    f"{metrics['python_ms']['mean']:>8.2f} {metrics['python_ms']['p95']:>8.2f} "
+                    f"{metrics['result_size']['mean']:>8.1f}"
+                )
+
+        cache = stats['result_cache']
+        self.stdout.write(
+            f"\nresult cache: {cache['size']}/{cache['maxsize']} entries, hit rate {cache['hit_rate']:.1%} "
+            f"({cache['hits']} hits, {cache['backend_hits']} backend hits, {cache['misses']} misses), "
+            f"{cache['evictions']} evictions, {cache['invalidations']} invalidations"
+        )
+        if reset:
+            registry.reset()
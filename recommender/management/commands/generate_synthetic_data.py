@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from recommender.catalog import load_catalog
+from recommender.synthetic import create_users, generate_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a seeded synthetic catalog (and optionally users) for scale "
+        "testing. With --output the catalog is only written to a JSON file "
+        "that load_catalog can read; otherwise it is loaded into the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--domains', type=int, default=4)
+        parser.add_argument('--skills', type=int, default=200)
+        parser.add_argument('--careers', type=int, default=50)
+        parser.add_argument('--depth', type=int, default=4, help="Length of the longest prerequisite chain")
+        parser.add_argument('--skills-per-career', type=int, default=8)
+        parser.add_argument('--users', type=int, default=0)
+        parser.add_argument('--skills-per-user', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the catalog to this JSON file instead of loading it")
+
+    def handle(self, *args, **options):
+        catalog = generate_catalog(
+            domains=options['domains'], skills=options['skills'], careers=options['careers'],
+            depth=options['depth'], skills_per_career=options['skills_per_career'], seed=options['seed'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(catalog, f, indent=1)
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {len(catalog['skills'])} skills and {len(catalog['careers'])} careers to {options['output']}"))
+            return
+
+        stats = load_catalog(catalog)
+        for key, value in sorted(stats.items()):
+            if value:
+                self.stdout.write(f"{key.replace('_', ' ')}: {value}")
+        profiles = create_users(options['users'], options['skills_per_user'], seed=options['seed'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {len(catalog['skills'])} skills, {len(catalog['careers'])} careers "
+            f"and created {len(profiles)} users"))
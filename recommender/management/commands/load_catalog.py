@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recommender.catalog import CatalogError, load_catalog, merge_catalogs, read_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Load domains, skills and careers from JSON/YAML catalog files or "
+        "directories of CSV files. Only rows that differ from the database "
+        "are written, so reloading an unchanged catalog is a no-op."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="Catalog files or directories of CSV files")
+        parser.add_argument('--prune', action='store_true',
+                            help="Delete skills and careers of the loaded domains that are not in the catalog")
+
+    def handle(self, *args, paths, prune, **options):
+        try:
+            catalog = merge_catalogs(read_catalog(path) for path in paths)
+            stats = load_catalog(catalog, prune=prune)
+        except (CatalogError, OSError) as e:
+            raise CommandError(e)
+
+        changed = {key: value for key, value in sorted(stats.items()) if value}
+        if not changed:
+            self.stdout.write("Catalog unchanged")
+        for key, value in changed.items():
+            self.stdout.write(f"{key.replace('_', ' ')}: {value}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {len(catalog['domains'])} domains, {len(catalog['skills'])} skills, "
+            f"{len(catalog['careers'])} careers"
+        ))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recommender.career_scores import BATCH_SIZE, refresh_profiles
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the materialized per-profile career scores (UserCareerScore) "
+        "behind RecommendationEngine.get_top_careers. Signals keep the table "
+        "current afterwards; rerun after bulk writes that bypass them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', type=int, action='append', dest='profiles',
+                            help="Only refresh this profile id (repeatable)")
+        parser.add_argument('--chunk-size', type=int, default=BATCH_SIZE,
+                            help="Profiles replaced per transaction")
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, profiles, chunk_size, database, **options):
+        start = time.perf_counter()
+        profile_count, row_count = refresh_profiles(profiles, chunk_size, using=database)
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {profile_count} profiles: {row_count} career scores "
+            f"({time.perf_counter() - start:.1f}s)"
+        ))
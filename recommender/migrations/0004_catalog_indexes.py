@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0003_alter_career_average_salary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='learningpath',
+            index=models.Index(fields=['user', '-created_at'], name='learningpath_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='learningpath',
+            index=models.Index(fields=['user', 'career'], name='learningpath_user_career_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='learningpath',
+            index=models.Index(fields=['created_at'], name='learningpath_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='career',
+            constraint=models.UniqueConstraint(fields=('domain', 'title'), name='unique_career_title_per_domain'),
+        ),
+        migrations.AddConstraint(
+            model_name='skill',
+            constraint=models.UniqueConstraint(fields=('domain', 'name'), name='unique_skill_name_per_domain'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from recommender.search import install_fts
+    # A no-op on databases other than SQLite and on SQLite builds without FTS5
+    install_fts(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from recommender.search import drop_fts
+    drop_fts(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0004_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
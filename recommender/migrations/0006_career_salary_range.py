@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='career',
+            name='salary_currency',
+            field=models.CharField(blank=True, default='', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='career',
+            name='salary_max',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='career',
+            name='salary_min',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='career',
+            index=models.Index(fields=['salary_max'], name='career_salary_max_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='career',
+            index=models.Index(fields=['salary_min'], name='career_salary_min_idx'),
+        ),
+    ]
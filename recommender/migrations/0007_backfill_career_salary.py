@@ -0,0 +1,43 @@
+"""Fill Career.salary_min/salary_max/salary_currency from average_salary.
+
+Runs outside one big transaction: careers are walked in primary key order
+and each batch is committed on its own, and only careers whose range is
+still empty are picked up. An interrupted run is resumed by running
+migrate again.
+"""
+from django.db import migrations, transaction
+
+from recommender.salary import parse_salary
+
+BATCH_SIZE = 1000
+
+
+def backfill(apps, schema_editor):
+    Career = apps.get_model('recommender', 'Career')
+    db = schema_editor.connection.alias
+    pending = Career.objects.using(db).filter(
+        salary_min__isnull=True, salary_max__isnull=True, average_salary__isnull=False,
+    ).exclude(average_salary='').order_by('pk').only('pk', 'average_salary')
+    last = 0
+    while batch := list(pending.filter(pk__gt=last)[:BATCH_SIZE]):
+        last = batch[-1].pk
+        parsed = []
+        for career in batch:
+            minimum, maximum, currency = parse_salary(career.average_salary)
+            if minimum is not None:
+                career.salary_min, career.salary_max, career.salary_currency = minimum, maximum, currency
+                parsed.append(career)
+        with transaction.atomic(using=db):
+            Career.objects.using(db).bulk_update(parsed, ['salary_min', 'salary_max', 'salary_currency'])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('recommender', '0006_career_salary_range'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0007_backfill_career_salary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCareerScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matching_skills', models.PositiveIntegerField()),
+                ('total_required', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('career', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_scores', to='recommender.career')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='career_scores', to='recommender.userprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['profile', '-score', '-matching_skills', 'career'], name='usercareerscore_ranking_idx'), models.Index(fields=['career'], name='usercareerscore_career_idx')],
+                'constraints': [models.UniqueConstraint(fields=('profile', 'career'), name='usercareerscore_profile_career_uniq')],
+            },
+        ),
+    ]
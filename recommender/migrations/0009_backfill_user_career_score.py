@@ -0,0 +1,59 @@
+"""Fill UserCareerScore for the profiles that existed before it.
+
+Runs outside one big transaction: profiles are walked in primary key order
+and each batch is committed on its own, and only profiles holding skills
+but no score rows yet are picked up. An interrupted run is resumed by
+running migrate again. Afterwards signals keep the table current, and
+the refresh_career_scores command rebuilds it from scratch.
+"""
+from collections import defaultdict
+
+from django.db import migrations, transaction
+from django.db.models import Count, Exists, OuterRef
+
+BATCH_SIZE = 1000
+
+
+def backfill(apps, schema_editor):
+    Career = apps.get_model('recommender', 'Career')
+    UserProfile = apps.get_model('recommender', 'UserProfile')
+    UserCareerScore = apps.get_model('recommender', 'UserCareerScore')
+    ProfileSkill = UserProfile._meta.get_field('skills').remote_field.through
+    CareerSkill = Career._meta.get_field('required_skills').remote_field.through
+    db = schema_editor.connection.alias
+
+    totals = dict(CareerSkill.objects.using(db).order_by().values_list('career_id').annotate(Count('skill_id')))
+    pending = UserProfile.objects.using(db).filter(
+        Exists(ProfileSkill.objects.filter(userprofile_id=OuterRef('pk'))),
+        ~Exists(UserCareerScore.objects.filter(profile_id=OuterRef('pk'))),
+    ).order_by('pk').values_list('pk', flat=True)
+    last = 0
+    while batch := list(pending.filter(pk__gt=last)[:BATCH_SIZE]):
+        last = batch[-1]
+        held = ProfileSkill.objects.using(db).filter(userprofile_id__in=batch).values_list('userprofile_id', 'skill_id')
+        holders = defaultdict(list)
+        for profile_id, skill_id in held:
+            holders[skill_id].append(profile_id)
+        matching = defaultdict(int)
+        required = CareerSkill.objects.using(db).filter(skill_id__in=list(holders)).values_list('skill_id', 'career_id')
+        for skill_id, career_id in required:
+            for profile_id in holders[skill_id]:
+                matching[profile_id, career_id] += 1
+        with transaction.atomic(using=db):
+            UserCareerScore.objects.using(db).bulk_create([
+                UserCareerScore(profile_id=profile_id, career_id=career_id, matching_skills=count,
+                                total_required=totals[career_id], score=count / totals[career_id])
+                for (profile_id, career_id), count in matching.items()
+            ], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('recommender', '0008_user_career_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
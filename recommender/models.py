@@ -2,6 +2,11 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from .salary import parse_salary
+
+# The salary label and the range kept in step with it
+SALARY_FIELDS = ['average_salary', 'salary_min', 'salary_max', 'salary_currency']
+
 class Domain(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
@@ -22,6 +27,12 @@ class Skill(models.Model):
     difficulty_level = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES, default='Beginner')
     prerequisites = models.ManyToManyField('self', symmetrical=False, blank=True, related_name='dependent_skills')
 
+    class Meta:
+        constraints = [
+            # Also serves lookups by domain, and by name within a domain
+            models.UniqueConstraint(fields=['domain', 'name'], name='unique_skill_name_per_domain'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.domain.name})"
 
@@ -33,10 +44,58 @@ class Career(models.Model):
 
     # Accept salary label strings like "$70,000 - $120,000"
     average_salary = models.CharField(max_length=100, null=True, blank=True)
+    # The same range as numbers, for filtering and sorting; filled from
+    # average_salary whenever it parses (see recommender.salary)
+    salary_min = models.PositiveIntegerField(null=True, blank=True)
+    salary_max = models.PositiveIntegerField(null=True, blank=True)
+    salary_currency = models.CharField(max_length=3, blank=True, default='')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['domain', 'title'], name='unique_career_title_per_domain'),
+        ]
+        indexes = [
+            # "Pays at least X" and "starts at most Y" filters
+            models.Index(fields=['salary_max'], name='career_salary_max_idx'),
+            models.Index(fields=['salary_min'], name='career_salary_min_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.domain.name}"
 
+    def _salary_state(self):
+        return tuple(self.__dict__.get(name) for name in SALARY_FIELDS)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_salary = instance._salary_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_salary = self._salary_state()
+
+    def save(self, *args, **kwargs):
+        # When the label changes and the range wasn't edited with it, the
+        # range follows the label (cleared if it doesn't parse). A new
+        # career takes what the label gives for the parts left empty, as
+        # the catalog loader does.
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'average_salary' in update_fields:
+            label, *salary = self._salary_state()
+            loaded = getattr(self, '_loaded_salary', None)
+            parsed = parse_salary(label)
+            if loaded is None:
+                salary = [value if value not in (None, '') else default for value, default in zip(salary, parsed)]
+            elif label != loaded[0] and salary == list(loaded[1:]):
+                salary = parsed
+            self.salary_min, self.salary_max, self.salary_currency = salary
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'salary_min', 'salary_max', 'salary_currency'}
+        super().save(*args, **kwargs)
+        self._loaded_salary = self._salary_state()
+
 class UserProfile(models.Model):
     # IMPORTANT: related_name='profile' so you can access user.profile
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -53,6 +112,15 @@ class LearningPath(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     title = models.CharField(max_length=255, blank=True)
 
+    class Meta:
+        indexes = [
+            # A user's paths newest first, and reuse lookups per career
+            models.Index(fields=['user', '-created_at'], name='learningpath_user_created_idx'),
+            models.Index(fields=['user', 'career'], name='learningpath_user_career_idx'),
+            # Admin date hierarchy / created_at filter
+            models.Index(fields=['created_at'], name='learningpath_created_idx'),
+        ]
+
     def __str__(self):
         return self.title or f"{self.user.username}'s path for {self.career.title if self.career else 'custom'}"
 
@@ -74,3 +142,30 @@ class PathStep(models.Model):
 
     def __str__(self):
         return f"Step {self.step_order}: {self.skill.name}"
+
+class UserCareerScore(models.Model):
+    """How well a profile's skills match a career, kept materialized.
+
+    One row per profile and career sharing at least one skill, written by
+    the refresh_career_scores command and kept current by career_scores.
+    """
+    profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='career_scores')
+    career = models.ForeignKey(Career, on_delete=models.CASCADE, related_name='user_scores')
+    matching_skills = models.PositiveIntegerField()
+    total_required = models.PositiveIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'career'], name='usercareerscore_profile_career_uniq'),
+        ]
+        indexes = [
+            # A profile's top careers in ranking order
+            models.Index(fields=['profile', '-score', '-matching_skills', 'career'],
+                         name='usercareerscore_ranking_idx'),
+            # Rescoring every row of one career
+            models.Index(fields=['career'], name='usercareerscore_career_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.profile} - {self.career}: {self.score:.2f}"
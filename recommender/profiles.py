@@ -0,0 +1,84 @@
+"""Bulk updates of the skills a profile holds.
+
+set_profile_skills() replaces a profile's skills with a new selection and
+update_profile_skills() adds and removes some. Both resolve the skills in
+one query, diff them against the profile's through-table rows and apply
+only the difference with one bulk insert and one delete, in a single
+transaction.
+
+Every change is announced by one ``profile_skills_changed`` signal carrying
+the added and removed skill ids, sent once the transaction commits. Direct
+``profile.skills.add()/remove()`` calls are translated into the same signal
+(see signals.py), so caches such as suggestion frontiers listen to it alone
+and update incrementally.
+"""
+from django.db import router, transaction
+from django.dispatch import Signal
+
+from .models import Skill, UserProfile
+
+# Sent with sender=UserProfile, profile_id, added and removed (frozensets of
+# skill ids, either may be empty) and using (the database alias).
+profile_skills_changed = Signal()
+
+Through = UserProfile.skills.through
+
+
+def _resolve(skill_ids, names, domain, using):
+    skills = Skill.objects.using(using)
+    if domain is not None:
+        skills = skills.filter(domain=domain)
+    if names is not None:
+        return set(skills.filter(name__in=list(names)).values_list('pk', flat=True))
+    return set(skills.filter(pk__in=list(skill_ids)).values_list('pk', flat=True))
+
+
+def _apply(profile_id, added, removed, using):
+    if removed:
+        Through.objects.using(using).filter(userprofile_id=profile_id, skill_id__in=removed).delete()
+    if added:
+        Through.objects.using(using).bulk_create(
+            [Through(userprofile_id=profile_id, skill_id=skill_id) for skill_id in added],
+            ignore_conflicts=True)
+    if added or removed:
+        transaction.on_commit(lambda: profile_skills_changed.send(
+            sender=UserProfile, profile_id=profile_id, added=frozenset(added),
+            removed=frozenset(removed), using=using), using=using)
+
+
+def set_profile_skills(profile, skill_ids=None, names=None, domain=None, using=None):
+    """Make ``profile`` hold exactly the given skills.
+
+    Skills are given by ``skill_ids`` or by ``names``; with ``domain`` only
+    skills of that domain count. Unknown ids and names are ignored. Returns
+    ``(added, removed)`` skill id sets.
+    """
+    using = using or router.db_for_write(UserProfile)
+    profile_id = getattr(profile, 'pk', profile)
+    with transaction.atomic(using=using):
+        # Serializes concurrent updates of one profile where rows can be locked
+        UserProfile.objects.using(using).select_for_update().filter(pk=profile_id).exists()
+        wanted = _resolve(skill_ids or (), names, domain, using)
+        current = set(Through.objects.using(using).filter(
+            userprofile_id=profile_id).values_list('skill_id', flat=True))
+        added, removed = wanted - current, current - wanted
+        _apply(profile_id, added, removed, using)
+    return added, removed
+
+
+def update_profile_skills(profile, add=(), remove=(), using=None):
+    """Add and remove skill ids, skipping ones already (not) held.
+
+    Returns ``(added, removed)`` like set_profile_skills().
+    """
+    using = using or router.db_for_write(UserProfile)
+    profile_id = getattr(profile, 'pk', profile)
+    add, remove = set(add), set(remove)
+    with transaction.atomic(using=using):
+        UserProfile.objects.using(using).select_for_update().filter(pk=profile_id).exists()
+        held = set(Through.objects.using(using).filter(
+            userprofile_id=profile_id, skill_id__in=add | remove).values_list('skill_id', flat=True))
+        added = _resolve(add - held - remove, None, None, using)
+        removed = remove & held
+        _apply(profile_id, added, removed, using)
+    return added, removed
@@ -1,80 +1,367 @@
-from .models import Career, Skill, LearningPath, PathStep
+import heapq
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+from .collaborative import neighbour_index
+from .frontier import SkillFrontier, get_frontier
+from .instrumentation import instrumented
+from .models import UserCareerScore, UserProfile, LearningPath, PathStep
+from .result_cache import result_cache
+from .scoring import scoring_model
+from .skill_graph import get_skill_graph
+
+def _ranked(graph, scores, min_score):
+    """Sort keys for scored careers; smaller keys are better matches.
+
+    Higher score wins, ties go to the career with more matching skills and
+    then to the lower id, so the ranking is fully deterministic.
+    """
+    ids = graph.career_ids
+    return [
+        (-score, -matching, ids[c], c, total)
+        for c, score, matching, total in scores
+        if min_score is None or score >= min_score
+    ]
+
+
+def _as_result(graph, key):
+    neg_score, neg_matching, _, c, total = key
+    return {
+        'career': graph.career(c),
+        'score': -neg_score,
+        'matching_skills': -neg_matching,
+        'total_required': total
+    }
+
+
+def _best(graph, scores, limit, min_score):
+    """Sort keys of the best of the scored careers"""
+    # Score careers based on how many required skills user already has
+    ranked = _ranked(graph, scores, min_score)
+
+    # Only the top `limit` entries are selected
+    if limit is not None:
+        return tuple(heapq.nsmallest(limit, ranked))
+    return tuple(sorted(ranked))
+
+
+def _salary_filter(min_salary, max_salary, currency):
+    if min_salary is None and max_salary is None and not currency:
+        return None
+    return (min_salary, max_salary, currency or '')
+
+
+def _within_salary(graph, scores, salary):
+    """Keep the scores of careers passing the salary filter.
+
+    Checked in memory against the snapshot's salary columns: a career
+    passes when its range reaches ``min_salary``, starts at or below
+    ``max_salary`` and is in ``currency``. Careers without salary data
+    never pass.
+    """
+    if salary is None:
+        return scores
+    min_salary, max_salary, currency = salary
+    mins, maxes, currencies = graph.career_salaries
+
+    def passes(c):
+        if min_salary is not None and (maxes[c] is None or maxes[c] < min_salary):
+            return False
+        if max_salary is not None and (mins[c] is None or mins[c] > max_salary):
+            return False
+        return not currency or currencies[c] == currency
+    return (row for row in scores if passes(row[0]))
+
+
+def _chunks(profiles, chunk_size):
+    if isinstance(profiles, QuerySet):
+        # Stream from a server-side cursor instead of caching the queryset
+        profiles = profiles.only('id', 'domain_id').iterator(chunk_size=chunk_size)
+    iterator = iter(profiles)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
 
 class RecommendationEngine:
     
     @staticmethod
-    def get_matching_careers(domain, user_skills):
-        """Find careers matching domain and user skills"""
-        careers = Career.objects.filter(domain=domain)
-        
-        # Score careers based on how many required skills user already has
-        career_scores = []
-        for career in careers:
-            required_skills = set(career.required_skills.all())
-            user_skill_set = set(user_skills)
-            matching_skills = required_skills.intersection(user_skill_set)
-            
-            score = len(matching_skills) / len(required_skills) if required_skills else 0
-            career_scores.append({
-                'career': career,
-                'score': score,
-                'matching_skills': len(matching_skills),
-                'total_required': len(required_skills)
-            })
-        
-        # Sort by score
-        career_scores.sort(key=lambda x: x['score'], reverse=True)
-        return career_scores
+    @instrumented('engine.get_matching_careers')
+    def get_matching_careers(domain, user_skills, limit=None, min_score=None, scoring=None,
+                             min_salary=None, max_salary=None, currency=None, graph=None):
+        """Find careers matching domain and user skills.
+
+        ``limit`` keeps only the best N careers (heap selection, no full
+        sort) and ``min_score`` drops careers scoring below it. ``scoring``
+        picks a scoring model by name ('fraction', 'weighted') instead of
+        the RECOMMENDER_SCORING one. ``min_salary``, ``max_salary`` and
+        ``currency`` keep careers whose salary range reaches / starts below
+        those amounts, checked against the snapshot without a query.
+        Rankings are shared through the result cache by users with the same
+        skill set. ``graph`` is the SkillGraph to answer from, by default
+        the current one.
+        """
+        graph = graph or get_skill_graph()
+        d = graph.domain_of(domain)
+        if d is None:
+            return []
+        model = scoring_model(scoring)
+        skills = graph.skill_set(user_skills)
+        salary = _salary_filter(min_salary, max_salary, currency)
+        best = result_cache().get_or_compute(
+            graph, 'careers', d, skills, (limit, min_score, model.key, salary),
+            lambda: _best(graph, _within_salary(graph, model.score(graph, skills, d), salary), limit, min_score))
+        return [_as_result(graph, key) for key in best]
+
+    @staticmethod
+    @instrumented('engine.get_cross_domain_careers')
+    def get_cross_domain_careers(user_skills, limit=None, min_score=None, scoring=None,
+                                 min_salary=None, max_salary=None, currency=None, graph=None):
+        """get_matching_careers across every domain.
+
+        Only careers sharing at least one skill with the user (or, with
+        prerequisite credit, a skill the user is ready for) are scored and
+        returned, found through the graph's inverted skill -> career index.
+        The work is proportional to the postings of the user's skills, not
+        to the size of the catalog. Salary filters work as there.
+        """
+        graph = graph or get_skill_graph()
+        model = scoring_model(scoring)
+        skills = graph.skill_set(user_skills)
+        salary = _salary_filter(min_salary, max_salary, currency)
+        best = result_cache().get_or_compute(
+            graph, 'careers', None, skills, (limit, min_score, model.key, salary),
+            lambda: _best(graph, _within_salary(graph, model.score_touched(graph, skills), salary),
+                          limit, min_score))
+        return [_as_result(graph, key) for key in best]
+
+    @staticmethod
+    @instrumented('engine.iter_matching_careers')
+    def iter_matching_careers(domain, user_skills, min_score=None, scoring=None):
+        """Lazily yield get_matching_careers results, best first.
+
+        Heapifies the scores in O(n) and pays O(log n) per result actually
+        consumed, for callers that stop after the first few.
+        """
+        graph = get_skill_graph()
+        d = graph.domain_of(domain)
+        if d is None:
+            return
+        heap = _ranked(graph, scoring_model(scoring).score(graph, graph.skill_set(user_skills), d), min_score)
+        heapq.heapify(heap)
+        while heap:
+            yield _as_result(graph, heapq.heappop(heap))
+
+    @staticmethod
+    @instrumented('engine.get_matching_careers_batch')
+    def get_matching_careers_batch(profiles, chunk_size=1000, limit=None, min_score=None, scoring=None):
+        """Score many UserProfiles against their domains' careers.
+
+        Yields lists of ``(profile, career_scores)`` pairs, one list per chunk
+        of ``chunk_size`` profiles, where ``career_scores`` has the same shape
+        as get_matching_careers (including ``limit``/``min_score``/
+        ``scoring``). Each chunk costs one through-table query for the
+        profiles' skills, so memory stays bounded however many profiles the
+        queryset or iterable holds.
+        """
+        graph = get_skill_graph()
+        cache = result_cache()
+        model = scoring_model(scoring)
+        through = UserProfile.skills.through
+        for chunk in _chunks(profiles, chunk_size):
+            held = {p.pk: [] for p in chunk}
+            rows = through.objects.filter(userprofile_id__in=list(held)).values_list('userprofile_id', 'skill_id')
+            for profile_id, skill_id in rows:
+                held[profile_id].append(skill_id)
+
+            results = []
+            for profile in chunk:
+                d = graph.domain_of(profile.domain_id)
+                best = ()
+                if d is not None:
+                    skills = graph.skill_set(held[profile.pk])
+                    best = cache.get_or_compute(graph, 'careers', d, skills, (limit, min_score, model.key, None),
+                                                lambda: _best(graph, model.score(graph, skills, d), limit, min_score))
+                results.append((profile, [_as_result(graph, key) for key in best]))
+            yield results
     
     @staticmethod
-    def generate_learning_path(user, career):
-        """Generate step-by-step learning path for a career"""
+    @instrumented('engine.get_top_careers')
+    def get_top_careers(profile, domain=None, limit=10, min_score=None):
+        """A saved profile's best careers from the materialized UserCareerScore table.
+
+        One query down the (profile, score) index, in get_matching_careers
+        order and with the same result dicts, scored by the 'fraction'
+        model. ``domain`` keeps careers of one domain only; its careers
+        sharing no skill with the profile have no row and follow at score 0,
+        as get_matching_careers lists them.
+        """
+        rows = UserCareerScore.objects.filter(profile=profile).select_related('career__domain')
+        if domain is not None:
+            rows = rows.filter(career__domain=domain)
+        if min_score is not None:
+            rows = rows.filter(score__gte=min_score)
+        rows = rows.order_by('-score', '-matching_skills', 'career_id')
+        if limit is not None:
+            rows = rows[:limit]
+        results = [
+            {'career': row.career, 'score': row.score,
+             'matching_skills': row.matching_skills, 'total_required': row.total_required}
+            for row in rows
+        ]
+        if domain is None or (min_score is not None and min_score > 0):
+            return results
+        graph = get_skill_graph()
+        d = graph.domain_of(domain)
+        listed = {r['career'].pk for r in results}
+        for c in graph.domain_careers[d] if d is not None else ():
+            if limit is not None and len(results) >= limit:
+                break
+            if graph.career_ids[c] not in listed:
+                results.append({'career': graph.career(c), 'score': 0.0,
+                                'matching_skills': 0, 'total_required': graph.career_sizes[c]})
+        return results
+
+    @staticmethod
+    @instrumented('engine.get_collaborative_careers')
+    def get_collaborative_careers(user_skills, domain=None, limit=10, neighbours=50, exclude_profile=None):
+        """Careers pursued by the users whose skills are most like these.
+
+        Looks up the ``neighbours`` most similar profiles (Jaccard over skill
+        sets) in the MinHash LSH neighbour index and ranks the careers of
+        their learning paths by the similarity of the users who chose them.
+        Returns dicts with ``career``, ``score`` (share of neighbour
+        similarity, 0-1) and ``supporters`` (neighbours who chose it).
+        ``exclude_profile`` leaves a UserProfile (or its id) out of its own
+        neighbourhood, and ``domain`` keeps careers of one domain only.
+        """
+        graph = get_skill_graph()
+        d = None
+        if domain is not None:
+            d = graph.domain_of(domain)
+            if d is None:
+                return []
+        skill_ids = [graph.skill_ids[i] for i in graph.skill_set(user_skills)]
+        votes = neighbour_index().recommend(skill_ids, neighbours, getattr(exclude_profile, 'pk', exclude_profile))
+        ranked = []
+        for career_id, (score, supporters) in votes.items():
+            c = graph.career_index.get(career_id)
+            if c is not None and (d is None or graph.career_domain[c] == d):
+                ranked.append((-score, -supporters, career_id, c))
+        return [
+            {'career': graph.career(c), 'score': -neg_score, 'supporters': -neg_supporters}
+            for neg_score, neg_supporters, _, c in heapq.nsmallest(limit, ranked)
+        ]
+
+    @staticmethod
+    @instrumented('engine.explain_career_match')
+    def explain_career_match(career, user_skills, scoring=None, graph=None):
+        """Why a career scores what it does for these skills.
+
+        Returns ``{'career', 'score', 'contributions'}`` where every required
+        skill of the career has a contribution dict with its ``skill``,
+        ``status`` ('matched', 'partial' via prerequisites, or 'missing'),
+        ``weight`` (with the per-factor ``factors``) and the share of the
+        score it ``contributed``, largest first. None for unknown careers.
+        """
+        graph = graph or get_skill_graph()
+        c = graph.career_index.get(getattr(career, 'pk', career))
+        if c is None:
+            return None
+        score, contributions = scoring_model(scoring).explain(graph, graph.skill_set(user_skills), c)
+        for item in contributions:
+            item['skill'] = graph.skill(item['skill'])
+        return {'career': graph.career(c), 'score': score, 'contributions': contributions}
+
+    @staticmethod
+    @instrumented('engine.plan_learning_path')
+    def plan_learning_path(career, current_skills, graph=None):
+        """Ordered list of skills the user still needs for a career.
+
+        Includes missing prerequisites of the required skills and puts every
+        skill after its prerequisites, easier skills first where the order
+        is free. Raises PrerequisiteCycleError if prerequisites form a loop.
+        """
+        graph = graph or get_skill_graph()
+        c = graph.career_index.get(getattr(career, 'pk', career))
+        if c is None:
+            return []
+        order = graph.learning_order(graph.skills_required_by(c), graph.skill_set(current_skills))
+        return [graph.skill(i) for i in order]
+
+    @staticmethod
+    @instrumented('engine.generate_learning_path')
+    def generate_learning_path(user, career, reuse_existing=False):
+        """Generate and save a step-by-step learning path for a career.
+
+        The LearningPath and all of its PathSteps are written in one
+        transaction with a single bulk insert for the steps. With
+        ``reuse_existing`` the user's newest path for this career is returned
+        instead when it already has exactly the planned steps.
+        """
         # Get user's current skills
-        user_profile = user.userprofile
-        current_skills = set(user_profile.current_skills.all())
-        
-        # Get required skills for career
-        required_skills = career.required_skills.all()
-        
-        # Find skills user needs to learn
-        skills_to_learn = [skill for skill in required_skills if skill not in current_skills]
-        
-        # Sort by difficulty level
-        difficulty_order = {'Beginner': 1, 'Intermediate': 2, 'Advanced': 3}
-        skills_to_learn.sort(key=lambda x: difficulty_order.get(x.difficulty_level, 2))
-        
-        # Create learning path
-        learning_path = LearningPath.objects.create(
-            user=user,
-            target_career=career
-        )
-        
-        # Create path steps
-        for index, skill in enumerate(skills_to_learn, start=1):
-            PathStep.objects.create(
-                learning_path=learning_path,
-                skill=skill,
-                step_order=index,
-                status='Not Started'
-            )
-        
+        current_skills = UserProfile.skills.through.objects.filter(
+            userprofile__user=user).values_list('skill_id', flat=True)
+        skills_to_learn = RecommendationEngine.plan_learning_path(career, current_skills)
+        planned = [skill.pk for skill in skills_to_learn]
+
+        with transaction.atomic():
+            if reuse_existing and not planned:
+                existing = LearningPath.objects.filter(
+                    user=user, career=career, steps__isnull=True).order_by('-pk').first()
+                if existing:
+                    return existing
+            elif reuse_existing:
+                existing = {}
+                steps = PathStep.objects.filter(
+                    learning_path__user=user, learning_path__career=career,
+                ).order_by('learning_path_id', 'step_order').values_list('learning_path_id', 'skill_id')
+                for path_id, skill_id in steps:
+                    existing.setdefault(path_id, []).append(skill_id)
+                matches = [path_id for path_id, skill_ids in existing.items() if skill_ids == planned]
+                if matches:
+                    return LearningPath.objects.get(pk=max(matches))
+
+            # Create learning path
+            learning_path = LearningPath.objects.create(user=user, career=career)
+
+            # Create path steps
+            PathStep.objects.bulk_create([
+                PathStep(learning_path=learning_path, skill=skill, step_order=index, status='Not Started')
+                for index, skill in enumerate(skills_to_learn, start=1)
+            ])
+
         return learning_path
-    
+
+    @staticmethod
+    @instrumented('engine.get_suggested_skills')
+    def get_suggested_skills(domain, current_skills, limit=10, rank=None, graph=None):
+        """Suggest next skills to learn based on current skills.
+
+        ``rank='careers'`` puts skills required by more careers first;
+        by default skills come in catalog order.
+        """
+        graph = graph or get_skill_graph()
+        d = graph.domain_of(domain)
+        if d is None:
+            return []
+        skills = graph.skill_set(current_skills)
+        suggestions = result_cache().get_or_compute(
+            graph, 'skills', d, skills, (limit, rank),
+            lambda: tuple(SkillFrontier(graph, skills).suggestions(d, limit, rank)))
+        return [graph.skill(i) for i in suggestions]
+
     @staticmethod
-    def get_suggested_skills(domain, current_skills):
-        """Suggest next skills to learn based on current skills"""
-        # Get all skills in the domain
-        all_domain_skills = Skill.objects.filter(domain=domain)
-        
-        # Filter out skills user already has
-        current_skill_ids = [skill.id for skill in current_skills]
-        suggested = []
-        
-        for skill in all_domain_skills:
-            if skill.id not in current_skill_ids:
-                # Check if prerequisites are met
-                prerequisites = skill.prerequisites.all()
-                if all(prereq in current_skills for prereq in prerequisites):
-                    suggested.append(skill)
-        
-        return suggested[:10]  # Return top 10 suggestions
\ No newline at end of file
+    @instrumented('engine.get_profile_suggestions')
+    def get_profile_suggestions(profile, limit=10, rank=None):
+        """get_suggested_skills for a saved UserProfile in its own domain.
+
+        Served from a per-profile frontier that profile_skills_changed
+        keeps up to date, so repeat calls cost no queries.
+        """
+        graph = get_skill_graph()
+        d = graph.domain_of(profile.domain_id)
+        if d is None:
+            return []
+        return [graph.skill(i) for i in get_frontier(profile).suggestions(d, limit, rank)]
@@ -0,0 +1,187 @@
+"""Two-tier cache of ranked recommendation results.
+
+Users who share a domain and a skill set get the same career matches and
+skill suggestions, so results are cached under (kind, domain, skill set,
+call parameters) for the current catalog, with a domain of None for
+cross-domain results:
+
+* an in-process LRU of ``RECOMMENDER_RESULT_CACHE_SIZE`` entries (default
+  1024, 0 turns it off), keyed by the snapshot's catalog version and
+  cleared as soon as a newer version is seen;
+* optionally the Django cache named by ``RECOMMENDER_RESULT_CACHE_BACKEND``
+  (any configured alias: locmem, file, database...), shared between
+  processes and keyed by the catalog fingerprint, with entries expiring
+  after ``RECOMMENDER_RESULT_CACHE_TIMEOUT`` seconds (default 3600).
+
+The backend may do I/O, so it is never read on an event loop thread: with
+a backend configured the async views answer from a worker thread, and
+anything else calling in from a loop only gets the in-process LRU. Stores
+from a loop are handed to a worker thread without waiting.
+
+A skill set is identified by the sorted tuple of its skill indexes in the
+snapshot (SkillGraph.skill_set), which is canonical for the set of known
+skill ids. Cached values hold only ids and indexes, never model instances,
+so entries are immutable and safe to share between threads.
+"""
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+
+DEFAULT_SIZE = 1024
+DEFAULT_TIMEOUT = 3600
+BACKEND_WORKERS = 4
+
+_backend_executor = ThreadPoolExecutor(max_workers=BACKEND_WORKERS, thread_name_prefix='recommender-cache')
+
+
+def _on_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _off_loop(method, *args):
+    try:
+        return method(*args)
+    finally:
+        close_old_connections()
+
+
+class ResultCache:
+    """In-process LRU in front of an optional Django cache backend"""
+
+    def __init__(self, maxsize=DEFAULT_SIZE, backend=None, timeout=DEFAULT_TIMEOUT):
+        self.maxsize = maxsize
+        self.backend = caches[backend] if backend else None
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self.hits = self.backend_hits = self.misses = 0
+        self.evictions = self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return bool(self.maxsize or self.backend)
+
+    def _backend_key(self, graph, key):
+        kind, domain_index, skills, params = key
+        domain = '*' if domain_index is None else graph.domain_ids[domain_index]
+        raw = f"{graph.fingerprint}:{kind}:{domain}:{params!r}:{','.join(map(str, skills))}"
+        return 'recommender:results:' + hashlib.blake2b(raw.encode(), digest_size=20).hexdigest()
+
+    def _backend_set(self, backend_key, value):
+        if _on_event_loop():
+            _backend_executor.submit(_off_loop, self.backend.set, backend_key, value, self.timeout)
+        else:
+            self.backend.set(backend_key, value, self.timeout)
+
+    def get_or_compute(self, graph, kind, domain_index, skills, params, compute):
+        """Cached result of compute() for this skill set on this snapshot"""
+        if not self.enabled:
+            return compute()
+        key = (kind, domain_index, skills, params)
+        if self.maxsize:
+            with self._lock:
+                if self._version != graph.version:
+                    self.invalidations += bool(self._entries)
+                    self._entries.clear()
+                    self._version = graph.version
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+        value = None
+        if self.backend:
+            backend_key = self._backend_key(graph, key)
+            # Waiting on the backend would stall every coroutine on the loop
+            value = None if _on_event_loop() else self.backend.get(backend_key)
+            if value is not None:
+                with self._lock:
+                    self.backend_hits += 1
+        if value is None:
+            value = compute()
+            with self._lock:
+                self.misses += 1
+            if self.backend:
+                self._backend_set(backend_key, value)
+
+        if self.maxsize:
+            with self._lock:
+                # A rebuild may have landed while computing; don't file the
+                # result under the newer version.
+                if self._version == graph.version:
+                    self._entries[key] = value
+                    if len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.backend_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'backend_hits': self.backend_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.backend_hits) / lookups if lookups else 0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def result_cache():
+    """The process-wide ResultCache, configured from settings"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache(
+                    maxsize=getattr(settings, 'RECOMMENDER_RESULT_CACHE_SIZE', DEFAULT_SIZE),
+                    backend=getattr(settings, 'RECOMMENDER_RESULT_CACHE_BACKEND', None),
+                    timeout=getattr(settings, 'RECOMMENDER_RESULT_CACHE_TIMEOUT', DEFAULT_TIMEOUT),
+                )
+    return _cache
+
+
+@receiver(setting_changed)
+def reset_result_cache(setting, **kwargs):
+    global _cache
+    if setting.startswith('RECOMMENDER_RESULT_CACHE') or setting == 'CACHES':
+        _cache = None
+
+
+def prometheus_text():
+    stats = result_cache().stats()
+    lines = []
+    for name in ('hits', 'backend_hits', 'misses', 'evictions', 'invalidations'):
+        lines.append(f"# TYPE recommender_result_cache_{name}_total counter")
+        lines.append(f"recommender_result_cache_{name}_total {stats[name]}")
+    for name in ('size', 'maxsize'):
+        lines.append(f"# TYPE recommender_result_cache_{name} gauge")
+        lines.append(f"recommender_result_cache_{name} {stats[name]}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,59 @@
+"""Parse free-text salary labels into numeric ranges.
+
+Career.average_salary holds display labels such as "$70,000 - $120,000".
+parse_salary() turns them into (minimum, maximum, currency) for the
+indexed salary_min/salary_max/salary_currency columns. It accepts:
+
+* amounts with thousands separators or k/m suffixes: "85,000", "$85k", "1.2M"
+* single amounts and ranges joined by "-", "–", "to": "$70k to $90k"
+* currency symbols ($ £ € ₹ ¥) or ISO codes before or after: "EUR 50,000"
+
+Labels it cannot read parse to (None, None, '').
+"""
+import re
+
+SYMBOLS = {'$': 'USD', '£': 'GBP', '€': 'EUR', '₹': 'INR', '¥': 'JPY'}
+CURRENCY_CODES = {'USD', 'GBP', 'EUR', 'INR', 'JPY', 'CAD', 'AUD', 'CHF', 'SGD'}
+MULTIPLIERS = {'': 1, 'k': 1000, 'm': 1000000}
+
+AMOUNT = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*([km]?)\b', re.IGNORECASE)
+CODE = re.compile(r'\b([A-Z]{3})\b')
+RANGE_SEPARATOR = re.compile(r'\s*(?:-|–|—|\bto\b)\s*', re.IGNORECASE)
+
+UNPARSED = (None, None, '')
+
+
+def _amount(text):
+    match = AMOUNT.search(text)
+    if match is None:
+        return None
+    number, suffix = match.groups()
+    try:
+        return round(float(number.replace(',', '')) * MULTIPLIERS[suffix.lower()])
+    except ValueError:
+        return None
+
+
+def _currency(text):
+    for symbol, code in SYMBOLS.items():
+        if symbol in text:
+            return code
+    for code in CODE.findall(text.upper()):
+        if code in CURRENCY_CODES:
+            return code
+    return ''
+
+
+def parse_salary(label):
+    """``(minimum, maximum, currency)`` for a salary label, or (None, None, '')"""
+    if not label or not label.strip():
+        return UNPARSED
+    parts = RANGE_SEPARATOR.split(label.strip(), maxsplit=1)
+    amounts = [_amount(part) for part in parts]
+    if amounts[0] is None:
+        return UNPARSED
+    minimum = amounts[0]
+    maximum = amounts[1] if len(amounts) > 1 and amounts[1] is not None else minimum
+    if minimum > maximum:
+        minimum, maximum = maximum, minimum
+    return minimum, maximum, _currency(label)
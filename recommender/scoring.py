@@ -0,0 +1,262 @@
+"""Career scoring over the SkillGraph's inverted skill -> careers index.
+
+Instead of intersecting one career's skills with the user's at a time,
+match counts for every career are accumulated at once: each of the user's
+skills adds one to the careers in its postings, so the work is proportional
+to the postings of the user's skills, not to the size of the catalog.
+
+ScoringModel adds optional skill weights on top: rarity (IDF over the
+careers requiring a skill) and difficulty factors, plus partial credit for
+missing required skills whose prerequisites the user already has. The
+weights are precomputed once per catalog version into dense arrays, so a
+weighted request is a pass over the careers requiring each user skill.
+"""
+import math
+import threading
+from array import array
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+def match_counts(graph, user_skills, domain_index=None):
+    """Number of required skills the user has, for every career.
+
+    ``user_skills`` are skill indexes (see SkillGraph.skill_set). Returns a
+    list indexed by career index; careers outside ``domain_index`` (when
+    given) are reported as 0.
+    """
+    counts = [0] * len(graph.career_ids)
+    career_domain = graph.career_domain
+    for s in user_skills:
+        for c in graph.careers_requiring(s):
+            if domain_index is None or career_domain[c] == domain_index:
+                counts[c] += 1
+    return counts
+
+
+def score_careers(graph, user_skills, domain_index=None):
+    """Score every career in a domain (or all careers) against a user.
+
+    Yields ``(career_index, score, matching, total)`` in career index order.
+    """
+    counts = match_counts(graph, user_skills, domain_index)
+    careers = graph.domain_careers[domain_index] if domain_index is not None else range(len(graph.career_ids))
+    sizes = graph.career_sizes
+    for c in careers:
+        total = sizes[c]
+        matching = counts[c]
+        yield c, matching / total if total else 0, matching, total
+
+
+# --- weighted scoring ---
+DIFFICULTY_WEIGHTS = {1: 1.0, 2: 1.25, 3: 1.5}
+
+
+def idf_weights(graph):
+    """Rarer skills weigh more: log((1 + careers) / (1 + careers requiring it)) + 1"""
+    n = len(graph.career_ids)
+    return [math.log((1 + n) / (1 + df)) + 1 for df in graph.skill_career_counts]
+
+
+def difficulty_weights(graph):
+    return [DIFFICULTY_WEIGHTS.get(level, 1.0) for level in graph.skill_difficulty]
+
+
+# name: function(graph) -> one weight per skill index
+WEIGHT_FACTORS = {
+    'idf': idf_weights,
+    'difficulty': difficulty_weights,
+}
+
+
+class SkillWeights:
+    """Dense per-catalog-version arrays used by a ScoringModel"""
+
+    def __init__(self, graph, factors, prerequisite_credit):
+        n = len(graph.skill_ids)
+        self.version = graph.version
+        self.factors = {name: array('d', WEIGHT_FACTORS[name](graph)) for name in factors}
+        self.skill = array('d', [1.0] * n)
+        for values in self.factors.values():
+            for s in range(n):
+                self.skill[s] *= values[s]
+        self.career_total = array('d', (sum(self.skill[s] for s in graph.skills_required_by(c))
+                                        for c in range(len(graph.career_ids))))
+        # Credit a missing skill earns per prerequisite the user has
+        self.prerequisite_credit = array('d', (
+            prerequisite_credit * self.skill[s] / len(prerequisites) if prerequisites else 0.0
+            for s, prerequisites in enumerate(graph.prerequisites)))
+
+
+class ScoringModel:
+    """Career scoring pipeline: weight factors plus prerequisite credit.
+
+    A career scores the weight of the required skills the user has, plus
+    ``prerequisite_credit`` times the weight of each missing required skill
+    scaled by the share of its direct prerequisites the user has, divided
+    by the weight of all its required skills. With no factors and no
+    credit that is the plain fraction of matched skills.
+    """
+
+    def __init__(self, factors=(), prerequisite_credit=0.0):
+        unknown = set(factors) - set(WEIGHT_FACTORS)
+        if unknown:
+            raise ValueError(f"unknown weight factors: {', '.join(sorted(unknown))}")
+        self.factors = tuple(factors)
+        self.prerequisite_credit = prerequisite_credit
+        self._weights = None
+        self._lock = threading.Lock()
+
+    @property
+    def key(self):
+        """Identifies the model's results in the result cache"""
+        return (type(self).__name__, self.factors, self.prerequisite_credit)
+
+    @property
+    def weighted(self):
+        return bool(self.factors or self.prerequisite_credit)
+
+    def weights(self, graph):
+        """SkillWeights for this snapshot, built once per catalog version"""
+        weights = self._weights
+        if weights is None or weights.version != graph.version:
+            with self._lock:
+                weights = self._weights
+                if weights is None or weights.version != graph.version:
+                    weights = self._weights = SkillWeights(graph, self.factors, self.prerequisite_credit)
+        return weights
+
+    def score(self, graph, user_skills, domain_index=None):
+        """Yield ``(career_index, score, matching, total)`` like score_careers"""
+        if not self.weighted:
+            yield from score_careers(graph, user_skills, domain_index)
+            return
+        weights = self.weights(graph)
+        n = len(graph.career_ids)
+        have = [0.0] * n
+        matching = [0] * n
+        for s in user_skills:
+            w = weights.skill[s]
+            for c in graph.careers_requiring(s):
+                have[c] += w
+                matching[c] += 1
+        for s, credit in self._partial_credit(graph, weights, user_skills).items():
+            for c in graph.careers_requiring(s):
+                have[c] += credit
+
+        careers = graph.domain_careers[domain_index] if domain_index is not None else range(n)
+        sizes = graph.career_sizes
+        for c in careers:
+            total = weights.career_total[c]
+            yield c, have[c] / total if total else 0, matching[c], sizes[c]
+
+    def score_touched(self, graph, user_skills):
+        """Like score() across all domains, for careers sharing a skill with the user.
+
+        Only walks the inverted index postings of the user's skills (and of
+        the missing skills their prerequisite credit reaches), so the cost is
+        proportional to the postings touched, not to the number of careers.
+        Careers are yielded in no particular order.
+        """
+        weights = self.weights(graph) if self.weighted else None
+        have, matching = {}, {}
+        for s in user_skills:
+            w = weights.skill[s] if weights else 1
+            for c in graph.careers_requiring(s):
+                have[c] = have.get(c, 0) + w
+                matching[c] = matching.get(c, 0) + 1
+        if weights:
+            for s, credit in self._partial_credit(graph, weights, user_skills).items():
+                for c in graph.careers_requiring(s):
+                    have[c] = have.get(c, 0) + credit
+
+        sizes = graph.career_sizes
+        totals = weights.career_total if weights else sizes
+        for c, value in have.items():
+            yield c, value / totals[c], matching.get(c, 0), sizes[c]
+
+    def _partial_credit(self, graph, weights, user_skills):
+        """Credit earned by each missing skill through prerequisites the user has"""
+        credit = {}
+        if self.prerequisite_credit:
+            per_prerequisite = weights.prerequisite_credit
+            held = set(user_skills)
+            for p in user_skills:
+                for s in graph.dependents[p]:
+                    if s not in held:
+                        credit[s] = credit.get(s, 0.0) + per_prerequisite[s]
+        return credit
+
+    def explain(self, graph, user_skills, career_index):
+        """Per required skill contributions to one career's score.
+
+        Returns ``(score, contributions)`` where contributions are dicts with
+        the skill index, its ``status`` ('matched', 'partial' or 'missing'),
+        its ``weight`` and per-factor weights, and the share of the score it
+        ``contributed``, largest first.
+        """
+        weights = self.weights(graph)
+        total = weights.career_total[career_index]
+        held = set(user_skills)
+        credit = self._partial_credit(graph, weights, user_skills)
+        contributions = []
+        for s in graph.skills_required_by(career_index):
+            if s in held:
+                status, earned = 'matched', weights.skill[s]
+            elif credit.get(s):
+                status, earned = 'partial', credit[s]
+            else:
+                status, earned = 'missing', 0.0
+            contributions.append({
+                'skill': s,
+                'status': status,
+                'weight': weights.skill[s],
+                'factors': {name: values[s] for name, values in weights.factors.items()},
+                'contribution': earned / total if total else 0,
+            })
+        contributions.sort(key=lambda item: (-item['contribution'], -item['weight'], graph.skill_ids[item['skill']]))
+        return sum(item['contribution'] for item in contributions), contributions
+
+
+SCORING_MODELS = {
+    'fraction': ScoringModel(),
+    'weighted': ScoringModel(factors=('idf', 'difficulty'), prerequisite_credit=0.5),
+}
+
+_configured = None
+
+
+def scoring_model(name=None):
+    """A ScoringModel by name, or the one configured by RECOMMENDER_SCORING.
+
+    The setting (default 'fraction') names one of SCORING_MODELS or is a
+    dotted path to a ScoringModel instance or subclass. A ScoringModel
+    passed in is returned as is.
+    """
+    global _configured
+    if isinstance(name, ScoringModel):
+        return name
+    if name is None:
+        if _configured is None:
+            _configured = _load(getattr(settings, 'RECOMMENDER_SCORING', 'fraction'))
+        return _configured
+    if name not in SCORING_MODELS:
+        raise ValueError(f"scoring must be one of {', '.join(SCORING_MODELS)}")
+    return SCORING_MODELS[name]
+
+
+def _load(value):
+    if value in SCORING_MODELS:
+        return SCORING_MODELS[value]
+    model = import_string(value)
+    return model() if isinstance(model, type) else model
+
+
+@receiver(setting_changed)
+def reset_scoring_model(setting, **kwargs):
+    global _configured
+    if setting == 'RECOMMENDER_SCORING':
+        _configured = None
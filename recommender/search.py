@@ -0,0 +1,297 @@
+"""Full-text and typo-tolerant search over skills and careers.
+
+On SQLite builds with FTS5, migration 0005 creates external-content FTS5
+tables over Skill.name/description and Career.title/description, and
+triggers on the model tables keep them in sync for every write, including
+bulk_create and raw SQL. Queries there are word-prefix matches ranked by
+bm25 with names weighted above descriptions.
+
+Everywhere else, and for typo tolerance on every backend, a pure-Python
+index over names and titles is built from the in-memory skill graph: a
+sorted word list for prefix lookups and a trigram index for fuzzy ones.
+"""
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.db import OperationalError, connections
+
+from .skill_graph import get_skill_graph
+
+WORD = re.compile(r'\w+')
+# Matches ranked per full-text / in-memory prefix lookup
+FTS_CANDIDATES = 2000
+PREFIX_CANDIDATES = 1000
+# Rarest query trigrams used to gather fuzzy candidates
+FUZZY_TRIGRAMS = 6
+# Fuzzy candidates scored by trigram similarity per result wanted
+FUZZY_CANDIDATES = 5
+MIN_FUZZY_SCORE = 0.3
+
+KINDS = {
+    # kind: (model table, text columns, name column index in graph rows)
+    'skills': ('recommender_skill', ('name', 'description'), 1),
+    'careers': ('recommender_career', ('title', 'description'), 1),
+}
+
+
+def fts_table(kind):
+    return f"{KINDS[kind][0]}_fts"
+
+
+# --- FTS5 ---
+def fts_statements(kind):
+    """DDL for the FTS table and sync triggers of a kind; safe to re-run"""
+    table, (name, description), _ = KINDS[kind]
+    fts = fts_table(kind)
+    new = f"new.id, new.{name}, new.{description}, new.domain_id"
+    old = f"'delete', old.id, old.{name}, old.{description}, old.domain_id"
+    columns = f"rowid, {name}, {description}, domain_id"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{name}, {description}, domain_id UNINDEXED, content='{table}', content_rowid='id', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}({columns}) VALUES ({new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, {columns}) VALUES ({old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, {columns}) VALUES ({old}); "
+        f"INSERT INTO {fts}({columns}) VALUES ({new}); END",
+    ]
+
+
+def install_fts(connection, repair=False):
+    """Create missing FTS tables and triggers; returns False without FTS5.
+
+    With ``repair`` only databases that already have the FTS tables are
+    touched. That runs after every migrate, because SQLite table rebuilds
+    (e.g. for AlterField) drop the triggers along with the old table.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            for kind in KINDS:
+                fts = fts_table(kind)
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [fts])
+                created = cursor.fetchone() is None
+                if created and repair:
+                    continue
+                for statement in fts_statements(kind):
+                    cursor.execute(statement)
+                if created:
+                    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        except OperationalError as e:
+            if 'fts5' in str(e):
+                return False
+            raise
+    _fts_tables.pop(connection.alias, None)
+    return True
+
+
+def drop_fts(connection):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for kind in KINDS:
+            fts = fts_table(kind)
+            for trigger in ('insert', 'delete', 'update'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {fts}_{trigger}")
+            cursor.execute(f"DROP TABLE IF EXISTS {fts}")
+    _fts_tables.pop(connection.alias, None)
+
+
+_fts_tables = {}
+
+
+def has_fts(connection):
+    """Whether this database has the FTS tables (cached per connection alias)"""
+    if connection.alias not in _fts_tables:
+        available = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT count(*) FROM sqlite_master WHERE name IN (%s, %s)",
+                               [fts_table(kind) for kind in KINDS])
+                available = cursor.fetchone()[0] == len(KINDS)
+        _fts_tables[connection.alias] = available
+    return _fts_tables[connection.alias]
+
+
+def _fts_query(words, column=None):
+    # A "column :" filter restricts a phrase to that column
+    scope = f"{column} : " if column else ''
+    return ' '.join(f'{scope}"{word}"*' for word in words)
+
+
+def _fts_search(connection, kind, words, domain_id, limit, column=None):
+    # bm25 only ranks the first FTS_CANDIDATES matches, so a broad prefix
+    # such as "da" costs no more than a selective one.
+    fts = fts_table(kind)
+    sql = f"SELECT rowid, bm25({fts}, 10.0, 1.0) AS rank FROM {fts} WHERE {fts} MATCH %s"
+    params = [_fts_query(words, column)]
+    if domain_id is not None:
+        sql += " AND domain_id = %s"
+        params.append(domain_id)
+    sql = f"SELECT rowid FROM ({sql} LIMIT %s) ORDER BY rank LIMIT %s"
+    params += [FTS_CANDIDATES, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+# --- in-memory index ---
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """Word-prefix and trigram lookups over one name per row"""
+
+    def __init__(self, names):
+        self.names = [name.casefold() for name in names]
+        words = sorted({(word, i) for i, name in enumerate(self.names) for word in WORD.findall(name)})
+        self.words = [word for word, _ in words]
+        self.word_rows = array('i', (i for _, i in words))
+        postings = {}
+        for i, name in enumerate(self.names):
+            for gram in {gram for word in WORD.findall(name) for gram in trigrams(word)}:
+                postings.setdefault(gram, []).append(i)
+        self.trigrams = {gram: array('i', rows) for gram, rows in postings.items()}
+
+    def _word_range(self, word):
+        return bisect_left(self.words, word), bisect_left(self.words, word + '\U0010ffff')
+
+    def prefix(self, words, limit, allowed=None):
+        """Rows with a word starting with each of `words`, shortest names first.
+
+        Rows are gathered through the most selective word, at most
+        PREFIX_CANDIDATES of them (exact words and alphabetically first
+        completions first), so very broad prefixes stay fast.
+        """
+        ranges = sorted((self._word_range(word), word) for word in words)
+        ranges.sort(key=lambda item: item[0][1] - item[0][0])
+        (start, end), _ = ranges[0]
+        others = [word for _, word in ranges[1:]]
+        matches = set()
+        for k in range(start, end):
+            i = self.word_rows[k]
+            if i in matches or (allowed is not None and not allowed(i)):
+                continue
+            if others:
+                row_words = WORD.findall(self.names[i])
+                if not all(any(w.startswith(word) for w in row_words) for word in others):
+                    continue
+            matches.add(i)
+            if len(matches) >= PREFIX_CANDIDATES:
+                break
+        return sorted(matches, key=lambda i: (len(self.names[i]), i))[:limit]
+
+    def fuzzy(self, query, limit, allowed=None, exclude=()):
+        """Rows whose name is closest to `query`, tolerating typos"""
+        grams = {gram for word in WORD.findall(query) for gram in trigrams(word)}
+        postings = [self.trigrams[gram] for gram in grams if gram in self.trigrams]
+        if not postings:
+            return []
+        # Count shared trigrams over the rarest postings only: a name within
+        # a typo or two of the query still shares most of them.
+        postings.sort(key=len)
+        counts = Counter()
+        for rows in postings[:FUZZY_TRIGRAMS]:
+            counts.update(rows)
+        wanted = limit * FUZZY_CANDIDATES
+        # Domain filters can reject any number of candidates, so rank them all
+        ranked = counts.most_common(None if allowed else wanted + len(exclude))
+        scored = []
+        for i, _ in ranked:
+            if i in exclude or (allowed is not None and not allowed(i)):
+                continue
+            # pg_trgm-style similarity over the full trigram sets
+            name_grams = {gram for word in WORD.findall(self.names[i]) for gram in trigrams(word)}
+            shared = len(grams & name_grams)
+            scored.append((shared / (len(grams) + len(name_grams) - shared), i))
+            if len(scored) >= wanted:
+                break
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return [i for score, i in scored if score >= MIN_FUZZY_SCORE][:limit]
+
+
+# kind -> (snapshot version, NameIndex), one entry per kind
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def name_index(graph, kind):
+    """NameIndex over skill names or career titles of this snapshot"""
+    version, index = _indexes.get(kind, (None, None))
+    if version != graph.version:
+        with _indexes_lock:
+            version, index = _indexes.get(kind, (None, None))
+            if version != graph.version:
+                rows = graph.skill_rows if kind == 'skills' else graph.career_rows
+                index = NameIndex([row[KINDS[kind][2]] for row in rows])
+                # Only a newer snapshot replaces the cached index
+                if version is None or graph.version > version:
+                    _indexes[kind] = (graph.version, index)
+    return index
+
+
+# --- search ---
+def search(kind, query, domain=None, limit=10, fuzzy=True, using='default'):
+    """Skills or careers matching `query`, best first.
+
+    Returns (instance, match) pairs where match is 'text' for full-text
+    (FTS5) hits, 'prefix' for name-prefix hits and 'fuzzy' for typo-tolerant
+    ones, which only fill the results left over by the others.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+    graph = get_skill_graph()
+    words = WORD.findall(query.casefold())
+    if not words or limit < 1:
+        return []
+    if kind == 'skills':
+        index_of, domains, instance = graph.skill_index, graph.skill_domain, graph.skill
+    else:
+        index_of, domains, instance = graph.career_index, graph.career_domain, graph.career
+    d = None
+    if domain is not None:
+        d = graph.domain_of(domain)
+        if d is None:
+            return []
+    allowed = None if d is None else (lambda i: domains[i] == d)
+
+    connection = connections[using]
+    if has_fts(connection):
+        domain_id = None if d is None else graph.domain_ids[d]
+        found = [index_of[pk] for pk in _fts_search(connection, kind, words, domain_id, limit) if pk in index_of]
+        match = 'text'
+    else:
+        found = name_index(graph, kind).prefix(words, limit, allowed)
+        match = 'prefix'
+    results = [(i, match) for i in found]
+
+    if fuzzy and len(results) < limit:
+        exclude = set(found)
+        extra = name_index(graph, kind).fuzzy(' '.join(words), limit - len(results), allowed, exclude)
+        results.extend((i, 'fuzzy') for i in extra)
+    return [(instance(i), match) for i, match in results]
+
+
+def text_search_ids(kind, query, limit, using='default'):
+    """Primary keys of the rows whose name (title for careers) matches `query`, best first.
+
+    Unlike search_catalog() descriptions aren't searched, matching what the
+    admin's search_fields cover. Runs on the FTS tables alone, without the
+    skill graph, so it suits callers that only need ids (e.g. the admin).
+    Returns None when the database has no FTS tables.
+    """
+    connection = connections[using]
+    if not has_fts(connection):
+        return None
+    words = WORD.findall(query.casefold())
+    if not words:
+        return []
+    return _fts_search(connection, kind, words, None, limit, column=KINDS[kind][1][0])
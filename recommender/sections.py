@@ -0,0 +1,86 @@
+"""Binary files of flat arrays, memory-mapped when read.
+
+Catalog snapshots and neighbour indexes share this layout (little-endian):
+an 8-byte magic, a header of ``(offset, length)`` pairs, one per section,
+then each section as a flat array aligned to 8 bytes. A file format is its
+magic plus a spec, the ``[(name, typecode)]`` list of its sections in file
+order. Reading is an ``mmap`` plus one ``memoryview.cast`` per section, so
+nothing is parsed until it is read; big-endian hosts swap bytes on both
+ends and get copies instead.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+
+class SectionFileError(ValueError):
+    """A file without the expected magic; ``magic`` is what it starts with,
+    None when it is too short to have a header"""
+
+    def __init__(self, path, magic):
+        super().__init__(f"{path} has an unexpected format")
+        self.magic = magic
+
+
+def csr(groups, typecode='i'):
+    """``(offsets, targets)`` arrays holding a sequence of groups in CSR form.
+
+    Group r is ``targets[offsets[r]:offsets[r + 1]]``.
+    """
+    offsets, targets = array('q', [0]), array(typecode)
+    for values in groups:
+        targets.extend(values)
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+def _header(spec):
+    return struct.Struct('<8s' + 'QQ' * len(spec))
+
+
+def write_sections(path, magic, spec, sections):
+    """Write ``sections`` (name -> array or iterable) to ``path`` atomically"""
+    header_struct = _header(spec)
+    tmp = f"{path}.tmp"
+    header = []
+    with open(tmp, 'wb') as f:
+        f.write(b'\0' * header_struct.size)
+        for name, typecode in spec:
+            values = sections[name]
+            if not isinstance(values, array) or values.typecode != typecode or sys.byteorder != 'little':
+                values = array(typecode, values)
+                if sys.byteorder != 'little':
+                    values.byteswap()
+            f.write(b'\0' * (-f.tell() % 8))
+            header += [f.tell(), len(values)]
+            values.tofile(f)
+        f.seek(0)
+        f.write(header_struct.pack(magic, *header))
+    os.replace(tmp, path)
+
+
+def read_sections(path, magic, spec):
+    """``{name: section}`` of a file written by write_sections().
+
+    Sections are read-only memoryviews into the mapped file. Raises
+    SectionFileError if the file doesn't start with ``magic``.
+    """
+    header_struct = _header(spec)
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if data.size() < header_struct.size:
+        raise SectionFileError(path, None)
+    found, *header = header_struct.unpack_from(data)
+    if found != magic:
+        raise SectionFileError(path, found)
+    view = memoryview(data)
+    sections = {}
+    for (name, typecode), offset, length in zip(spec, header[::2], header[1::2]):
+        section = view[offset:offset + length * array(typecode).itemsize].cast(typecode)
+        if sys.byteorder != 'little':
+            section = array(typecode, section)
+            section.byteswap()
+        sections[name] = section
+    return sections
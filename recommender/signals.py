@@ -0,0 +1,121 @@
+from django.db import connections
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed, post_migrate
+from django.dispatch import receiver
+
+from .models import Domain, Skill, Career, UserProfile
+from . import career_scores, frontier, search, skill_graph
+from .profiles import profile_skills_changed
+
+
+@receiver(post_save, sender=Domain)
+@receiver(post_save, sender=Skill)
+@receiver(post_save, sender=Career)
+@receiver(post_delete, sender=Domain)
+@receiver(post_delete, sender=Skill)
+@receiver(post_delete, sender=Career)
+def catalog_changed(sender, **kwargs):
+    """Any write to the catalog makes the in-memory skill graph stale"""
+    skill_graph.invalidate()
+
+
+@receiver(m2m_changed, sender=Skill.prerequisites.through)
+@receiver(m2m_changed, sender=Career.required_skills.through)
+def catalog_edges_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        skill_graph.invalidate()
+
+
+def _links(sender, source, target, instance, reverse, using):
+    """Through rows of a m2m_changed instance, as (instance side, other side)"""
+    if reverse:
+        source, target = target, source
+    return sender.objects.using(using).filter(**{source: instance.pk}), target
+
+
+def _keep_linked(sender, source, target, instance, reverse, pk_set, using):
+    """Narrow a pre_remove pk_set to the links that exist.
+
+    remove() reports every id it was given. post_remove receives the same
+    set, so after this it lists only what was really removed, which delta
+    updates rely on.
+    """
+    links, target = _links(sender, source, target, instance, reverse, using)
+    pk_set.intersection_update(links.filter(**{f'{target}__in': pk_set}).values_list(target, flat=True))
+
+
+@receiver(m2m_changed, sender=UserProfile.skills.through)
+def profile_skills_m2m_changed(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """Announce profile.skills changes as profile_skills_changed"""
+    if action == 'pre_remove':
+        _keep_linked(sender, 'userprofile_id', 'skill_id', instance, reverse, pk_set, using)
+        return
+    if action == 'pre_clear':
+        # Announced before the rows go, while they can still be read
+        links, target = _links(sender, 'userprofile_id', 'skill_id', instance, reverse, using)
+        action, pk_set = 'post_remove', set(links.values_list(target, flat=True))
+    if action in ('post_add', 'post_remove') and pk_set:
+        key = 'added' if action == 'post_add' else 'removed'
+        changes = {'added': frozenset(), 'removed': frozenset()}
+        if reverse:
+            # instance is a Skill and pk_set holds profile ids
+            changes[key] = frozenset([instance.pk])
+            for profile_id in pk_set:
+                profile_skills_changed.send(sender=UserProfile, profile_id=profile_id, using=using, **changes)
+        else:
+            changes[key] = frozenset(pk_set)
+            profile_skills_changed.send(sender=UserProfile, profile_id=instance.pk, using=using, **changes)
+
+
+@receiver(profile_skills_changed)
+def update_profile_frontier(sender, profile_id, added, removed, **kwargs):
+    """Keep cached suggestion frontiers in step with profile skills"""
+    frontier.update_frontier(profile_id, added=added, removed=removed)
+
+
+@receiver(post_delete, sender=UserProfile)
+def profile_deleted(sender, instance, **kwargs):
+    frontier.discard_frontier(instance.pk)
+
+
+@receiver(profile_skills_changed)
+def update_profile_career_scores(sender, profile_id, added, removed, using, **kwargs):
+    career_scores.apply_profile_delta(profile_id, added, removed, using)
+
+
+@receiver(m2m_changed, sender=Career.required_skills.through)
+def career_skills_changed(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """Keep materialized career scores in step with career requirements"""
+    if action == 'pre_remove':
+        _keep_linked(sender, 'career_id', 'skill_id', instance, reverse, pk_set, using)
+    elif action in ('post_add', 'post_remove') and pk_set:
+        key = 'added' if action == 'post_add' else 'removed'
+        if reverse:
+            # instance is a Skill and pk_set holds career ids
+            for career_id in pk_set:
+                career_scores.apply_career_delta(career_id, using=using, **{key: [instance.pk]})
+        else:
+            career_scores.apply_career_delta(instance.pk, using=using, **{key: pk_set})
+    elif action == 'pre_clear' and reverse:
+        links, target = _links(sender, 'career_id', 'skill_id', instance, reverse, using)
+        instance._cleared_careers = list(links.values_list(target, flat=True))
+    elif action == 'post_clear':
+        career_scores.refresh_careers(getattr(instance, '_cleared_careers', ()) if reverse else [instance.pk], using)
+
+
+@receiver(pre_delete, sender=Skill)
+def skill_deleting(sender, instance, using, **kwargs):
+    # Its requirement rows are cascade-deleted without m2m_changed
+    instance._cleared_careers = list(Career.required_skills.through.objects.using(using).filter(
+        skill_id=instance.pk).values_list('career_id', flat=True))
+
+
+@receiver(post_delete, sender=Skill)
+def skill_deleted(sender, instance, using, **kwargs):
+    career_scores.refresh_careers(getattr(instance, '_cleared_careers', ()), using)
+
+
+@receiver(post_migrate)
+def repair_search_triggers(sender, using, **kwargs):
+    """Put back FTS triggers dropped by SQLite table rebuilds during migrate"""
+    if sender.name == 'recommender':
+        search.install_fts(connections[using], repair=True)
@@ -0,0 +1,309 @@
+import hashlib
+import heapq
+import itertools
+import threading
+from array import array
+from collections.abc import Sequence
+from functools import cached_property
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Domain, Skill, Career
+from .sections import csr
+
+DIFFICULTY_ORDER = {'Beginner': 1, 'Intermediate': 2, 'Advanced': 3}
+
+SKILL_FIELDS = ['id', 'name', 'domain_id', 'description', 'difficulty_level']
+CAREER_FIELDS = ['id', 'title', 'domain_id', 'description', 'average_salary',
+                 'salary_min', 'salary_max', 'salary_currency']
+
+
+def _rows(rows):
+    # Sequences (e.g. lazily decoded snapshot rows) are kept as they are
+    return rows if isinstance(rows, Sequence) else list(rows)
+
+
+def _column(rows, k):
+    """Field k of every row; lazy row sequences can supply it without decoding whole rows"""
+    column = getattr(rows, 'column', None)
+    return column(k) if column else [row[k] for row in rows]
+
+
+class PrerequisiteCycleError(ValueError):
+    """Skill prerequisites loop back on themselves"""
+
+    def __init__(self, skill_names):
+        self.skill_names = skill_names
+        super().__init__("Prerequisite cycle: " + " -> ".join(skill_names))
+
+
+class SkillGraph:
+    """Read-only, integer-indexed snapshot of the skill/career catalog.
+
+    Skills, careers and domains are addressed by their position in the
+    snapshot (their "index") rather than by primary key. Prerequisites are
+    stored as adjacency lists, and required skills as sorted index arrays in
+    CSR form both ways (career -> skills, skill -> careers), so memory grows
+    with the number of edges and matching a user against the catalog walks
+    the postings of their skills with no database access. A user's skills
+    are a sorted tuple of skill indexes (see skill_set()).
+    """
+
+    def __init__(self, domains, skills, careers, prerequisites, required_skills, version=0, fingerprint=None):
+        self.version = version
+        self.built_at = timezone.now()
+        if fingerprint is not None:
+            # Known already, e.g. stored in a snapshot file
+            self.fingerprint = fingerprint
+
+        # Domains: rows of (id, name, description)
+        self.domain_rows = _rows(domains)
+        self.domain_ids = _column(self.domain_rows, 0)
+        self.domain_index = {pk: i for i, pk in enumerate(self.domain_ids)}
+
+        # Skills: rows of SKILL_FIELDS
+        self.skill_rows = _rows(skills)
+        self.skill_ids = _column(self.skill_rows, 0)
+        self.skill_index = {pk: i for i, pk in enumerate(self.skill_ids)}
+        self.skill_domain = [self.domain_index[pk] for pk in _column(self.skill_rows, 2)]
+        self.skill_difficulty = [DIFFICULTY_ORDER.get(level, 2) for level in _column(self.skill_rows, 4)]
+
+        # Careers: rows of CAREER_FIELDS
+        self.career_rows = _rows(careers)
+        self.career_ids = _column(self.career_rows, 0)
+        self.career_index = {pk: i for i, pk in enumerate(self.career_ids)}
+        self.career_domain = [self.domain_index[pk] for pk in _column(self.career_rows, 2)]
+
+        self.domain_skills = [[] for _ in self.domain_ids]
+        for i, d in enumerate(self.skill_domain):
+            self.domain_skills[d].append(i)
+        self.domain_careers = [[] for _ in self.domain_ids]
+        for i, d in enumerate(self.career_domain):
+            self.domain_careers[d].append(i)
+
+        # Edge lists as (skill_id, prereq_id) and (career_id, skill_id) pairs
+        self.prerequisite_edges = sorted(prerequisites)
+        self.required_edges = sorted(required_skills)
+
+        # prerequisites[i] lists the skills i depends on, dependents[i] the
+        # skills that depend on i.
+        self.prerequisites = [[] for _ in self.skill_ids]
+        self.dependents = [[] for _ in self.skill_ids]
+        for skill_id, prereq_id in self.prerequisite_edges:
+            s, p = self.skill_index[skill_id], self.skill_index[prereq_id]
+            self.prerequisites[s].append(p)
+            self.dependents[p].append(s)
+
+        # Career c requires the skills (ascending)
+        # career_skills[career_skill_offsets[c]:career_skill_offsets[c + 1]];
+        # inverted, the careers requiring skill s (ascending) are
+        # skill_careers[skill_career_offsets[s]:skill_career_offsets[s + 1]].
+        required = [[] for _ in self.career_ids]
+        postings = [[] for _ in self.skill_ids]
+        for career_id, skill_id in self.required_edges:
+            c, s = self.career_index[career_id], self.skill_index[skill_id]
+            required[c].append(s)
+            postings[s].append(c)
+        self.career_skill_offsets, self.career_skills = csr(sorted(skills) for skills in required)
+        self.skill_career_offsets, self.skill_careers = csr(sorted(careers) for careers in postings)
+        self.career_sizes = array('i', map(len, required))
+        self.skill_career_counts = array('i', map(len, postings))
+
+        # Skills with no prerequisites at all, per domain
+        self.domain_roots = [[i for i in skills if not self.prerequisites[i]] for skills in self.domain_skills]
+
+        # Transitive prerequisites as sorted index arrays, filled in on demand
+        self._closures = [None] * len(self.skill_ids)
+
+        self._domains = [None] * len(self.domain_ids)
+        self._skills = [None] * len(self.skill_ids)
+        self._careers = [None] * len(self.career_ids)
+
+    @cached_property
+    def career_salaries(self):
+        """``(salary_mins, salary_maxes, salary_currencies)`` by career index"""
+        rows = self.career_rows
+        return _column(rows, 5), _column(rows, 6), _column(rows, 7)
+
+    @classmethod
+    def build(cls, version=0, using='default'):
+        """Load the whole catalog with one query per table"""
+        domains = Domain.objects.using(using).order_by('id').values_list('id', 'name', 'description')
+        skills = Skill.objects.using(using).order_by('id').values_list(*SKILL_FIELDS)
+        careers = Career.objects.using(using).order_by('id').values_list(*CAREER_FIELDS)
+        prerequisites = Skill.prerequisites.through.objects.using(using).values_list('from_skill_id', 'to_skill_id')
+        required_skills = Career.required_skills.through.objects.using(using).values_list('career_id', 'skill_id')
+        return cls(domains, skills, careers, prerequisites, required_skills, version=version)
+
+    @cached_property
+    def fingerprint(self):
+        """Content hash of the catalog, stable across processes"""
+        digest = hashlib.blake2b(digest_size=16)
+        for rows in (self.domain_rows, self.skill_rows, self.career_rows,
+                     self.prerequisite_edges, self.required_edges):
+            for row in rows:
+                digest.update(repr(tuple(row)).encode())
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    # --- lookups ---
+    def domain_of(self, domain):
+        """Index of a Domain instance or primary key, or None if unknown"""
+        return self.domain_index.get(getattr(domain, 'pk', domain))
+
+    def skill_set(self, skills):
+        """Sorted tuple of the indexes of the given Skill instances or primary keys.
+
+        Unknown skills and duplicates are dropped, so equal skill sets give
+        equal tuples.
+        """
+        index = self.skill_index
+        found = {index.get(getattr(skill, 'pk', skill)) for skill in skills}
+        found.discard(None)
+        return tuple(sorted(found))
+
+    def skills_required_by(self, c):
+        """Indexes of the skills career c requires, ascending"""
+        return self.career_skills[self.career_skill_offsets[c]:self.career_skill_offsets[c + 1]]
+
+    def careers_requiring(self, i):
+        """Indexes of the careers requiring skill i, ascending"""
+        return self.skill_careers[self.skill_career_offsets[i]:self.skill_career_offsets[i + 1]]
+
+    # --- prerequisite planning ---
+    def prerequisite_closure(self, i):
+        """Indexes of every skill needed, directly or transitively, before skill i.
+
+        Results are memoized on the snapshot, which is rebuilt whenever the
+        prerequisite table changes, so each skill is walked at most once.
+        """
+        closures = self._closures
+        if closures[i] is not None:
+            return closures[i]
+
+        # Iterative post-order DFS; `active` tracks the current path so a
+        # back edge can be reported as a cycle.
+        active = {i: 0}
+        stack = [i]
+        while stack:
+            node = stack[-1]
+            pos = active[node]
+            prereqs = self.prerequisites[node]
+            if pos < len(prereqs):
+                active[node] = pos + 1
+                p = prereqs[pos]
+                if closures[p] is not None:
+                    continue
+                if p in active:
+                    path = stack[stack.index(p):] + [p]
+                    raise PrerequisiteCycleError([self.skill_rows[s][1] for s in path])
+                active[p] = 0
+                stack.append(p)
+            else:
+                needed = set(prereqs)
+                for p in prereqs:
+                    needed.update(closures[p])
+                closures[node] = array('i', sorted(needed))
+                del active[node]
+                stack.pop()
+        return closures[i]
+
+    def learning_order(self, targets, have=()):
+        """Topologically ordered skill indexes needed to reach the target skills.
+
+        Missing prerequisites of the targets are added, skills in ``have``
+        are skipped, and among skills that are ready at the same time easier
+        ones come first (then lower index).
+        """
+        needed = set(targets)
+        for i in targets:
+            needed.update(self.prerequisite_closure(i))
+        needed.difference_update(have)
+
+        pending = {i: sum(1 for p in self.prerequisites[i] if p in needed) for i in needed}
+        ready = [(self.skill_difficulty[i], i) for i in needed if not pending[i]]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, i = heapq.heappop(ready)
+            order.append(i)
+            for d in self.dependents[i]:
+                if d in pending:
+                    pending[d] -= 1
+                    if not pending[d]:
+                        heapq.heappush(ready, (self.skill_difficulty[d], d))
+        return order
+
+    # --- model instances ---
+    def domain(self, i):
+        obj = self._domains[i]
+        if obj is None:
+            obj = Domain.from_db('default', ['id', 'name', 'description'], self.domain_rows[i])
+            self._domains[i] = obj
+        return obj
+
+    def skill(self, i):
+        obj = self._skills[i]
+        if obj is None:
+            obj = Skill.from_db('default', SKILL_FIELDS, self.skill_rows[i])
+            obj.domain = self.domain(self.skill_domain[i])
+            self._skills[i] = obj
+        return obj
+
+    def career(self, i):
+        obj = self._careers[i]
+        if obj is None:
+            obj = Career.from_db('default', CAREER_FIELDS, self.career_rows[i])
+            obj.domain = self.domain(self.career_domain[i])
+            self._careers[i] = obj
+        return obj
+
+
+_lock = threading.Lock()
+_graph = None
+_counter = itertools.count(1)
+_version = 0
+
+
+def catalog_version():
+    """Counter bumped every time the catalog changes in this process"""
+    return _version
+
+
+def invalidate(**kwargs):
+    """Mark the current snapshot stale; usable directly as a signal receiver"""
+    global _version
+    # next() on a count is atomic under the GIL, so writers never block on
+    # (or lose an increment to) a rebuild in progress.
+    _version = next(_counter)
+
+
+def current_skill_graph():
+    """The process-wide SkillGraph if it is up to date, else None; never queries"""
+    graph = _graph
+    if graph is not None and graph.version == _version:
+        return graph
+    return None
+
+
+def get_skill_graph():
+    """Return the process-wide SkillGraph, rebuilding it if the catalog changed"""
+    global _graph
+    graph = _graph
+    if graph is not None and graph.version == _version:
+        return graph
+    with _lock:
+        if _graph is None or _graph.version != _version:
+            # Tag with the version seen before loading so a write that lands
+            # mid-build leaves the snapshot stale rather than silently current.
+            version = _version
+            snapshot_path = getattr(settings, 'RECOMMENDER_SNAPSHOT', None)
+            if _graph is None and version == 0 and snapshot_path:
+                # Fresh process: start from the mapped snapshot file; any
+                # later catalog write in this process reloads from the DB.
+                from .snapshot import Snapshot
+                _graph = Snapshot(snapshot_path).graph(version=version)
+            else:
+                _graph = SkillGraph.build(version=version)
+        return _graph
@@ -0,0 +1,201 @@
+"""Compact, memory-mappable binary snapshots of the catalog.
+
+Snapshots are section files (see recommender.sections) holding the arrays
+below. Entity columns hold indexes into a shared string table, and both
+M2M graphs are stored in CSR form (per-row offsets into a targets array of
+skill indexes), so loading a snapshot is an ``mmap`` plus a few
+``memoryview.cast`` calls: nothing is parsed until it is read.
+"""
+from array import array
+from collections.abc import Sequence
+
+from .sections import SectionFileError, csr, read_sections, write_sections
+from .skill_graph import SkillGraph
+
+MAGIC = b'SKGRAPH3'
+OLD_MAGICS = {b'SKGRAPH1', b'SKGRAPH2'}
+NULL = -1  # string index for a NULL column, or a NULL salary
+
+SECTIONS = [
+    # SkillGraph.fingerprint of the exported graph, as ASCII hex
+    ('fingerprint', 'B'),
+    ('domain_ids', 'q'), ('domain_names', 'i'), ('domain_descriptions', 'i'),
+    ('skill_ids', 'q'), ('skill_domains', 'i'), ('skill_names', 'i'),
+    ('skill_descriptions', 'i'), ('skill_levels', 'i'),
+    ('career_ids', 'q'), ('career_domains', 'i'), ('career_titles', 'i'),
+    ('career_descriptions', 'i'), ('career_salaries', 'i'),
+    ('career_salary_mins', 'q'), ('career_salary_maxes', 'q'), ('career_currencies', 'i'),
+    ('prerequisite_offsets', 'q'), ('prerequisite_targets', 'i'),
+    ('required_offsets', 'q'), ('required_targets', 'i'),
+    ('string_offsets', 'q'), ('string_data', 'B'),
+]
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def write_snapshot(graph, path):
+    """Serialize a SkillGraph to `path`, replacing it atomically"""
+    strings = {}
+    offsets, data = array('q', [0]), bytearray()
+
+    def intern(value):
+        if value is None:
+            return NULL
+        if value not in strings:
+            strings[value] = len(strings)
+            data.extend(value.encode('utf-8'))
+            offsets.append(len(data))
+        return strings[value]
+
+    def column(rows, field):
+        return array('i', (intern(row[field]) for row in rows))
+
+    prerequisite_offsets, prerequisite_targets = csr(graph.prerequisites)
+    sections = {
+        'fingerprint': array('B', graph.fingerprint.encode('ascii')),
+        'domain_ids': array('q', graph.domain_ids),
+        'domain_names': column(graph.domain_rows, 1),
+        'domain_descriptions': column(graph.domain_rows, 2),
+        'skill_ids': array('q', graph.skill_ids),
+        'skill_domains': array('i', graph.skill_domain),
+        'skill_names': column(graph.skill_rows, 1),
+        'skill_descriptions': column(graph.skill_rows, 3),
+        'skill_levels': column(graph.skill_rows, 4),
+        'career_ids': array('q', graph.career_ids),
+        'career_domains': array('i', graph.career_domain),
+        'career_titles': column(graph.career_rows, 1),
+        'career_descriptions': column(graph.career_rows, 3),
+        'career_salaries': column(graph.career_rows, 4),
+        'career_salary_mins': array('q', (NULL if row[5] is None else row[5] for row in graph.career_rows)),
+        'career_salary_maxes': array('q', (NULL if row[6] is None else row[6] for row in graph.career_rows)),
+        'career_currencies': column(graph.career_rows, 7),
+        'prerequisite_offsets': prerequisite_offsets,
+        'prerequisite_targets': prerequisite_targets,
+        'required_offsets': graph.career_skill_offsets,
+        'required_targets': graph.career_skills,
+        'string_offsets': offsets,
+        'string_data': array('B', data),
+    }
+    write_sections(path, MAGIC, SECTIONS, sections)
+
+
+class Snapshot:
+    """A snapshot file mapped into memory, exposing each section as an array"""
+
+    def __init__(self, path):
+        try:
+            sections = read_sections(path, MAGIC, SECTIONS)
+        except SectionFileError as e:
+            if e.magic in OLD_MAGICS:
+                raise SnapshotError(f"{path} is an older snapshot format; export it again") from None
+            raise SnapshotError(f"{path} is not a catalog snapshot") from None
+        for name, section in sections.items():
+            setattr(self, name, section)
+
+    def string(self, i):
+        if i == NULL:
+            return None
+        return bytes(self.string_data[self.string_offsets[i]:self.string_offsets[i + 1]]).decode('utf-8')
+
+    def strings(self, column):
+        """Decode a string column, decoding each distinct string once"""
+        cache = {}
+        return [cache[i] if i in cache else cache.setdefault(i, self.string(i)) for i in column]
+
+    def _edges(self, ids, offsets, targets):
+        skill_ids = self.skill_ids
+        for i, source in enumerate(ids):
+            for k in range(offsets[i], offsets[i + 1]):
+                yield source, skill_ids[targets[k]]
+
+    def graph(self, version=0):
+        """Build a SkillGraph whose rows decode strings only when read"""
+        string = self.string
+        domain_ids, skill_ids, career_ids = self.domain_ids, self.skill_ids, self.career_ids
+        domains = _Rows(len(domain_ids), lambda i: (
+            domain_ids[i], string(self.domain_names[i]), string(self.domain_descriptions[i])),
+            {0: lambda: list(domain_ids)})
+        skills = _Rows(len(skill_ids), lambda i: (
+            skill_ids[i], string(self.skill_names[i]), domain_ids[self.skill_domains[i]],
+            string(self.skill_descriptions[i]), string(self.skill_levels[i])),
+            {0: lambda: list(skill_ids),
+             2: lambda: [domain_ids[d] for d in self.skill_domains],
+             4: lambda: self.strings(self.skill_levels)})
+        careers = _Rows(len(career_ids), lambda i: (
+            career_ids[i], string(self.career_titles[i]), domain_ids[self.career_domains[i]],
+            string(self.career_descriptions[i]), string(self.career_salaries[i]),
+            _salary(self.career_salary_mins[i]), _salary(self.career_salary_maxes[i]),
+            string(self.career_currencies[i])),
+            {0: lambda: list(career_ids),
+             2: lambda: [domain_ids[d] for d in self.career_domains],
+             5: lambda: [_salary(value) for value in self.career_salary_mins],
+             6: lambda: [_salary(value) for value in self.career_salary_maxes],
+             7: lambda: self.strings(self.career_currencies)})
+        return SkillGraph(
+            domains, skills, careers,
+            self._edges(skill_ids, self.prerequisite_offsets, self.prerequisite_targets),
+            self._edges(career_ids, self.required_offsets, self.required_targets),
+            version=version,
+            # Hashing the rows would decode every string in the file
+            fingerprint=bytes(self.fingerprint).decode('ascii'),
+        )
+
+
+def _salary(value):
+    return None if value == NULL else value
+
+
+class _Rows(Sequence):
+    """Read-only row sequence materialized one row at a time.
+
+    ``columns`` maps field positions to callables returning that field for
+    every row, so SkillGraph can index ids without decoding any strings.
+    """
+
+    def __init__(self, length, row, columns):
+        self._length = length
+        self._row = row
+        self._columns = columns
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._row(k) for k in range(*i.indices(self._length))]
+        if not -self._length <= i < self._length:
+            raise IndexError(i)
+        return self._row(i % self._length)
+
+    def column(self, k):
+        if k in self._columns:
+            return self._columns[k]()
+        return [row[k] for row in self]
+
+
+def snapshot_to_catalog(graph):
+    """Catalog dict (see recommender.catalog) describing a SkillGraph"""
+    domain_names = [row[1] for row in graph.domain_rows]
+
+    def ref(source_domain, s):
+        name = graph.skill_rows[s][1]
+        d = graph.skill_domain[s]
+        return name if d == source_domain else f"{domain_names[d]}::{name}"
+
+    return {
+        'domains': [{'name': name, 'description': description} for _, name, description in graph.domain_rows],
+        'skills': [
+            {'domain': domain_names[graph.skill_domain[i]], 'name': row[1], 'description': row[3],
+             'difficulty_level': row[4],
+             'prerequisites': [ref(graph.skill_domain[i], p) for p in graph.prerequisites[i]]}
+            for i, row in enumerate(graph.skill_rows)
+        ],
+        'careers': [
+            {'domain': domain_names[graph.career_domain[c]], 'title': row[1], 'description': row[3],
+             'average_salary': row[4], 'salary_min': row[5], 'salary_max': row[6], 'salary_currency': row[7],
+             'required_skills': [ref(graph.career_domain[c], s) for s in graph.skills_required_by(c)]}
+            for c, row in enumerate(graph.career_rows)
+        ],
+    }
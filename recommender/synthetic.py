@@ -0,0 +1,133 @@
+"""Seeded synthetic catalogs and users for load and scale testing.
+
+generate_catalog() returns a catalog dict in the recommender.catalog format,
+so it loads through load_catalog like any hand-written catalog. Each
+domain's skills are split into ``depth`` prerequisite layers: skills in
+layer L depend on at least one skill in layer L-1, so the longest
+prerequisite chain has exactly ``depth`` skills, and difficulty grows with
+the layer. Careers draw their required skills from their own domain with a
+long-tailed popularity (a few skills are required everywhere, most rarely),
+plus an occasional skill from another domain.
+
+The same arguments and seed always produce the same catalog and users.
+"""
+import random
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .catalog import BATCH_SIZE, REF_SEPARATOR
+from .models import Domain, UserProfile
+from .skill_graph import get_skill_graph
+from . import career_scores
+
+
+def _layer_difficulty(layer, depth):
+    third = layer * 3 // depth
+    return ['Beginner', 'Intermediate', 'Advanced'][third]
+
+
+def _weighted_sample(rng, population, weights, k):
+    """k distinct items, each drawn with probability proportional to its weight"""
+    # Efraimidis-Spirakis: keep the k largest u ** (1 / w)
+    keyed = sorted(((rng.random() ** (1 / w), item) for item, w in zip(population, weights)), reverse=True)
+    return [item for _, item in keyed[:k]]
+
+
+def generate_catalog(domains=4, skills=200, careers=50, depth=4, max_prerequisites=3,
+                     skills_per_career=8, cross_domain=0.1, seed=0):
+    """Catalog dict with `skills` and `careers` spread evenly over `domains`"""
+    rng = random.Random(seed)
+    depth = max(1, depth)
+    catalog = {'domains': [], 'skills': [], 'careers': []}
+    domain_skills = []
+
+    for d in range(domains):
+        domain = f"Domain {d + 1}"
+        catalog['domains'].append({'name': domain, 'description': f"Synthetic domain {d + 1}"})
+        count = skills // domains + (d < skills % domains)
+        layers = [[] for _ in range(min(depth, count))]
+        names = []
+        for i in range(count):
+            layer = i * len(layers) // count
+            name = f"Skill {d + 1}.{i + 1}"
+            prerequisites = []
+            if layer:
+                prerequisites.append(rng.choice(layers[layer - 1]))
+                earlier = [n for lower in layers[:layer] for n in lower]
+                extra = rng.randint(0, max_prerequisites - 1)
+                prerequisites += rng.sample(earlier, min(extra, len(earlier)))
+            catalog['skills'].append({
+                'domain': domain,
+                'name': name,
+                'description': f"Synthetic skill {d + 1}.{i + 1}",
+                'difficulty_level': _layer_difficulty(layer, len(layers)),
+                'prerequisites': sorted(set(prerequisites)),
+            })
+            layers[layer].append(name)
+            names.append(name)
+        domain_skills.append((domain, names))
+
+    for c in range(careers):
+        d = c % domains
+        domain, names = domain_skills[d]
+        if not names:
+            continue
+        # Zipf-like popularity: the r-th skill of a domain has weight 1 / r
+        weights = [1 / (r + 1) for r in range(len(names))]
+        required = _weighted_sample(rng, names, weights, min(skills_per_career, len(names)))
+        others = [other for other in domain_skills if other[0] != domain and other[1]]
+        if others and rng.random() < cross_domain:
+            other_domain, other_names = rng.choice(others)
+            required.append(f"{other_domain}{REF_SEPARATOR}{rng.choice(other_names)}")
+        catalog['careers'].append({
+            'domain': domain,
+            'title': f"Career {d + 1}.{c // domains + 1}",
+            'description': f"Synthetic career {c + 1}",
+            'average_salary': f"${rng.randrange(40, 200, 5)},000",
+            'required_skills': required,
+        })
+    return catalog
+
+
+def create_users(count, skills_per_user=5, seed=0, prefix='synthetic'):
+    """Bulk-create `count` users with profiles in random loaded domains.
+
+    Each profile holds `skills_per_user` skills of its domain together with
+    all of their prerequisites, the way a real learner's skills cluster.
+    Returns the created UserProfiles.
+    """
+    rng = random.Random(seed)
+    graph = get_skill_graph()
+    domains = [d for d in range(len(graph.domain_ids)) if graph.domain_skills[d]]
+    if not domains:
+        return []
+
+    with transaction.atomic():
+        start = User.objects.filter(username__startswith=f"{prefix}-").count()
+        users = User.objects.bulk_create(
+            (User(username=f"{prefix}-{start + n + 1}", password='!') for n in range(count)),
+            batch_size=BATCH_SIZE,
+        )
+        if not users or users[0].pk is None:
+            users = list(User.objects.filter(username__in=[u.username for u in users]).order_by('pk'))
+        profiles = UserProfile.objects.bulk_create(
+            (UserProfile(user=user, domain=Domain(pk=graph.domain_ids[rng.choice(domains)])) for user in users),
+            batch_size=BATCH_SIZE,
+        )
+        if profiles and profiles[0].pk is None:
+            profiles = list(UserProfile.objects.filter(user__in=users).order_by('user_id'))
+
+        through = UserProfile.skills.through
+        edges = []
+        for profile in profiles:
+            candidates = graph.domain_skills[graph.domain_of(profile.domain_id)]
+            held = set()
+            for i in rng.sample(candidates, min(skills_per_user, len(candidates))):
+                held.add(i)
+                held.update(graph.prerequisite_closure(i))
+            edges.extend(through(userprofile_id=profile.pk, skill_id=graph.skill_ids[i]) for i in sorted(held))
+        through.objects.bulk_create(edges, batch_size=BATCH_SIZE)
+        # The through-table writes send no m2m_changed
+        career_scores.refresh_profiles([profile.pk for profile in profiles])
+    return profiles
@@ -1,3 +1,1355 @@
-from django.test import TestCase
+import importlib
+import os
+import random
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .catalog import CatalogError, load_catalog, read_catalog
+from .instrumentation import registry
+from .profiles import profile_skills_changed, set_profile_skills, update_profile_skills
+from .models import Domain, Skill, Career, UserCareerScore, UserProfile, LearningPath, PathStep
+from .recommendation_engine import RecommendationEngine
+from .salary import parse_salary
+from .scoring import ScoringModel, match_counts, scoring_model
+from .snapshot import Snapshot, SnapshotError
+from .synthetic import create_users, generate_catalog
+from . import admin as recommender_admin, career_scores, collaborative, frontier, result_cache, search, skill_graph
+from . import recommendation_engine, views
+
+SAMPLE_CATALOG = os.path.join(os.path.dirname(__file__), 'catalogs', 'sample_catalog.json')
+
+
+class CatalogTestCase(TestCase):
+    """Small web-development catalog shared by the engine tests"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.web = Domain.objects.create(name="Web Development")
+        cls.cloud = Domain.objects.create(name="Cloud Computing")
+        cls.html = Skill.objects.create(name="HTML", domain=cls.web)
+        cls.css = Skill.objects.create(name="CSS", domain=cls.web)
+        cls.js = Skill.objects.create(name="JavaScript", domain=cls.web, difficulty_level="Intermediate")
+        cls.js.prerequisites.add(cls.html, cls.css)
+        cls.react = Skill.objects.create(name="React.js", domain=cls.web, difficulty_level="Intermediate")
+        cls.react.prerequisites.add(cls.js)
+        cls.node = Skill.objects.create(name="Node.js", domain=cls.web, difficulty_level="Intermediate")
+        cls.node.prerequisites.add(cls.js)
+        cls.linux = Skill.objects.create(name="Linux Basics", domain=cls.cloud)
+
+        cls.frontend = Career.objects.create(title="Frontend Developer", domain=cls.web,
+                                             average_salary="$70,000 - $120,000")
+        cls.frontend.required_skills.add(cls.html, cls.css, cls.js, cls.react)
+        cls.backend = Career.objects.create(title="Backend Developer", domain=cls.web)
+        cls.backend.required_skills.add(cls.js, cls.node)
+
+    def setUp(self):
+        # Rolled-back test transactions don't fire signals, so start every
+        # test from a fresh snapshot.
+        skill_graph.invalidate()
+
+
+class SkillGraphTests(CatalogTestCase):
+
+    def test_snapshot_is_reused_until_catalog_changes(self):
+        graph = skill_graph.get_skill_graph()
+        with self.assertNumQueries(0):
+            self.assertIs(skill_graph.get_skill_graph(), graph)
+
+        Skill.objects.create(name="TypeScript", domain=self.web)
+        self.assertIsNot(skill_graph.get_skill_graph(), graph)
+
+    def test_m2m_change_rebuilds_snapshot(self):
+        graph = skill_graph.get_skill_graph()
+        self.backend.required_skills.add(self.html)
+        rebuilt = skill_graph.get_skill_graph()
+        self.assertIsNot(rebuilt, graph)
+        self.assertEqual(rebuilt.career_sizes[rebuilt.career_index[self.backend.pk]], 3)
+
+    def test_instances_need_no_queries(self):
+        graph = skill_graph.get_skill_graph()
+        with self.assertNumQueries(0):
+            career = graph.career(graph.career_index[self.frontend.pk])
+            self.assertEqual(str(career), "Frontend Developer - Web Development")
+            self.assertEqual(career, self.frontend)
+
+    def test_match_counts_agree_with_set_intersection(self):
+        graph = skill_graph.get_skill_graph()
+        user = [self.html, self.js, self.node, self.linux]
+        counts = match_counts(graph, graph.skill_set(user))
+        for career in Career.objects.all():
+            expected = len(set(career.required_skills.all()) & set(user))
+            self.assertEqual(counts[graph.career_index[career.pk]], expected)
+
+
+class RecommendationEngineTests(CatalogTestCase):
+
+    def test_get_matching_careers(self):
+        skill_graph.get_skill_graph()
+        with self.assertNumQueries(0):
+            results = RecommendationEngine.get_matching_careers(self.web, [self.html, self.css, self.js])
+        self.assertEqual([r['career'] for r in results], [self.frontend, self.backend])
+        self.assertEqual(results[0]['score'], 0.75)
+        self.assertEqual((results[0]['matching_skills'], results[0]['total_required']), (3, 4))
+        self.assertEqual(results[1]['score'], 0.5)
+
+    def test_limit_min_score_and_tie_breaks(self):
+        fullstack = Career.objects.create(title="Full Stack Developer", domain=self.web)
+        fullstack.required_skills.add(self.html, self.css, self.js, self.react, self.node, self.linux)
+        empty = Career.objects.create(title="Webmaster", domain=self.web)
+        user = [self.js]
+
+        # Backend (1/2) beats frontend and full stack; frontend (1/4) and
+        # full stack (1/6) are then ordered by score, the empty career last.
+        ranked = RecommendationEngine.get_matching_careers(self.web, user)
+        self.assertEqual([r['career'] for r in ranked], [self.backend, self.frontend, fullstack, empty])
+        self.assertEqual(
+            [r['career'] for r in RecommendationEngine.get_matching_careers(self.web, user, limit=2)],
+            [self.backend, self.frontend],
+        )
+        self.assertEqual(
+            [r['career'] for r in RecommendationEngine.get_matching_careers(self.web, user, min_score=0.2)],
+            [self.backend, self.frontend],
+        )
+        self.assertEqual(list(RecommendationEngine.iter_matching_careers(self.web, user)), ranked)
+
+        # Equal scores: more matching skills first, then lower id
+        tie = RecommendationEngine.get_matching_careers(self.web, [self.html, self.css, self.js, self.react, self.node])
+        self.assertEqual([r['career'] for r in tie[:2]], [self.frontend, self.backend])
+
+    def test_get_suggested_skills(self):
+        self.assertEqual(RecommendationEngine.get_suggested_skills(self.web, []), [self.html, self.css])
+        self.assertEqual(
+            RecommendationEngine.get_suggested_skills(self.web, [self.html, self.css, self.js]),
+            [self.react, self.node],
+        )
+
+    def test_batch_matches_single_user_scoring(self):
+        skills_by_user = [[self.html, self.css], [self.js, self.node], [], [self.linux]]
+        for i, skills in enumerate(skills_by_user):
+            user = User.objects.create_user(username=f"user{i}")
+            profile = UserProfile.objects.create(user=user, domain=self.web if i < 3 else None)
+            profile.skills.set(skills)
+        skill_graph.get_skill_graph()
+
+        profiles = UserProfile.objects.order_by('id')
+        # One query for the profiles plus one skills query per chunk
+        with self.assertNumQueries(3):
+            chunks = list(RecommendationEngine.get_matching_careers_batch(profiles, chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2])
+
+        for (profile, results), skills in zip([pair for chunk in chunks for pair in chunk], skills_by_user):
+            expected = RecommendationEngine.get_matching_careers(profile.domain_id, skills) if profile.domain_id else []
+            self.assertEqual(results, expected)
+
+    def test_suggestions_rank_by_careers_unlocked(self):
+        known = [self.html, self.css, self.js]
+        self.assertEqual(
+            RecommendationEngine.get_suggested_skills(self.web, known, rank='careers'),
+            [self.react, self.node],
+        )
+        self.backend.required_skills.add(self.react)
+        self.assertEqual(RecommendationEngine.get_suggested_skills(self.web, known, limit=1, rank='careers'), [self.react])
+        Career.objects.create(title="API Developer", domain=self.web).required_skills.add(self.node)
+        Career.objects.create(title="Node Developer", domain=self.web).required_skills.add(self.node)
+        self.assertEqual(RecommendationEngine.get_suggested_skills(self.web, known, limit=1, rank='careers'), [self.node])
+
+    def test_profile_suggestions_follow_skill_changes(self):
+        profile = UserProfile.objects.create(user=User.objects.create_user(username="explorer"), domain=self.web)
+        self.assertEqual(RecommendationEngine.get_profile_suggestions(profile), [self.html, self.css])
+
+        profile.skills.add(self.html, self.css)
+        with self.assertNumQueries(0):
+            self.assertEqual(RecommendationEngine.get_profile_suggestions(profile), [self.js])
+        profile.skills.add(self.js)
+        self.assertEqual(RecommendationEngine.get_profile_suggestions(profile), [self.react, self.node])
+        self.css.users_with_skill.remove(profile)
+        self.assertEqual(RecommendationEngine.get_profile_suggestions(profile), [self.css, self.react, self.node])
+        profile.skills.clear()
+        self.assertEqual(RecommendationEngine.get_profile_suggestions(profile), [self.html, self.css])
+
+
+
+class ProfileSkillsTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="updater")
+        self.profile = UserProfile.objects.create(user=self.user, domain=self.web)
+        self.events = []
+        receiver = lambda profile_id, added, removed, **kwargs: self.events.append((profile_id, added, removed))
+        profile_skills_changed.connect(receiver, weak=False)
+        self.addCleanup(profile_skills_changed.disconnect, receiver)
+
+    def held(self):
+        return set(self.profile.skills.values_list('name', flat=True))
+
+    def test_applies_only_the_difference(self):
+        self.profile.skills.add(self.html, self.css)
+        self.events.clear()
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            added, removed = set_profile_skills(self.profile, names=["CSS", "JavaScript", "Linux Basics", "Cobol"],
+                                                domain=self.web)
+        self.assertEqual((added, removed), ({self.js.pk}, {self.html.pk}))
+        self.assertEqual(self.held(), {"CSS", "JavaScript"})
+        # lock, resolve, current rows, delete, insert, plus the savepoint
+        self.assertLessEqual(len(queries), 7)
+        self.assertEqual(self.events, [(self.profile.pk, frozenset([self.js.pk]), frozenset([self.html.pk]))])
+
+        self.events.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(set_profile_skills(self.profile, [self.css.pk, self.js.pk]), (set(), set()))
+        self.assertEqual(self.events, [])
+
+    def test_update_adds_and_removes(self):
+        self.profile.skills.add(self.html)
+        with self.captureOnCommitCallbacks(execute=True):
+            added, removed = update_profile_skills(self.profile, add=[self.html.pk, self.css.pk, 9999],
+                                                   remove=[self.html.pk, self.node.pk])
+        self.assertEqual((added, removed), ({self.css.pk}, {self.html.pk}))
+        self.assertEqual(self.held(), {"CSS"})
+
+    def test_frontiers_follow_bulk_updates(self):
+        self.assertEqual(RecommendationEngine.get_profile_suggestions(self.profile), [self.html, self.css])
+        with self.captureOnCommitCallbacks(execute=True):
+            set_profile_skills(self.profile, [self.html.pk, self.css.pk, self.js.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(RecommendationEngine.get_profile_suggestions(self.profile), [self.react, self.node])
+        with self.captureOnCommitCallbacks(execute=True):
+            set_profile_skills(self.profile, [self.html.pk])
+        self.assertEqual(RecommendationEngine.get_profile_suggestions(self.profile), [self.css])
+
+    def test_deleting_a_profile_drops_its_frontier(self):
+        RecommendationEngine.get_profile_suggestions(self.profile)
+        self.assertIn(self.profile.pk, frontier._frontiers)
+        profile_id = self.profile.pk
+        self.profile.delete()
+        self.assertNotIn(profile_id, frontier._frontiers)
+
+    def test_nothing_is_announced_when_rolled_back(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    set_profile_skills(self.profile, [self.html.pk])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual((self.held(), self.events), (set(), []))
+
+    def test_m2m_changes_are_announced_too(self):
+        self.profile.skills.add(self.html, self.css)
+        self.css.users_with_skill.remove(self.profile)
+        self.assertEqual(self.events, [
+            (self.profile.pk, frozenset([self.html.pk, self.css.pk]), frozenset()),
+            (self.profile.pk, frozenset(), frozenset([self.css.pk])),
+        ])
+
+class LearningPathTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="learner")
+        profile = UserProfile.objects.create(user=self.user, domain=self.web)
+        profile.skills.add(self.html)
+        skill_graph.get_skill_graph()
+
+    def test_generate_learning_path(self):
+        # Profile skills, path insert, one bulk insert for the steps and the
+        # SAVEPOINT/RELEASE pair atomic() issues inside the test transaction
+        with self.assertNumQueries(5):
+            path = RecommendationEngine.generate_learning_path(self.user, self.frontend)
+        self.assertEqual(path.career, self.frontend)
+        self.assertEqual(
+            [(step.step_order, step.skill) for step in path.steps.all()],
+            [(1, self.css), (2, self.js), (3, self.react)],
+        )
+
+    def test_plan_adds_missing_prerequisites_in_topological_order(self):
+        # Backend only lists JavaScript and Node.js; CSS is a missing
+        # prerequisite of JavaScript and HTML is already known.
+        self.assertEqual(
+            RecommendationEngine.plan_learning_path(self.backend, [self.html]),
+            [self.css, self.js, self.node],
+        )
+        graph = skill_graph.get_skill_graph()
+        self.assertEqual(
+            tuple(graph.prerequisite_closure(graph.skill_index[self.react.pk])),
+            graph.skill_set([self.html, self.css, self.js]),
+        )
+
+    def test_prerequisite_cycle_is_reported(self):
+        self.html.prerequisites.add(self.react)
+        with self.assertRaisesMessage(skill_graph.PrerequisiteCycleError, "React.js"):
+            RecommendationEngine.plan_learning_path(self.frontend, [])
+
+    def test_reuse_existing_path(self):
+        first = RecommendationEngine.generate_learning_path(self.user, self.frontend, reuse_existing=True)
+        again = RecommendationEngine.generate_learning_path(self.user, self.frontend, reuse_existing=True)
+        self.assertEqual(again, first)
+        self.assertEqual(LearningPath.objects.count(), 1)
+
+        self.user.profile.skills.add(self.css)
+        changed = RecommendationEngine.generate_learning_path(self.user, self.frontend, reuse_existing=True)
+        self.assertNotEqual(changed, first)
+        self.assertEqual([step.skill for step in changed.steps.all()], [self.js, self.react])
+
+
+class ApiTests(CatalogTestCase):
+
+    def get(self, name, pk, **params):
+        return self.client.get(reverse(f'recommender:{name}', args=[pk]), params)
+
+    def test_career_matches(self):
+        skills = f"{self.html.pk},{self.css.pk},{self.js.pk}"
+        self.get('career-matches', self.web.pk, skills=skills)  # warm the snapshot
+        with self.assertNumQueries(0):
+            response = self.get('career-matches', self.web.pk, skills=skills, page_size=1)
+        data = response.json()
+        self.assertEqual((data['count'], data['num_pages']), (2, 2))
+        self.assertEqual(data['results'][0]['title'], "Frontend Developer")
+        self.assertEqual(data['results'][0]['score'], 0.75)
+
+        second = self.get('career-matches', self.web.pk, skills=skills, page_size=1, page=2).json()
+        self.assertEqual(second['results'][0]['title'], "Backend Developer")
+
+    def test_cold_snapshot_query_budget(self):
+        # One query per catalog table to build the snapshot, nothing per row
+        with self.assertNumQueries(5):
+            self.get('suggested-skills', self.web.pk, skills=self.html.pk)
+
+    def test_suggested_skills_and_learning_path(self):
+        data = self.get('suggested-skills', self.web.pk, skills=f"{self.html.pk},{self.css.pk}").json()
+        self.assertEqual([s['name'] for s in data['results']], ["JavaScript"])
+
+        with self.assertNumQueries(0):
+            data = self.get('learning-path', self.backend.pk, skills=self.html.pk).json()
+        self.assertEqual(data['career']['title'], "Backend Developer")
+        self.assertEqual([(s['step_order'], s['name']) for s in data['results']],
+                         [(1, "CSS"), (2, "JavaScript"), (3, "Node.js")])
+
+    def test_etag_revalidation(self):
+        response = self.get('career-matches', self.web.pk, skills=self.js.pk)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        again = self.client.get(reverse('recommender:career-matches', args=[self.web.pk]),
+                                {'skills': self.js.pk}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+
+        self.backend.required_skills.add(self.html)
+        changed = self.client.get(reverse('recommender:career-matches', args=[self.web.pk]),
+                                  {'skills': self.js.pk}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+
+    def test_errors(self):
+        self.assertEqual(self.get('career-matches', 9999).status_code, 404)
+        self.assertEqual(self.get('learning-path', 9999).status_code, 404)
+        self.assertEqual(self.get('career-matches', self.web.pk, skills="a,b").status_code, 400)
+        self.assertEqual(self.get('career-matches', self.web.pk, page=5).status_code, 404)
+
+    def test_prerequisite_cycle_is_a_conflict(self):
+        self.html.prerequisites.add(self.js)
+        response = self.get('learning-path', self.frontend.pk)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("Prerequisite cycle", response.json()['error'])
+
+    async def test_async_endpoints_match_sync(self):
+        for name, pk in [('career-matches', self.web.pk), ('suggested-skills', self.web.pk),
+                         ('learning-path', self.frontend.pk)]:
+            params = {'skills': f"{self.html.pk},{self.js.pk}"}
+            expected = await sync_to_async(self.get)(name, pk, **params)
+            response = await self.async_client.get(reverse(f'recommender:{name}-async', args=[pk]), params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), expected.json())
+            self.assertTrue(response.has_header('ETag'))
+
+    async def test_async_views_use_the_warmed_graph(self):
+        await sync_to_async(lambda: skill_graph.get_skill_graph().fingerprint)()
+        # Another lookup on the event loop could rebuild the graph there
+        unexpected = mock.Mock(side_effect=AssertionError("graph fetched twice"))
+        with mock.patch.object(views, 'get_skill_graph', unexpected), \
+                mock.patch.object(recommendation_engine, 'get_skill_graph', unexpected):
+            for name, pk in [('career-matches', self.web.pk), ('suggested-skills', self.web.pk),
+                             ('learning-path', self.frontend.pk)]:
+                response = await self.async_client.get(
+                    reverse(f'recommender:{name}-async', args=[pk]), {'skills': self.html.pk, 'explain': 1})
+                self.assertEqual(response.status_code, 200)
+        unexpected.assert_not_called()
+
+
+class AsyncSnapshotTests(TransactionTestCase):
+
+    def test_stale_snapshot_is_built_in_worker_thread(self):
+        web = Domain.objects.create(name="Web Development")
+        Career.objects.create(title="Webmaster", domain=web)
+        skill_graph.invalidate()
+
+        built_in = []
+        build = skill_graph.SkillGraph.build
+
+        def spy(*args, **kwargs):
+            built_in.append(threading.current_thread().name)
+            return build(*args, **kwargs)
+
+        with mock.patch.object(skill_graph.SkillGraph, 'build', side_effect=spy):
+            response = async_to_sync(self.async_client.get)(
+                reverse('recommender:career-matches-async', args=[web.pk]))
+        self.assertEqual(response.json()['results'][0]['title'], "Webmaster")
+        self.assertEqual(len(built_in), 1)
+        self.assertTrue(built_in[0].startswith('recommender'))
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'results': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                            'LOCATION': 'recommender_test_results'}},
+        RECOMMENDER_RESULT_CACHE_BACKEND='results', RECOMMENDER_RESULT_CACHE_SIZE=0)
+    def test_database_result_cache_from_async_view(self):
+        call_command('createcachetable', database='default')
+        web = Domain.objects.create(name="Web Development")
+        Career.objects.create(title="Webmaster", domain=web)
+        skill_graph.invalidate()
+        url = reverse('recommender:career-matches-async', args=[web.pk])
+        backend = result_cache.result_cache().backend
+        on_loop = []
+
+        def spy(method):
+            def call(*args, **kwargs):
+                on_loop.append(result_cache._on_event_loop())
+                return method(*args, **kwargs)
+            return call
+
+        with mock.patch.object(backend, 'get', spy(backend.get)), mock.patch.object(backend, 'set', spy(backend.set)):
+            first = async_to_sync(self.async_client.get)(url)
+            second = async_to_sync(self.async_client.get)(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        stats = result_cache.result_cache().stats()
+        self.assertEqual((stats['misses'], stats['backend_hits']), (1, 1))
+        # get, set, get: none of them waited on the event loop
+        self.assertEqual(on_loop, [False, False, False])
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'results': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        RECOMMENDER_RESULT_CACHE_BACKEND='results', RECOMMENDER_RESULT_CACHE_SIZE=0)
+    def test_backend_is_not_read_on_the_event_loop(self):
+        web = Domain.objects.create(name="Web Development")
+        Career.objects.create(title="Webmaster", domain=web)
+        skill_graph.get_skill_graph()
+        backend = result_cache.result_cache().backend
+
+        async def lookup():
+            return RecommendationEngine.get_matching_careers(web.pk, [])
+
+        with mock.patch.object(backend, 'get', side_effect=AssertionError("read on the loop")):
+            results = async_to_sync(lookup)()
+        self.assertEqual([r['career'].title for r in results], ["Webmaster"])
+
+
+class CatalogLoaderTests(TestCase):
+
+    def test_sample_catalog_loads_and_reloads_as_noop(self):
+        stats = load_catalog(read_catalog(SAMPLE_CATALOG))
+        self.assertEqual((stats['domains_created'], stats['skills_created'], stats['careers_created']), (4, 22, 9))
+        frontend = Career.objects.get(title="Frontend Developer")
+        self.assertEqual(sorted(frontend.required_skills.values_list('name', flat=True)),
+                         ["CSS", "HTML", "JavaScript", "React.js"])
+        self.assertEqual(sorted(Skill.objects.get(name="Pandas").prerequisites.values_list('name', flat=True)),
+                         ["NumPy", "Python Programming"])
+
+        version = skill_graph.catalog_version()
+        with CaptureQueriesContext(connection) as queries:
+            stats = load_catalog(read_catalog(SAMPLE_CATALOG))
+        self.assertFalse(any(stats.values()))
+        self.assertFalse([q['sql'] for q in queries if not q['sql'].startswith(('SELECT', 'SAVEPOINT', 'RELEASE'))])
+        self.assertEqual(skill_graph.catalog_version(), version)
+
+    def test_csv_catalog_diff(self):
+        load_catalog(read_catalog(SAMPLE_CATALOG))
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'skills.csv'), 'w', newline='') as f:
+                f.write("domain,name,difficulty_level,description,prerequisites\n"
+                        "Web Development,TypeScript,Intermediate,Typed JavaScript,JavaScript\n"
+                        "Web Development,Node.js,Intermediate,Server-side JS,TypeScript|Cloud Computing::Linux Basics\n")
+            stats = load_catalog(read_catalog(tmp))
+        self.assertEqual((stats['skills_created'], stats['skills_updated']), (1, 1))
+        self.assertEqual((stats['prerequisites_added'], stats['prerequisites_removed']), (3, 1))
+        node = Skill.objects.get(name="Node.js")
+        self.assertEqual(node.description, "Server-side JS")
+        self.assertEqual(sorted(node.prerequisites.values_list('name', flat=True)), ["Linux Basics", "TypeScript"])
+
+    def test_unknown_reference(self):
+        catalog = {'domains': [{'name': "Data"}],
+                   'skills': [{'domain': "Data", 'name': "SQL", 'prerequisites': ["Algebra"]}]}
+        with self.assertRaisesMessage(CatalogError, "unknown skill 'Algebra'"):
+            load_catalog(catalog)
+        self.assertFalse(Domain.objects.exists())
+
+    def test_command(self):
+        out = StringIO()
+        call_command('load_catalog', SAMPLE_CATALOG, stdout=out)
+        self.assertIn("skills created: 22", out.getvalue())
+        call_command('load_catalog', SAMPLE_CATALOG, stdout=out)
+        self.assertIn("Catalog unchanged", out.getvalue())
+
+
+class SnapshotTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'catalog.snap')
+        call_command('catalog_snapshot', 'export', self.path, stdout=StringIO())
+
+    def test_snapshot_round_trip(self):
+        graph = skill_graph.get_skill_graph()
+        with self.assertNumQueries(0):
+            mapped = Snapshot(self.path).graph()
+        self.assertEqual(mapped.fingerprint, graph.fingerprint)
+        # Read from the file, without decoding the rows
+        snapshot = Snapshot(self.path)
+        with mock.patch.object(snapshot, 'string', wraps=snapshot.string) as string:
+            self.assertEqual(snapshot.graph().fingerprint, graph.fingerprint)
+        self.assertLessEqual(string.call_count, 3)  # the distinct difficulty levels
+        self.assertEqual(mapped.career_skill_offsets, graph.career_skill_offsets)
+        self.assertEqual(mapped.career_skills, graph.career_skills)
+        self.assertEqual(tuple(mapped.skill_rows[2]), graph.skill_rows[2])
+
+    def test_fresh_process_serves_from_snapshot(self):
+        with override_settings(RECOMMENDER_SNAPSHOT=self.path), \
+                mock.patch.object(skill_graph, '_graph', None), mock.patch.object(skill_graph, '_version', 0):
+            with self.assertNumQueries(0):
+                results = RecommendationEngine.get_matching_careers(self.web.pk, [self.html.pk, self.js.pk])
+        self.assertEqual([r['career'] for r in results], [self.frontend, self.backend])
+        self.assertEqual(str(results[0]['career']), "Frontend Developer - Web Development")
+
+    def test_files_of_other_formats_are_rejected(self):
+        neighbours = os.path.join(self.tmp.name, 'neighbours.bin')
+        collaborative.NeighbourIndex.build().write(neighbours)
+        with self.assertRaisesMessage(SnapshotError, "is not a catalog snapshot"):
+            Snapshot(neighbours)
+        with self.assertRaisesMessage(collaborative.NeighbourIndexError, "is not a neighbour index"):
+            collaborative.NeighbourIndex.load(self.path)
+        with open(self.path, 'r+b') as f:
+            f.write(b'SKGRAPH1')
+        with self.assertRaisesMessage(SnapshotError, "older snapshot format"):
+            Snapshot(self.path)
+
+    def test_import_into_empty_database(self):
+        Domain.objects.all().delete()
+        out = StringIO()
+        call_command('catalog_snapshot', 'import', self.path, stdout=out)
+        self.assertIn("skills created: 6", out.getvalue())
+        frontend = Career.objects.get(title="Frontend Developer")
+        self.assertEqual(frontend.average_salary, "$70,000 - $120,000")
+        self.assertEqual((frontend.salary_min, frontend.salary_max, frontend.salary_currency), (70000, 120000, 'USD'))
+        self.assertEqual(frontend.required_skills.count(), 4)
+        self.assertEqual(Skill.objects.get(name="JavaScript").prerequisites.count(), 2)
+
+
+class SyntheticDataTests(TestCase):
+
+    def setUp(self):
+        skill_graph.invalidate()
+
+    def test_catalog_is_seeded_and_layered(self):
+        catalog = generate_catalog(domains=2, skills=40, careers=10, depth=5, seed=3)
+        self.assertEqual(catalog, generate_catalog(domains=2, skills=40, careers=10, depth=5, seed=3))
+        self.assertNotEqual(catalog, generate_catalog(domains=2, skills=40, careers=10, depth=5, seed=4))
+        self.assertEqual((len(catalog['skills']), len(catalog['careers'])), (40, 10))
+
+        load_catalog(catalog)
+        graph = skill_graph.get_skill_graph()
+        longest = max(len(graph.prerequisite_closure(i)) for i in range(len(graph.skill_ids)))
+        self.assertGreaterEqual(longest, 4)
+        self.assertEqual(Skill.objects.filter(prerequisites=None).count(), 2 * 4)
+
+    def test_users_hold_prerequisites_of_their_skills(self):
+        load_catalog(generate_catalog(domains=2, skills=40, careers=10, seed=1))
+        profiles = create_users(5, skills_per_user=3, seed=1)
+        self.assertEqual(UserProfile.objects.count(), 5)
+        graph = skill_graph.get_skill_graph()
+        for profile in profiles:
+            held = graph.skill_set(profile.skills.values_list('pk', flat=True))
+            self.assertGreaterEqual(len(held), 3)
+            for i in held:
+                self.assertLessEqual(set(graph.prerequisite_closure(i)), set(held))
+                self.assertEqual(graph.skill_domain[i], graph.domain_of(profile.domain_id))
+
+
+@override_settings(RECOMMENDER_INSTRUMENTATION=True)
+class InstrumentationTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def test_records_queries_and_result_size(self):
+        RecommendationEngine.get_matching_careers(self.web, [self.html])
+        RecommendationEngine.get_matching_careers(self.web, [self.html])
+        stats = registry.snapshot()['engine.get_matching_careers']
+        self.assertEqual(stats['queries']['count'], 2)
+        # Only the first call loads the snapshot
+        self.assertEqual(stats['queries']['sum'], 5)
+        self.assertEqual(stats['result_size']['max'], 2)
+
+        self.assertEqual(len(list(RecommendationEngine.iter_matching_careers(self.web, [self.html]))), 2)
+        self.assertEqual(registry.snapshot()['engine.iter_matching_careers']['result_size']['sum'], 2)
+
+    def test_disabled_by_default(self):
+        with self.settings(RECOMMENDER_INSTRUMENTATION=False):
+            RecommendationEngine.get_suggested_skills(self.web, [self.html])
+            self.assertEqual(self.client.get(reverse('recommender:metrics')).status_code, 404)
+        self.assertEqual(registry.snapshot(), {})
+
+    @override_settings(RECOMMENDER_SLOW_CALL_MS=0)
+    def test_slow_calls_log_their_sql(self):
+        with self.assertLogs('recommender.instrumentation', 'WARNING') as logs:
+            RecommendationEngine.generate_learning_path(User.objects.create(username="slow"), self.frontend)
+        self.assertIn("Slow call engine.generate_learning_path", logs.output[-1])
+        self.assertIn('INSERT INTO "recommender_pathstep"', logs.output[-1])
+
+    def test_metrics_endpoint_and_command(self):
+        self.client.get(reverse('recommender:career-matches', args=[self.web.pk]), {'skills': self.html.pk})
+        response = self.client.get(reverse('recommender:metrics'))
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn('recommender_call_queries_count{call="api.career_matches"} 1', text)
+        self.assertIn('recommender_call_result_size_count{call="engine.get_matching_careers"} 1', text)
+
+        out = StringIO()
+        call_command('engine_stats', stdout=out)
+        self.assertIn('engine.get_matching_careers', out.getvalue())
+
+    async def test_async_views_are_recorded(self):
+        await sync_to_async(skill_graph.get_skill_graph)()
+        response = await self.async_client.get(
+            reverse('recommender:suggested-skills-async', args=[self.web.pk]), {'skills': self.html.pk})
+        self.assertEqual(response.status_code, 200)
+        stats = registry.snapshot()['api.suggested_skills_async']
+        self.assertEqual(stats['queries']['sum'], 0)
+        self.assertEqual(stats['result_size']['sum'], len(response.content))
+
+
+class ResultCacheTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        result_cache.result_cache().clear()
+
+    def test_same_skill_set_is_served_from_cache(self):
+        cache = result_cache.result_cache()
+        first = RecommendationEngine.get_matching_careers(self.web, [self.html, self.js])
+        first[0]['score'] = -1
+        # Duplicates, order and unknown ids don't change the skill set
+        second = RecommendationEngine.get_matching_careers(self.web, [self.js.pk, self.html.pk, self.js.pk, 9999])
+        self.assertEqual(second[0]['score'], 0.5)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+        RecommendationEngine.get_matching_careers(self.web, [self.html, self.js], limit=1)
+        RecommendationEngine.get_suggested_skills(self.web, [self.html, self.js])
+        self.assertEqual(cache.stats()['misses'], 3)
+
+    def test_catalog_change_invalidates(self):
+        cache = result_cache.result_cache()
+        RecommendationEngine.get_suggested_skills(self.web, [self.html, self.css])
+        vue = Skill.objects.create(name="Vue.js", domain=self.web)
+        vue.prerequisites.add(self.js)
+        self.react.prerequisites.add(self.html)
+        self.assertIn(vue, RecommendationEngine.get_suggested_skills(self.web, [self.html, self.css, self.js]))
+        self.assertEqual(cache.stats()['invalidations'], 1)
+
+    @override_settings(RECOMMENDER_RESULT_CACHE_SIZE=1)
+    def test_lru_evicts_least_recently_used(self):
+        cache = result_cache.result_cache()
+        RecommendationEngine.get_matching_careers(self.web, [self.html])
+        RecommendationEngine.get_matching_careers(self.web, [self.css])
+        RecommendationEngine.get_matching_careers(self.web, [self.html])
+        self.assertEqual(cache.stats(), dict(cache.stats(), size=1, hits=0, misses=3, evictions=2))
+
+    @override_settings(
+        RECOMMENDER_RESULT_CACHE_SIZE=0, RECOMMENDER_RESULT_CACHE_BACKEND='results',
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'results': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'results'}},
+    )
+    def test_backend_is_shared_between_processes(self):
+        expected = RecommendationEngine.get_matching_careers(self.web, [self.html])
+        # A fresh process: new in-process cache, same shared backend
+        result_cache.reset_result_cache('RECOMMENDER_RESULT_CACHE_SIZE')
+        with mock.patch('recommender.recommendation_engine._best', side_effect=AssertionError):
+            self.assertEqual(RecommendationEngine.get_matching_careers(self.web, [self.html]), expected)
+        self.assertEqual(result_cache.result_cache().stats()['backend_hits'], 1)
+
+
+class FakeTkRoot:
+    """Just enough of tk.Tk for BackgroundRunner: after() queues callbacks"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def pump(self, runner):
+        runner.executor.submit(lambda: None).result()
+        while self.callbacks:
+            self.callbacks.pop(0)()
+
+
+class BackgroundRunnerTests(TestCase):
+
+    def setUp(self):
+        from gui_app import BackgroundRunner
+        self.root = FakeTkRoot()
+        self.runner = BackgroundRunner(self.root, max_workers=1)
+        self.addCleanup(self.runner.shutdown)
+
+    def test_results_are_delivered_on_the_calling_thread(self):
+        delivered = []
+        self.runner.submit(lambda: threading.current_thread().name,
+                           on_done=lambda name: delivered.append((name, threading.current_thread().name)))
+        self.assertEqual(delivered, [])
+        self.root.pump(self.runner)
+        self.assertEqual(delivered, [(delivered[0][0], threading.current_thread().name)])
+        self.assertTrue(delivered[0][0].startswith('gui-worker'))
+
+    def test_stale_results_are_dropped(self):
+        release = threading.Event()
+        delivered, errors = [], []
+        self.runner.submit(release.wait, on_done=lambda _: delivered.append('blocked'))
+        self.runner.submit(lambda: 'queued', on_done=delivered.append)
+        self.runner.cancel_pending()
+        self.runner.submit(lambda: 'first', on_done=delivered.append, channel='skills')
+        self.runner.submit(lambda: 'second', on_done=delivered.append, channel='skills')
+        self.runner.submit(lambda: 1 / 0, on_done=delivered.append, on_error=errors.append)
+        release.set()
+        self.root.pump(self.runner)
+        self.assertEqual(delivered, ['second'])
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+        self.assertEqual(self.runner.pending, 0)
+
+
+class GuiSkillListTests(CatalogTestCase):
+
+    def test_domain_rows_come_from_the_snapshot(self):
+        from gui_app import domain_skill_rows, filter_rows
+        skill_graph.get_skill_graph()
+        with self.assertNumQueries(0):
+            rows = domain_skill_rows("Web Development", with_prerequisites=True)
+        self.assertEqual(len(rows), 5)
+        self.assertIn((self.js.pk, "JavaScript — Intermediate    Prereqs: HTML, CSS",
+                       "javascript — intermediate    prereqs: html, css"), rows)
+        self.assertEqual(domain_skill_rows("Nope"), [])
+
+        self.assertEqual([row[0] for row in filter_rows(rows, "js")], [self.react.pk, self.node.pk])
+        self.assertEqual([row[0] for row in filter_rows(rows, "  INTERMEDIATE css ")], [self.js.pk])
+        self.assertIs(filter_rows(rows, " "), rows)
+
+
+class SearchTests(CatalogTestCase):
+
+    def names(self, *args, **kwargs):
+        return [(getattr(obj, 'name', None) or obj.title, match) for obj, match in search.search(*args, **kwargs)]
+
+    def test_full_text_prefix_search(self):
+        self.assertTrue(search.has_fts(connection))
+        self.assertEqual(self.names('skills', 'jav'), [("JavaScript", 'text')])
+        self.assertEqual(self.names('careers', 'DEVELOPER front', fuzzy=False), [("Frontend Developer", 'text')])
+        # Descriptions are indexed too, names rank higher
+        Skill.objects.filter(pk=self.node.pk).update(description="Server-side JavaScript runtime")
+        self.assertEqual(self.names('skills', 'javascript', fuzzy=False),
+                         [("JavaScript", 'text'), ("Node.js", 'text')])
+        self.assertEqual(self.names('skills', 'linux', domain=self.web), [])
+        self.assertEqual(self.names('skills', 'linux', domain=self.cloud.pk), [("Linux Basics", 'text')])
+
+    def test_triggers_follow_bulk_writes_and_deletes(self):
+        Skill.objects.bulk_create([Skill(name="TypeScript", domain=self.web)])
+        skill_graph.invalidate()
+        self.assertEqual(self.names('skills', 'types', fuzzy=False), [("TypeScript", 'text')])
+        Skill.objects.filter(name="TypeScript").delete()
+        self.assertEqual(self.names('skills', 'types', fuzzy=False), [])
+
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER recommender_skill_fts_insert")
+        search.install_fts(connection, repair=True)
+        Skill.objects.create(name="Svelte", domain=self.web)
+        self.assertEqual(self.names('skills', 'svel', fuzzy=False), [("Svelte", 'text')])
+
+    def test_fuzzy_fallback(self):
+        self.assertEqual(self.names('skills', 'javascrpt'), [("JavaScript", 'fuzzy')])
+        self.assertEqual(self.names('careers', 'bakend developr')[0], ("Backend Developer", 'fuzzy'))
+        self.assertEqual(self.names('skills', 'qqqq'), [])
+
+    def test_in_memory_prefix_index_without_fts(self):
+        with mock.patch.object(search, 'has_fts', return_value=False):
+            self.assertEqual(self.names('skills', 'js', fuzzy=False), [("Node.js", 'prefix'), ("React.js", 'prefix')])
+            self.assertEqual(self.names('careers', 'dev', limit=1), [("Backend Developer", 'prefix')])
+            self.assertEqual(self.names('skills', 'reac', domain=self.cloud), [])
+
+    def test_name_indexes_are_kept_per_kind(self):
+        graph = skill_graph.get_skill_graph()
+        skills, careers = search.name_index(graph, 'skills'), search.name_index(graph, 'careers')
+        self.assertIs(search.name_index(graph, 'skills'), skills)
+        self.assertIs(search.name_index(graph, 'careers'), careers)
+        skill_graph.invalidate()
+        newer = skill_graph.get_skill_graph()
+        self.assertIsNot(search.name_index(newer, 'skills'), skills)
+        # An older snapshot still in use doesn't evict the newer index
+        search.name_index(graph, 'skills')
+        self.assertIs(search.name_index(newer, 'skills'), search.name_index(newer, 'skills'))
+
+    def test_search_endpoint(self):
+        url = reverse('recommender:search')
+        response = self.client.get(url, {'q': 'front', 'type': 'careers'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(r['id'], r['match']) for r in response.json()['results']], [(self.frontend.pk, 'text')])
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': 'x', 'type': 'users'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': 'x', 'domain': 9999}).status_code, 404)
+
+
+class ScoringTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        result_cache.result_cache().clear()
+
+    def test_weighted_scores_rarity_difficulty_and_prerequisites(self):
+        user = [self.html, self.css]
+        fraction = RecommendationEngine.get_matching_careers(self.web, user)
+        weighted = RecommendationEngine.get_matching_careers(self.web, user, scoring='weighted')
+        self.assertEqual([r['score'] for r in fraction], [0.5, 0])
+        # HTML and CSS are rare (one career each), and JavaScript earns partial
+        # credit because the user has both of its prerequisites.
+        self.assertEqual([r['career'] for r in weighted], [self.frontend, self.backend])
+        self.assertGreater(weighted[0]['score'], 0.5)
+        self.assertGreater(weighted[1]['score'], 0)
+        self.assertEqual((weighted[1]['matching_skills'], weighted[1]['total_required']), (0, 2))
+
+        unweighted = ScoringModel(prerequisite_credit=0.5)
+        graph = skill_graph.get_skill_graph()
+        scores = {c: score for c, score, _, _ in unweighted.score(graph, graph.skill_set(user))}
+        # Frontend: 2 of 4 skills plus half of JavaScript
+        self.assertAlmostEqual(scores[graph.career_index[self.frontend.pk]], 2.5 / 4)
+
+    def test_explanation_adds_up_to_score(self):
+        user = [self.html, self.css]
+        explanation = RecommendationEngine.explain_career_match(self.frontend, user, scoring='weighted')
+        ranked = RecommendationEngine.get_matching_careers(self.web, user, scoring='weighted')
+        self.assertAlmostEqual(explanation['score'], ranked[0]['score'])
+        self.assertAlmostEqual(sum(c['contribution'] for c in explanation['contributions']), explanation['score'])
+        statuses = {c['skill']: c['status'] for c in explanation['contributions']}
+        self.assertEqual(statuses, {self.html: 'matched', self.css: 'matched',
+                                    self.js: 'partial', self.react: 'missing'})
+        self.assertEqual(set(explanation['contributions'][0]['factors']), {'idf', 'difficulty'})
+        self.assertIsNone(RecommendationEngine.explain_career_match(9999, user))
+
+    def test_weights_are_built_once_per_catalog_version(self):
+        model = scoring_model('weighted')
+        graph = skill_graph.get_skill_graph()
+        weights = model.weights(graph)
+        self.assertIs(model.weights(graph), weights)
+        js, node = graph.skill_index[self.js.pk], graph.skill_index[self.node.pk]
+        self.assertAlmostEqual(weights.career_total[graph.career_index[self.backend.pk]],
+                               weights.skill[js] + weights.skill[node])
+
+        self.backend.required_skills.add(self.html)
+        self.assertIsNot(model.weights(skill_graph.get_skill_graph()), weights)
+
+    def test_configured_model_and_cache_keys(self):
+        fraction = RecommendationEngine.get_matching_careers(self.web, [self.html, self.css])
+        hits = result_cache.result_cache().stats()['hits']
+        with override_settings(RECOMMENDER_SCORING='weighted'):
+            self.assertIs(scoring_model(), scoring_model('weighted'))
+            weighted = RecommendationEngine.get_matching_careers(self.web, [self.html, self.css])
+        self.assertNotEqual(weighted[0]['score'], fraction[0]['score'])
+        self.assertEqual(result_cache.result_cache().stats()['hits'], hits)
+        with self.assertRaises(ValueError):
+            scoring_model('popularity')
+
+    def test_api_explain(self):
+        url = reverse('recommender:career-matches', args=[self.web.pk])
+        data = self.client.get(url, {'skills': f"{self.html.pk},{self.css.pk}",
+                                     'scoring': 'weighted', 'explain': '1'}).json()
+        first = data['results'][0]
+        self.assertEqual(first['title'], "Frontend Developer")
+        self.assertEqual([c['status'] for c in first['contributions']], ['matched', 'matched', 'partial', 'missing'])
+        self.assertNotIn('contributions', self.client.get(url).json()['results'][0])
+        self.assertEqual(self.client.get(url, {'scoring': 'popularity'}).status_code, 400)
+
+
+class CollaborativeTests(CatalogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.profiles = []
+        for i, (skills, careers) in enumerate([
+            ([cls.html, cls.css, cls.js], [cls.frontend]),
+            ([cls.html, cls.css], [cls.frontend]),
+            ([cls.js, cls.node], [cls.backend]),
+            ([cls.linux], []),
+        ]):
+            user = User.objects.create_user(username=f"peer{i}")
+            profile = UserProfile.objects.create(user=user, domain=cls.web)
+            profile.skills.set(skills)
+            for career in careers:
+                LearningPath.objects.create(user=user, career=career)
+            cls.profiles.append(profile)
+
+    def setUp(self):
+        super().setUp()
+        collaborative.reset_neighbour_index('RECOMMENDER_NEIGHBOUR_INDEX')
+
+    def test_recommends_careers_of_similar_users(self):
+        results = RecommendationEngine.get_collaborative_careers([self.html, self.css])
+        self.assertEqual([r['career'] for r in results], [self.frontend])
+        self.assertEqual((results[0]['score'], results[0]['supporters']), (1.0, 2))
+
+        # Profiles without learning paths aren't indexed
+        self.assertEqual(len(collaborative.neighbour_index()), 3)
+        self.assertEqual(RecommendationEngine.get_collaborative_careers([self.linux]), [])
+        self.assertEqual(RecommendationEngine.get_collaborative_careers([self.js, self.node], domain=self.cloud), [])
+        # Without the backend developer, only the frontend one shares a skill
+        self.assertEqual(
+            [r['career'] for r in RecommendationEngine.get_collaborative_careers(
+                [self.js, self.node], exclude_profile=self.profiles[2])],
+            [self.frontend])
+
+    def test_stale_index_is_served_while_rebuilding(self):
+        stale = collaborative.neighbour_index()
+        fresh = collaborative.NeighbourIndex.from_profiles([])
+        release = threading.Event()
+
+        def build():
+            release.wait(5)
+            return fresh
+
+        with override_settings(RECOMMENDER_NEIGHBOUR_INDEX_MAX_AGE=0), \
+                mock.patch.object(collaborative, '_index', stale), \
+                mock.patch.object(collaborative.NeighbourIndex, 'build', side_effect=build) as rebuild:
+            stale.built_at -= 1
+            self.assertIs(collaborative.neighbour_index(), stale)
+            self.assertIs(collaborative.neighbour_index(), stale)
+            worker = collaborative._rebuild
+            self.assertTrue(worker.name.startswith('recommender'))
+            release.set()
+            worker.join(5)
+            rebuild.assert_called_once()
+            self.assertIs(collaborative._index, fresh)
+
+    def test_index_file_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'neighbours.bin')
+            out = StringIO()
+            call_command('build_neighbour_index', path, stdout=out)
+            self.assertIn("3 profiles", out.getvalue())
+
+            expected = RecommendationEngine.get_collaborative_careers([self.html, self.css, self.js])
+            with override_settings(RECOMMENDER_NEIGHBOUR_INDEX=path):
+                skill_graph.get_skill_graph()
+                with self.assertNumQueries(0):
+                    self.assertEqual(
+                        RecommendationEngine.get_collaborative_careers([self.html, self.css, self.js]), expected)
+
+    def test_lsh_finds_near_duplicates_among_random_profiles(self):
+        rng = random.Random(1)
+        profiles = [(i, rng.sample(range(1, 500), 10), [i % 7]) for i in range(1, 5001)]
+        index = collaborative.NeighbourIndex.from_profiles(profiles)
+        for profile_id, skills, _ in profiles[:50]:
+            query = skills[:9] + [999]
+            similarity, row = index.neighbours(query, k=1)[0]
+            self.assertEqual(index.profile_ids[row], profile_id)
+            self.assertAlmostEqual(similarity, 9 / 11)
+            # Only a small fraction of the profiles is ever looked at
+            self.assertLess(len(index.candidates(index.hasher.signature(query))), 250)
+
+    def test_api(self):
+        url = reverse('recommender:similar-user-careers')
+        data = self.client.get(url, {'skills': f"{self.html.pk},{self.css.pk}"}).json()
+        self.assertEqual([(r['title'], r['supporters']) for r in data['results']], [("Frontend Developer", 2)])
+        self.assertEqual(self.client.get(url, {'domain': 9999}).status_code, 404)
+
+
+class CrossDomainTests(CatalogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.devops = Career.objects.create(title="DevOps Engineer", domain=cls.cloud)
+        cls.devops.required_skills.add(cls.linux, cls.js)
+
+    def test_inverted_index_matches_through_table(self):
+        graph = skill_graph.get_skill_graph()
+        for skill in Skill.objects.all():
+            expected = sorted(graph.career_index[pk] for pk in skill.required_for_careers.values_list('pk', flat=True))
+            self.assertEqual(list(graph.careers_requiring(graph.skill_index[skill.pk])), expected)
+        for career in Career.objects.all():
+            expected = sorted(graph.skill_index[pk] for pk in career.required_skills.values_list('pk', flat=True))
+            self.assertEqual(list(graph.skills_required_by(graph.career_index[career.pk])), expected)
+        # Skill sets are canonical whatever order, duplicates or unknown ids they come in
+        self.assertEqual(graph.skill_set([self.js.pk, self.html, self.js, 9999]),
+                         tuple(sorted([graph.skill_index[self.html.pk], graph.skill_index[self.js.pk]])))
+
+    def test_only_careers_sharing_a_skill_across_domains(self):
+        results = RecommendationEngine.get_cross_domain_careers([self.js, self.linux])
+        self.assertEqual([(r['career'], r['score']) for r in results],
+                         [(self.devops, 1.0), (self.backend, 0.5), (self.frontend, 0.25)])
+        self.assertEqual([r['career'] for r in RecommendationEngine.get_cross_domain_careers([self.html])],
+                         [self.frontend])
+        self.assertEqual(RecommendationEngine.get_cross_domain_careers([self.js], limit=1, min_score=0.6), [])
+        self.assertEqual(RecommendationEngine.get_cross_domain_careers([]), [])
+
+    def test_scores_agree_with_domain_matching(self):
+        user = [self.html, self.css, self.linux]
+        for scoring in ('fraction', 'weighted'):
+            expected = {}
+            for domain in (self.web, self.cloud):
+                for r in RecommendationEngine.get_matching_careers(domain, user, scoring=scoring):
+                    if r['score']:
+                        expected[r['career']] = r['score']
+            results = RecommendationEngine.get_cross_domain_careers(user, scoring=scoring)
+            self.assertEqual(set(expected), {r['career'] for r in results})
+            for r in results:
+                self.assertAlmostEqual(r['score'], expected[r['career']])
+        # Backend only shares JavaScript's prerequisites with the user
+        weighted = RecommendationEngine.get_cross_domain_careers(user, scoring='weighted')
+        self.assertIn((self.backend, 0), [(r['career'], r['matching_skills']) for r in weighted])
+
+    def test_api(self):
+        url = reverse('recommender:cross-domain-matches')
+        data = self.client.get(url, {'skills': f"{self.js.pk},{self.linux.pk}", 'page_size': 2}).json()
+        self.assertEqual((data['count'], data['num_pages']), (3, 2))
+        self.assertEqual([r['title'] for r in data['results']], ["DevOps Engineer", "Backend Developer"])
+        self.assertEqual(self.client.get(url, {'scoring': 'popularity'}).status_code, 400)
+
+
+class SalaryTests(CatalogTestCase):
+
+    def test_parse_salary(self):
+        for label, expected in [
+            ("$70,000 - $120,000", (70000, 120000, 'USD')),
+            ("$85k", (85000, 85000, 'USD')),
+            ("£45k to £60k", (45000, 60000, 'GBP')),
+            ("EUR 50,000 – 65,000", (50000, 65000, 'EUR')),
+            ("₹6,00,000 - ₹12,00,000", (600000, 1200000, 'INR')),
+            ("Competitive", (None, None, '')),
+            (None, (None, None, '')),
+        ]:
+            self.assertEqual(parse_salary(label), expected, label)
+
+    def test_save_keeps_range_in_step_with_label(self):
+        self.assertEqual((self.frontend.salary_min, self.frontend.salary_max), (70000, 120000))
+        self.frontend.average_salary = "$90k - $140k"
+        self.frontend.save(update_fields=['average_salary'])
+        self.frontend.refresh_from_db()
+        self.assertEqual((self.frontend.salary_min, self.frontend.salary_max, self.frontend.salary_currency),
+                         (90000, 140000, 'USD'))
+        for label in ("Competitive", None):
+            self.frontend.average_salary = label
+            self.frontend.save(update_fields=['average_salary'])
+            self.frontend.refresh_from_db()
+            self.assertEqual((self.frontend.salary_min, self.frontend.salary_max, self.frontend.salary_currency),
+                             (None, None, ''))
+
+    def test_save_keeps_an_explicit_range(self):
+        load_catalog({'domains': [{'name': "Data"}], 'careers': [
+            {'domain': "Data", 'title': "Staff Engineer", 'average_salary': "Competitive",
+             'salary_min': 150000, 'salary_max': 250000, 'salary_currency': 'USD'}]})
+        career = Career.objects.get(title="Staff Engineer")
+        career.description = "Edited in the admin"
+        career.save()
+        career.refresh_from_db()
+        self.assertEqual((career.salary_min, career.salary_max, career.salary_currency), (150000, 250000, 'USD'))
+
+        # A range edited together with the label is kept too
+        career.average_salary, career.salary_min = "$90k - $140k", 100000
+        career.save()
+        career.refresh_from_db()
+        self.assertEqual((career.salary_min, career.salary_max, career.salary_currency), (100000, 250000, 'USD'))
+
+        # New careers fill in what the label gives
+        created = Career.objects.create(title="Analyst", domain=career.domain,
+                                        average_salary="$50,000 - $80,000", salary_max=90000)
+        self.assertEqual((created.salary_min, created.salary_max, created.salary_currency), (50000, 90000, 'USD'))
+
+    def test_backfill_is_batched_and_resumable(self):
+        migration = importlib.import_module('recommender.migrations.0007_backfill_career_salary')
+        for i in range(3):
+            Career.objects.create(title=f"Engineer {i}", domain=self.web, average_salary=f"${60 + i * 10},000")
+        Career.objects.update(salary_min=None, salary_max=None, salary_currency='')
+        schema_editor = mock.Mock(connection=connection)
+
+        calls = []
+
+        def interrupted(label):
+            calls.append(label)
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return parse_salary(label)
+
+        with mock.patch.object(migration, 'BATCH_SIZE', 1), mock.patch.object(migration, 'parse_salary', interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                migration.backfill(django_apps, schema_editor)
+        # The first two batches were committed and aren't parsed again
+        self.assertEqual(Career.objects.filter(salary_min__isnull=False).count(), 2)
+        with mock.patch.object(migration, 'parse_salary', side_effect=parse_salary) as parse:
+            migration.backfill(django_apps, schema_editor)
+        self.assertEqual(parse.call_count, 2)
+        self.assertEqual(
+            list(Career.objects.filter(title__startswith="Engineer").order_by('title').values_list('salary_min', flat=True)),
+            [60000, 70000, 80000])
+
+    def test_salary_filters_run_in_memory(self):
+        user = [self.html, self.js]
+        skill_graph.get_skill_graph()
+        result_cache.result_cache().clear()
+        with self.assertNumQueries(0):
+            results = RecommendationEngine.get_matching_careers(self.web, user, min_salary=100000)
+        self.assertEqual([r['career'] for r in results], [self.frontend])
+        # Served from the result cache afterwards
+        with self.assertNumQueries(0):
+            RecommendationEngine.get_matching_careers(self.web, user, min_salary=100000)
+
+        self.assertEqual(RecommendationEngine.get_matching_careers(self.web, user, min_salary=130000), [])
+        self.assertEqual(RecommendationEngine.get_matching_careers(self.web, user, max_salary=60000), [])
+        self.assertEqual(RecommendationEngine.get_matching_careers(self.web, user, currency='EUR'), [])
+        self.assertEqual([r['career'] for r in RecommendationEngine.get_cross_domain_careers(
+            user, min_salary=50000, max_salary=80000, currency='USD')], [self.frontend])
+        self.assertIn('career_salary_max_idx', Career.objects.filter(salary_max__gte=100000).explain())
+
+    def test_api(self):
+        url = reverse('recommender:career-matches', args=[self.web.pk])
+        data = self.client.get(url, {'skills': self.js.pk, 'min_salary': 100000, 'currency': 'usd'}).json()
+        self.assertEqual([(r['title'], r['salary_min'], r['salary_max'], r['salary_currency']) for r in data['results']],
+                         [("Frontend Developer", 70000, 120000, 'USD')])
+        self.assertEqual(self.client.get(url, {'currency': 'dollars'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'min_salary': 'lots'}).status_code, 400)
+
+    async def test_async_api_with_cold_result_cache(self):
+        await sync_to_async(skill_graph.get_skill_graph)()
+        await sync_to_async(result_cache.result_cache().clear)()
+        response = await self.async_client.get(reverse('recommender:career-matches-async', args=[self.web.pk]),
+                                               {'skills': self.js.pk, 'min_salary': 90000})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['title'] for r in response.json()['results']], ["Frontend Developer"])
+
+
+class AdminTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def grow(self, n):
+        skills = Skill.objects.bulk_create(Skill(name=f"Skill {n}-{i}", domain=self.web) for i in range(n))
+        for i in range(n):
+            user = User.objects.create(username=f"learner{n}-{i}")
+            UserProfile.objects.create(user=user, domain=self.web).skills.add(*skills[:3])
+            career = Career.objects.create(title=f"Career {n}-{i}", domain=self.cloud)
+            career.required_skills.add(*skills[:i + 1])
+            path = LearningPath.objects.create(user=user, career=career)
+            PathStep.objects.bulk_create(PathStep(learning_path=path, skill=skill, step_order=order)
+                                         for order, skill in enumerate(skills[:3]))
+
+    def query_counts(self):
+        counts = {}
+        for model in (Skill, Career, UserProfile, LearningPath, PathStep):
+            opts = model._meta
+            for view, args in (('changelist', ()), ('change', (model.objects.order_by('-pk')[0].pk,))):
+                url = reverse(f'admin:{opts.app_label}_{opts.model_name}_{view}', args=args)
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                counts[opts.model_name, view] = len(queries)
+        return counts
+
+    def test_pages_run_a_fixed_number_of_queries(self):
+        self.grow(2)
+        self.query_counts()  # warm per-process caches
+        small = self.query_counts()
+        self.grow(20)
+        self.maxDiff = None
+        self.assertEqual(self.query_counts(), small)
+
+    def test_required_skill_counts_are_annotated(self):
+        response = self.client.get(reverse('admin:recommender_career_changelist'), {'o': '-3'})
+        careers = list(response.context['cl'].result_list)
+        self.assertEqual([(c.title, c.required_skill_count) for c in careers],
+                         [("Frontend Developer", 4), ("Backend Developer", 2)])
+
+        # Only the page's rows are counted: no aggregate over the whole table
+        request = response.wsgi_request
+        career_admin = recommender_admin.admin.site._registry[Career]
+        page = career_admin.get_queryset(request).order_by('-pk')[:100]
+        sql, params = page.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('CORRELATED SCALAR SUBQUERY', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        # Autocomplete results don't show the count
+        request.resolver_match = mock.Mock(url_name='autocomplete')
+        self.assertNotIn('required_skill_count', career_admin.get_queryset(request).query.annotations)
+
+    def test_huge_unfiltered_tables_are_estimated(self):
+        url = reverse('admin:recommender_skill_changelist')
+        self.assertEqual(self.client.get(url).context['cl'].result_count, Skill.objects.count())
+        with mock.patch.object(recommender_admin, 'ESTIMATED_COUNT_THRESHOLD', 1):
+            self.assertEqual(self.client.get(url).context['cl'].result_count, self.linux.pk)
+            # Filtered lists are still counted exactly
+            response = self.client.get(url, {'domain__id__exact': self.cloud.pk})
+            self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_autocomplete_uses_full_text_index(self):
+        url = reverse('admin:recommender_skill_changelist')
+        names = lambda response: sorted(s.name for s in response.context['cl'].result_list)
+        Skill.objects.create(name="TypeScript", domain=self.cloud)
+        # Changelist searches keep substring matching
+        self.assertEqual(names(self.client.get(url, {'q': 'Script'})), ["JavaScript", "TypeScript"])
+        self.assertEqual(names(self.client.get(url, {'q': 'script', 'domain__id__exact': self.cloud.pk})),
+                         ["TypeScript"])
+
+        autocomplete = reverse('admin:autocomplete')
+        params = {'term': 'front', 'app_label': 'recommender', 'model_name': 'learningpath', 'field_name': 'career'}
+        with mock.patch.object(recommender_admin, 'text_search_ids', wraps=search.text_search_ids) as fts:
+            response = self.client.get(autocomplete, params)
+        fts.assert_called_once()
+        self.assertEqual([r['text'] for r in response.json()['results']], [str(self.frontend)])
+        # Descriptions aren't searched, as with search_fields
+        Skill.objects.filter(pk=self.html.pk).update(description="Markup for web pages")
+        self.assertEqual(search.text_search_ids('skills', 'web', 10), [])
+        self.assertEqual(search.text_search_ids('skills', 'html', 10), [self.html.pk])
+        self.assertEqual(search.text_search_ids('skills', 'java', 10), [self.js.pk])
+        # No word-prefix match, or too many to be complete: substring search
+        response = self.client.get(autocomplete, {**params, 'term': 'end'})
+        self.assertEqual(sorted(r['text'] for r in response.json()['results']),
+                         sorted([str(self.frontend), str(self.backend)]))
+        with mock.patch.object(recommender_admin, 'MAX_SEARCH_RESULTS', 1):
+            response = self.client.get(autocomplete, {**params, 'term': 'developer'})
+        self.assertEqual(len(response.json()['results']), 2)
+
+
+class CareerScoreTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.alice = UserProfile.objects.create(user=User.objects.create_user(username="alice"), domain=self.web)
+        self.bob = UserProfile.objects.create(user=User.objects.create_user(username="bob"), domain=self.web)
+
+    def rows(self):
+        return set(UserCareerScore.objects.values_list(
+            'profile_id', 'career_id', 'matching_skills', 'total_required', 'score'))
+
+    def assertMaterialized(self):
+        """The incrementally maintained rows equal a rebuild from scratch"""
+        maintained = self.rows()
+        career_scores.refresh_profiles()
+        self.assertEqual(maintained, self.rows())
+
+    def test_refresh_matches_the_engine(self):
+        Career.objects.create(title="Web Designer", domain=self.web).required_skills.add(self.css)
+        Career.objects.create(title="Cloud Engineer", domain=self.cloud).required_skills.add(self.linux)
+        self.alice.skills.add(self.html, self.js)
+        UserCareerScore.objects.all().delete()
+        self.assertEqual(career_scores.refresh_profiles(chunk_size=1), (2, 2))
+        skill_graph.get_skill_graph()
+        for domain in (self.web, self.cloud):
+            expected = [(r['career'], r['score'], r['matching_skills'], r['total_required'])
+                        for r in RecommendationEngine.get_matching_careers(domain, [self.html, self.js])]
+            with self.assertNumQueries(1):
+                top = [(r['career'], r['score'], r['matching_skills'], r['total_required'])
+                       for r in RecommendationEngine.get_top_careers(self.alice, domain=domain, limit=None)]
+            self.assertEqual(top, expected)
+        self.assertEqual([r['career'].title for r in RecommendationEngine.get_top_careers(self.alice, domain=self.web)],
+                         ["Frontend Developer", "Backend Developer", "Web Designer"])
+        self.assertEqual(len(RecommendationEngine.get_top_careers(self.alice, limit=1, min_score=0.5)), 1)
+        self.assertEqual(len(RecommendationEngine.get_top_careers(self.alice, domain=self.web, min_score=0.1)), 2)
+
+    def test_migration_backfills_existing_profiles(self):
+        migration = importlib.import_module('recommender.migrations.0009_backfill_user_career_score')
+        state_apps = MigrationLoader(connection).project_state(
+            ('recommender', '0009_backfill_user_career_score')).apps
+        self.alice.skills.add(self.html, self.js)
+        self.bob.skills.add(self.node)
+        UserCareerScore.objects.all().delete()
+        with mock.patch.object(migration, 'BATCH_SIZE', 1):
+            migration.backfill(state_apps, mock.Mock(connection=connection))
+        self.assertMaterialized()
+        self.assertEqual(len(self.rows()), 3)
+        # A rerun only picks up profiles without rows, e.g. after an interruption
+        UserCareerScore.objects.filter(profile=self.bob).delete()
+        with self.assertNumQueries(8):
+            migration.backfill(state_apps, mock.Mock(connection=connection))
+        self.assertMaterialized()
+
+        from gui_app import recommendation_text
+        text = recommendation_text(self.alice.user)
+        self.assertIn("1. Frontend Developer", text)
+        self.assertIn("2. Backend Developer", text)
+
+    def test_profile_skill_changes_update_rows(self):
+        self.alice.skills.add(self.html, self.css)
+        self.assertEqual(self.rows(), {(self.alice.pk, self.frontend.pk, 2, 4, 0.5)})
+        self.alice.skills.add(self.js)
+        self.bob.skills.add(self.node)
+        self.assertMaterialized()
+        self.alice.skills.remove(self.html, self.node)  # node isn't held
+        self.assertMaterialized()
+        self.js.users_with_skill.remove(self.alice)
+        self.js.users_with_skill.add(self.bob)
+        self.assertMaterialized()
+        with self.captureOnCommitCallbacks(execute=True):
+            set_profile_skills(self.alice, [self.react.pk, self.node.pk])
+        self.assertMaterialized()
+        self.alice.skills.clear()
+        self.js.users_with_skill.clear()
+        self.assertMaterialized()
+        self.assertEqual(self.rows(), {(self.bob.pk, self.backend.pk, 1, 2, 0.5)})
+
+    def test_career_requirement_changes_update_rows(self):
+        self.alice.skills.add(self.html, self.js, self.node)
+        self.bob.skills.add(self.linux)
+        self.frontend.required_skills.add(self.linux, self.node)
+        self.assertMaterialized()
+        self.frontend.required_skills.remove(self.html, self.linux, self.react, self.css)
+        self.assertMaterialized()
+        self.node.required_for_careers.remove(self.backend)
+        self.linux.required_for_careers.add(self.backend)
+        self.assertMaterialized()
+        self.js.required_for_careers.clear()
+        self.assertMaterialized()
+        self.backend.required_skills.clear()
+        self.assertMaterialized()
+        cloud = Career.objects.create(title="Cloud Engineer", domain=self.cloud)
+        cloud.required_skills.add(self.linux, self.html)
+        self.html.delete()
+        self.assertMaterialized()
+        self.assertEqual(self.rows(), {(self.alice.pk, self.frontend.pk, 1, 1, 1.0), (self.bob.pk, cloud.pk, 1, 1, 1.0)})
+
+    def test_bulk_writers_refresh_scores(self):
+        catalog = generate_catalog(domains=1, skills=20, careers=5, seed=3)
+        load_catalog(catalog)
+        create_users(5, skills_per_user=3, seed=1)
+        catalog['careers'][0]['required_skills'] = catalog['careers'][0]['required_skills'][:1]
+        load_catalog(catalog)
+        self.assertTrue(self.rows())
+        self.assertMaterialized()
+
+    def test_command(self):
+        self.alice.skills.add(self.html)
+        UserCareerScore.objects.all().delete()
+        out = StringIO()
+        call_command('refresh_career_scores', '--profile', str(self.alice.pk), stdout=out)
+        self.assertIn("Refreshed 1 profiles: 1 career scores", out.getvalue())
@@ -0,0 +1,21 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'recommender'
+
+urlpatterns = [
+    path('domains/<int:domain_id>/careers/', views.career_matches, name='career-matches'),
+    path('domains/<int:domain_id>/suggested-skills/', views.suggested_skills, name='suggested-skills'),
+    path('careers/<int:career_id>/learning-path/', views.learning_path, name='learning-path'),
+    path('careers/matches/', views.cross_domain_matches, name='cross-domain-matches'),
+    path('similar-user-careers/', views.similar_user_careers, name='similar-user-careers'),
+    path('search/', views.search, name='search'),
+    path('metrics/', views.metrics, name='metrics'),
+
+    # Same endpoints as async views, for ASGI deployments
+    path('async/domains/<int:domain_id>/careers/', views.career_matches_async, name='career-matches-async'),
+    path('async/domains/<int:domain_id>/suggested-skills/', views.suggested_skills_async,
+         name='suggested-skills-async'),
+    path('async/careers/<int:career_id>/learning-path/', views.learning_path_async, name='learning-path-async'),
+]
@@ -1,3 +1,402 @@
-from django.shortcuts import render
+"""JSON API over the recommendation engine.
 
-# Create your views here.
+Every endpoint answers from the in-memory skill graph, so a warm request
+runs no SQL at all. Responses carry an ETag derived from the catalog
+fingerprint and the request's query string plus a Last-Modified of the
+snapshot, so clients can revalidate with a cheap 304.
+
+The ``*_async`` views serve the same payloads under ASGI. Scoring is pure
+in-memory work and runs on the event loop; the only blocking step,
+rebuilding a stale snapshot, is pushed to a small dedicated thread pool.
+"""
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import EmptyPage, Paginator
+from django.db import close_old_connections
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import condition, require_GET
+
+from .instrumentation import enabled as instrumentation_enabled, instrumented, prometheus_text, registry
+from .recommendation_engine import RecommendationEngine
+from .result_cache import prometheus_text as result_cache_text, result_cache
+from .scoring import SCORING_MODELS
+from .search import KINDS as SEARCH_KINDS, search as search_catalog
+from .skill_graph import PrerequisiteCycleError, current_skill_graph, get_skill_graph
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_SEARCH_RESULTS = 50
+
+# Threads allowed to run blocking snapshot rebuilds for the async views
+ASYNC_WORKERS = getattr(settings, 'RECOMMENDER_ASYNC_WORKERS', 4)
+
+
+class ApiError(Exception):
+    """Rendered as a JSON error body with the given HTTP status"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _skill_ids(params):
+    raw = params.get('skills', '')
+    try:
+        return [int(pk) for pk in raw.split(',') if pk.strip()]
+    except ValueError:
+        raise ApiError("skills must be a comma-separated list of skill ids")
+
+
+def _int_param(params, name, default, minimum=1, maximum=None):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ApiError(f"{name} must be an integer")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ApiError(f"{name} must be between {minimum} and {maximum or 'infinity'}")
+    return value
+
+
+def _float_param(params, name):
+    if name not in params:
+        return None
+    try:
+        return float(params[name])
+    except ValueError:
+        raise ApiError(f"{name} must be a number")
+
+
+def _paginate(items, params):
+    page_size = _int_param(params, 'page_size', DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE)
+    paginator = Paginator(items, page_size)
+    try:
+        page = paginator.page(_int_param(params, 'page', 1))
+    except EmptyPage:
+        raise ApiError("page out of range", status=404)
+    return {
+        'count': paginator.count,
+        'page': page.number,
+        'num_pages': paginator.num_pages,
+        'results': list(page.object_list),
+    }
+
+
+def skill_json(skill):
+    return {
+        'id': skill.pk,
+        'name': skill.name,
+        'domain_id': skill.domain_id,
+        'difficulty_level': skill.difficulty_level,
+        'description': skill.description,
+    }
+
+
+def career_json(career):
+    return {
+        'id': career.pk,
+        'title': career.title,
+        'domain_id': career.domain_id,
+        'description': career.description,
+        'average_salary': career.average_salary,
+        'salary_min': career.salary_min,
+        'salary_max': career.salary_max,
+        'salary_currency': career.salary_currency,
+    }
+
+
+# --- payload builders, shared with the async views ---
+def _scoring_param(params):
+    scoring = params.get('scoring') or None
+    if scoring is not None and scoring not in SCORING_MODELS:
+        raise ApiError(f"scoring must be one of {', '.join(SCORING_MODELS)}")
+    return scoring
+
+
+def _salary_params(params):
+    currency = params.get('currency', '').strip().upper()
+    if currency and (len(currency) != 3 or not currency.isalpha()):
+        raise ApiError("currency must be a 3-letter ISO code")
+    return {
+        'min_salary': _int_param(params, 'min_salary', 0, minimum=0) if 'min_salary' in params else None,
+        'max_salary': _int_param(params, 'max_salary', 0, minimum=0) if 'max_salary' in params else None,
+        'currency': currency or None,
+    }
+
+
+def _career_results(results, params, skill_ids, scoring, graph=None):
+    payload = _paginate(results, params)
+    payload['results'] = [
+        dict(career_json(r['career']), score=r['score'],
+             matching_skills=r['matching_skills'], total_required=r['total_required'])
+        for r in payload['results']
+    ]
+    if params.get('explain') in ('1', 'true'):
+        # Only for the careers on this page
+        for item in payload['results']:
+            explanation = RecommendationEngine.explain_career_match(
+                item['id'], skill_ids, scoring=scoring, graph=graph)
+            item['contributions'] = [
+                dict(skill_id=c['skill'].pk, skill_name=c['skill'].name, status=c['status'],
+                     weight=c['weight'], factors=c['factors'], contribution=c['contribution'])
+                for c in explanation['contributions']
+            ]
+    return payload
+
+
+def career_matches_payload(domain_id, params, graph=None):
+    graph = graph or get_skill_graph()
+    if graph.domain_of(domain_id) is None:
+        raise ApiError("domain not found", status=404)
+    scoring = _scoring_param(params)
+    skill_ids = _skill_ids(params)
+    results = RecommendationEngine.get_matching_careers(
+        domain_id, skill_ids, min_score=_float_param(params, 'min_score'), scoring=scoring,
+        graph=graph, **_salary_params(params))
+    return _career_results(results, params, skill_ids, scoring, graph)
+
+
+def cross_domain_matches_payload(params):
+    scoring = _scoring_param(params)
+    skill_ids = _skill_ids(params)
+    results = RecommendationEngine.get_cross_domain_careers(
+        skill_ids, min_score=_float_param(params, 'min_score'), scoring=scoring, **_salary_params(params))
+    return _career_results(results, params, skill_ids, scoring)
+
+
+def suggested_skills_payload(domain_id, params, graph=None):
+    graph = graph or get_skill_graph()
+    if graph.domain_of(domain_id) is None:
+        raise ApiError("domain not found", status=404)
+    rank = params.get('rank') or None
+    if rank not in (None, 'careers'):
+        raise ApiError("rank must be 'careers'")
+    skills = RecommendationEngine.get_suggested_skills(
+        domain_id, _skill_ids(params), limit=None, rank=rank, graph=graph)
+    payload = _paginate(skills, params)
+    payload['results'] = [skill_json(skill) for skill in payload['results']]
+    return payload
+
+
+def learning_path_payload(career_id, params, graph=None):
+    graph = graph or get_skill_graph()
+    c = graph.career_index.get(career_id)
+    if c is None:
+        raise ApiError("career not found", status=404)
+    try:
+        steps = RecommendationEngine.plan_learning_path(career_id, _skill_ids(params), graph=graph)
+    except PrerequisiteCycleError as e:
+        # The catalog itself is inconsistent, not the request
+        raise ApiError(str(e), status=409)
+    payload = _paginate(list(enumerate(steps, start=1)), params)
+    payload['career'] = career_json(graph.career(c))
+    payload['results'] = [dict(skill_json(skill), step_order=order) for order, skill in payload['results']]
+    return payload
+
+
+def similar_user_careers_payload(params):
+    domain_id = _int_param(params, 'domain', 0, minimum=0) or None
+    if domain_id is not None and get_skill_graph().domain_of(domain_id) is None:
+        raise ApiError("domain not found", status=404)
+    results = RecommendationEngine.get_collaborative_careers(
+        _skill_ids(params), domain_id, limit=_int_param(params, 'limit', 10, maximum=MAX_PAGE_SIZE))
+    return {
+        'results': [dict(career_json(r['career']), score=r['score'], supporters=r['supporters'])
+                    for r in results],
+    }
+
+
+def search_payload(params):
+    kind = params.get('type', 'skills')
+    if kind not in SEARCH_KINDS:
+        raise ApiError(f"type must be one of {', '.join(SEARCH_KINDS)}")
+    query = params.get('q', '').strip()
+    if not query:
+        raise ApiError("q is required")
+    domain_id = _int_param(params, 'domain', 0, minimum=0) or None
+    if domain_id is not None and get_skill_graph().domain_of(domain_id) is None:
+        raise ApiError("domain not found", status=404)
+    limit = _int_param(params, 'limit', 10, maximum=MAX_SEARCH_RESULTS)
+    fuzzy = params.get('fuzzy', '1') not in ('0', 'false')
+    to_json = skill_json if kind == 'skills' else career_json
+    return {
+        'query': query,
+        'type': kind,
+        'results': [dict(to_json(obj), match=match)
+                    for obj, match in search_catalog(kind, query, domain_id, limit, fuzzy)],
+    }
+
+
+# --- conditional GET ---
+def _request_graph(request):
+    # Async views get theirs from warm_snapshot, fetched off the event loop
+    return getattr(request, 'skill_graph', None) or get_skill_graph()
+
+
+def catalog_etag(request, *args, **kwargs):
+    key = f"{_request_graph(request).fingerprint}:{request.path}?{request.META.get('QUERY_STRING', '')}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    return _request_graph(request).built_at
+
+
+def _respond(build, pk, params, graph=None):
+    try:
+        return JsonResponse(build(pk, params, graph=graph))
+    except ApiError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+
+@instrumented('api.career_matches')
+@require_GET
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+def career_matches(request, domain_id):
+    """Careers in a domain ranked against ?skills=, paginated"""
+    return _respond(career_matches_payload, domain_id, request.GET)
+
+
+@instrumented('api.cross_domain_matches')
+@require_GET
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+def cross_domain_matches(request):
+    """Careers of any domain sharing a skill with ?skills=, ranked and paginated"""
+    try:
+        return JsonResponse(cross_domain_matches_payload(request.GET))
+    except ApiError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+
+@instrumented('api.suggested_skills')
+@require_GET
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+def suggested_skills(request, domain_id):
+    """Skills unlocked by ?skills= in a domain, paginated"""
+    return _respond(suggested_skills_payload, domain_id, request.GET)
+
+
+@instrumented('api.learning_path')
+@require_GET
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+def learning_path(request, career_id):
+    """Ordered steps from ?skills= to a career, paginated"""
+    return _respond(learning_path_payload, career_id, request.GET)
+
+
+@instrumented('api.similar_user_careers')
+@require_GET
+def similar_user_careers(request):
+    """Careers chosen by users whose skills are most like ?skills=.
+
+    No ETag: results follow the neighbour index, not the catalog.
+    """
+    try:
+        return JsonResponse(similar_user_careers_payload(request.GET))
+    except ApiError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+
+@instrumented('api.search')
+@require_GET
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+def search(request):
+    """Skills or careers (?type=) matching ?q=, for autocomplete"""
+    try:
+        return JsonResponse(search_payload(request.GET))
+    except ApiError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+
+@require_GET
+def metrics(request):
+    """Instrumentation histograms and result cache stats as Prometheus text, or JSON with ?format=json"""
+    if not instrumentation_enabled():
+        return JsonResponse({'error': "instrumentation is disabled"}, status=404)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'calls': registry.snapshot(), 'result_cache': result_cache().stats()})
+    return HttpResponse(prometheus_text() + result_cache_text(),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# --- async views ---
+_executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix='recommender')
+
+
+def _warm_snapshot():
+    try:
+        graph = get_skill_graph()
+        graph.fingerprint
+        return graph
+    finally:
+        close_old_connections()
+
+
+def _ready_graph():
+    graph = current_skill_graph()
+    # fingerprint is a cached_property; it is ready once it's in the instance dict
+    return graph if graph is not None and 'fingerprint' in vars(graph) else None
+
+
+def warm_snapshot(view):
+    """Load the snapshot off the event loop before an async view needs it.
+
+    The graph is fetched once, as ``request.skill_graph``, and the ETag
+    functions and payload builders use that one; a catalog change landing
+    mid-request can't make them query from the event loop.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        graph = _ready_graph()
+        if graph is None:
+            graph = await sync_to_async(_warm_snapshot, thread_sensitive=False, executor=_executor)()
+        request.skill_graph = graph
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _respond_off_loop(build, pk, params, graph):
+    try:
+        return _respond(build, pk, params, graph)
+    finally:
+        close_old_connections()
+
+
+async def _respond_cached(build, pk, request):
+    """_respond for builders going through the result cache.
+
+    A cache backend may have to query, so with one configured the builder
+    runs in a worker thread and the lookup is awaited; otherwise the
+    in-process LRU and the snapshot answer on the loop.
+    """
+    if result_cache().backend is None:
+        return _respond(build, pk, request.GET, request.skill_graph)
+    return await sync_to_async(_respond_off_loop, thread_sensitive=False, executor=_executor)(
+        build, pk, request.GET, request.skill_graph)
+
+
+@instrumented('api.career_matches_async')
+@require_GET
+@warm_snapshot
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+async def career_matches_async(request, domain_id):
+    return await _respond_cached(career_matches_payload, domain_id, request)
+
+
+@instrumented('api.suggested_skills_async')
+@require_GET
+@warm_snapshot
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+async def suggested_skills_async(request, domain_id):
+    return await _respond_cached(suggested_skills_payload, domain_id, request)
+
+
+@instrumented('api.learning_path_async')
+@require_GET
+@warm_snapshot
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+async def learning_path_async(request, career_id):
+    return _respond(learning_path_payload, career_id, request.GET, request.skill_graph)